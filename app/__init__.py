@@ -1,14 +1,33 @@
 # app/__init__.py
+import os
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 from . import config # Import the config module from the current package
 from . import extensions # Import extensions from the current package
+from .utils.uploads import UploadRequest # Streams file uploads straight into storage
 from .models import job # Import models, specifically Job to ensure it's known by SQLAlchemy via extensions.db
+from .models import job_status_count # Summary table of job counts per status
+from .models import email_outbox # Queued notification emails
+from .models import file_blob # Deduplicated upload storage
+from .models import estimator_model # Fitted print time/weight estimators
+from .models import file_move # Journal of job file moves
+from .models import storage_scan # Directory listings cached by the storage reconciler
 
 def create_app(config_class_name="default"):
     """Application factory."""
     app = Flask(__name__)
     app.config.from_object(config.config[config_class_name])
     config.config[config_class_name].init_app(app)
+    app.request_class = UploadRequest
+
+    # Cache compiled template bytecode on disk (must be set before jinja_env is first used)
+    bytecode_cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if bytecode_cache_dir:
+        try:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(bytecode_cache_dir)}
+        except OSError as e:
+            print(f"Warning: Could not create template cache directory {bytecode_cache_dir}. Error: {e}")
 
     # Initialize extensions
     extensions.db.init_app(app)
@@ -22,6 +41,34 @@ def create_app(config_class_name="default"):
     from .routes.dashboard import dashboard as dashboard_blueprint
     app.register_blueprint(dashboard_blueprint, url_prefix='/dashboard')
 
+    # Background delivery of queued emails
+    from .services.outbox_service import init_outbox_worker
+    init_outbox_worker(app)
+
+    # Process pool for background rendering (thumbnails)
+    from .services.worker_pool import init_worker_pool
+    init_worker_pool(app)
+
+    # Background file moves for status transitions
+    from .services.file_mover import init_file_mover
+    init_file_mover(app)
+
+    # Periodic check that the status directories match the jobs table
+    from .services.storage_reconciler import init_storage_reconciler
+    init_storage_reconciler(app)
+
+    # In-memory index of file presence and sizes in the status directories
+    from .services.storage_index import init_storage_index
+    init_storage_index(app)
+
+    # In-memory quotes for /api/quote, keyed by file hash
+    from .services.quote_service import init_quote_cache
+    init_quote_cache(app)
+
+    # Register maintenance CLI commands
+    from .cli import register_commands
+    register_commands(app)
+
     # Register template filters for display formatting
     from .utils.helpers import (
         get_printer_display_name, get_color_display_name, get_discipline_display_name,
@@ -34,4 +81,8 @@ def create_app(config_class_name="default"):
     app.jinja_env.filters['detailed_datetime'] = format_datetime_detailed
     app.jinja_env.filters['round_time'] = round_time_conservative
 
+    # Compile email templates once at startup
+    from .services.email_service import warm_email_templates
+    warm_email_templates(app)
+
     return app 
\ No newline at end of file
@@ -0,0 +1,120 @@
+# app/cli.py
+"""
+Custom `flask` CLI commands for maintenance tasks.
+"""
+import click
+
+def register_commands(app):
+    """Attach maintenance commands to the Flask CLI."""
+
+    @app.cli.command('check-job-counts')
+    @click.option('--repair', is_flag=True, help='Overwrite drifted counters with the recounted values.')
+    def check_job_counts(repair):
+        """Verify job_status_counts against a full recount of the jobs table."""
+        from app.services.stats_service import verify_status_counts
+
+        drift = verify_status_counts(repair=repair)
+        if not drift:
+            click.echo('Job status counts are consistent.')
+            return
+
+        for status, stored, actual in drift:
+            click.echo(f"{status}: stored={stored if stored is not None else 'missing'} actual={actual}")
+        if repair:
+            click.echo(f'Repaired {len(drift)} status count(s).')
+        else:
+            click.echo('Run with --repair to fix these counts.')
+            raise SystemExit(1)
+
+    @app.cli.command('send-queued-emails')
+    def send_queued_emails():
+        """Deliver every email in the outbox that is currently due."""
+        from app.services.outbox_service import deliver_due_messages
+
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_due_messages()
+            total_sent += sent
+            total_failed += failed
+            if sent + failed == 0:
+                break
+        click.echo(f'Sent {total_sent} email(s); {total_failed} failed and will be retried or marked FAILED.')
+
+    @app.cli.command('prune-blobs')
+    def prune_blobs():
+        """Delete stored uploads that no job references any more."""
+        from app.services.blob_service import prune_unreferenced_blobs
+
+        removed, freed = prune_unreferenced_blobs()
+        click.echo(f'Removed {removed} unreferenced blob(s), freed {freed / (1024 * 1024):.1f} MB.')
+
+    @app.cli.command('process-file-moves')
+    @click.option('--retry-failed', is_flag=True, help='Queue moves that gave up (FAILED) again first.')
+    def process_file_moves(retry_failed):
+        """Run every queued background file move that is currently due."""
+        from app.extensions import db
+        from app.services.file_mover import process_due_moves, prune_finished_moves, retry_failed_moves
+
+        if retry_failed:
+            click.echo(f'Queued {retry_failed_moves()} failed move(s) again.')
+            db.session.commit()
+        moved, failed = process_due_moves()
+        click.echo(f'Moved {moved} file(s); {failed} failed and will be retried or marked FAILED.')
+        click.echo(f'Deleted {prune_finished_moves()} finished move(s) older than the retention period.')
+
+    @app.cli.command('reconcile-storage')
+    @click.option('--full', is_flag=True, help='List every status directory, ignoring the mtime checkpoints.')
+    def reconcile_storage_command(full):
+        """Report files the jobs table doesn't account for, and jobs whose file is missing or misplaced."""
+        from app.services.storage_reconciler import reconcile_storage
+
+        report = reconcile_storage(full=full)
+        for path in report['orphans']:
+            click.echo(f'orphan      {path}')
+        for problem in report['missing']:
+            click.echo(f"missing     {problem['job_id']} ({problem['status']}) {problem['file_path']}")
+        for problem in report['mismatched']:
+            found = f" found in {', '.join(problem['found_in'])}" if problem['found_in'] else ''
+            click.echo(f"mismatched  {problem['job_id']} ({problem['status']}) {problem['file_path']}: "
+                       f"expected in {problem['expected_dir']}{found}")
+        click.echo(f"Checked {report['files']} file(s) ({report['directories_listed']} director(ies) re-listed); "
+                   f"{report['in_flight']} job(s) with a file move in progress skipped.")
+        if report['orphans'] or report['missing'] or report['mismatched']:
+            raise SystemExit(1)
+
+    @app.cli.command('train-estimator')
+    def train_estimator():
+        """Refit the print time and weight models from staff-entered job history."""
+        from app.services.estimator_service import retrain, MIN_TRAINING_JOBS
+
+        trained = retrain()
+        # Cached quotes were priced with the old models (a running server sees the new trained_at and clears its own)
+        app.extensions['quote_cache'].clear()
+        if not trained:
+            click.echo(f'Not enough history yet: each printer or print type needs {MIN_TRAINING_JOBS} approved, measured jobs.')
+            return
+        for scope, target, count, loo_mae in trained:
+            click.echo(f'{scope:<24} {target:<11} n={count:<5} leave-one-out MAE={loo_mae:.2f}')
+        click.echo(f'Stored {len(trained)} model(s).')
+
+    @app.cli.command('estimator-report')
+    def estimator_report():
+        """Compare upload-time estimates with the weight and time staff entered."""
+        from app.services.estimator_service import accuracy_report
+
+        rows = accuracy_report()
+        if not rows:
+            click.echo('No approved jobs with stored estimates yet.')
+            return
+        click.echo(f"{'group':<24} {'jobs':>5}  {'weight MAE':>10} {'MAPE':>6} {'in 95%':>6}  {'time MAE':>8} {'MAPE':>6} {'in 95%':>6}")
+        for row in rows:
+            cells = []
+            for target in ('weight_g', 'time_hours'):
+                stats = row[target]
+                if stats is None:
+                    cells.append(f"{'-':>10} {'-':>6} {'-':>6}" if target == 'weight_g' else f"{'-':>8} {'-':>6} {'-':>6}")
+                    continue
+                coverage = f"{stats['coverage']:.0f}%" if stats['coverage'] is not None else '-'
+                width = 10 if target == 'weight_g' else 8
+                cells.append(f"{stats['mae']:>{width}.2f} {stats['mape']:>5.0f}% {coverage:>6}")
+            click.echo(f"{row['group']:<24} {row['jobs']:>5}  {cells[0]}  {cells[1]}")
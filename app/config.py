@@ -15,6 +15,16 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@example.com')
+    MAIL_MAX_PER_CONNECTION = int(os.environ.get('MAIL_MAX_PER_CONNECTION', 50)) # Reconnect after this many messages in a batch
+
+    # Email outbox: routes queue messages and a background worker delivers them
+    EMAIL_OUTBOX_WORKER_ENABLED = os.environ.get('EMAIL_OUTBOX_WORKER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', 2)) # Delivery threads
+    EMAIL_OUTBOX_POLL_SECONDS = 5      # How often the worker checks for due messages when idle
+    EMAIL_OUTBOX_BATCH_SIZE = 20       # Messages claimed per dispatch round
+    EMAIL_MAX_ATTEMPTS = 6             # Give up (status FAILED) after this many tries
+    EMAIL_RETRY_BASE_SECONDS = 30      # Retry delays: 30s, 60s, 120s, ...
+    EMAIL_SEND_LEASE_SECONDS = 300     # A SENDING message is retried if not finished within this time
     
     # Base URL for generating confirmation links in emails
     BASE_URL = os.environ.get('BASE_URL', 'http://localhost:5000')
@@ -30,8 +40,57 @@ class Config:
     # e.g., 'Z:\\3DPrintSystemV2\\storage' (Note: use double backslashes in Python strings or raw strings r'Z:\\3DPrintSystemV2\\storage')
     SLICER_PROTOCOL_BASE_PATH = os.environ.get('SLICER_PROTOCOL_BASE_PATH') or 'Z:\\3DPrintSystemV2\\storage' # Make sure SlicerOpener.py's AUTHORITATIVE_STORAGE_BASE_PATH matches
 
+    # Uploads are streamed straight into storage/Uploaded and cut off once they pass
+    # MAX_UPLOAD_SIZE_MB; MAX_CONTENT_LENGTH rejects bodies that declare a larger size
+    # up front (the extra 1MB leaves room for the other form fields)
+    MAX_UPLOAD_SIZE_MB = int(os.environ.get('MAX_UPLOAD_SIZE_MB', 50))
+    MAX_CONTENT_LENGTH = (MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024
+
+    # Background work (thumbnail rendering, mesh health checks) runs in a shared
+    # process pool, so heavy meshes never tie up request threads
+    WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES', 2))
+    THUMBNAIL_SIZE = 300 # Pixels (square); cached as storage/thumbnails/<file_hash>.png
+    MESH_REPAIR_ENABLED = os.environ.get('MESH_REPAIR_ENABLED', 'true').lower() in ['true', 'on', '1'] # Write storage/repaired/<file_hash>.stl when a fix is possible
+
+    # Status transitions queue file moves; a background mover runs them so requests
+    # never wait on the (possibly slow, networked) storage share
+    FILE_MOVER_ENABLED = os.environ.get('FILE_MOVER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    FILE_MOVE_WORKERS = int(os.environ.get('FILE_MOVE_WORKERS', 4))             # Mover threads
+    FILE_MOVE_MAX_PER_SHARE = int(os.environ.get('FILE_MOVE_MAX_PER_SHARE', 2)) # Concurrent moves on one share
+    FILE_MOVE_POLL_SECONDS = 5         # How often the mover checks for queued moves when idle
+    FILE_MOVE_BATCH_SIZE = 20          # Moves claimed per dispatch round
+    FILE_MOVE_MAX_ATTEMPTS = 8         # Give up (status FAILED) after this many tries
+    FILE_MOVE_RETRY_BASE_SECONDS = 5   # Retry delays: 5s, 10s, 20s, ...
+    FILE_MOVE_LEASE_SECONDS = 300      # A MOVING entry is retried if not finished within this time
+    FILE_MOVE_JOURNAL_RETENTION_DAYS = 30 # Finished file_moves entries are deleted after this long
+
+    # The reconciler compares the status directories with the jobs table and logs orphan,
+    # missing and misplaced files; directories whose mtime hasn't changed are not re-listed
+    STORAGE_RECONCILE_ENABLED = os.environ.get('STORAGE_RECONCILE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    STORAGE_RECONCILE_INTERVAL_SECONDS = int(os.environ.get('STORAGE_RECONCILE_INTERVAL_SECONDS', 3600))
+
+    # File presence and sizes are answered from an in-memory index of the status directories,
+    # kept current with inotify on Linux ('auto'/'inotify') or by polling directory mtimes ('poll')
+    STORAGE_INDEX_ENABLED = os.environ.get('STORAGE_INDEX_ENABLED', 'true').lower() in ['true', 'on', '1']
+    STORAGE_INDEX_MODE = os.environ.get('STORAGE_INDEX_MODE', 'auto')
+    STORAGE_INDEX_POLL_SECONDS = 10     # Polling: how often directory mtimes are checked
+    STORAGE_INDEX_RESYNC_SECONDS = 300  # Full resync (both modes): changes from other machines, files rewritten in place
+
+    QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE', 512)) # Quotes kept in memory by file hash for /api/quote
+    QUOTE_RATE_LIMIT_PER_MINUTE = int(os.environ.get('QUOTE_RATE_LIMIT_PER_MINUTE', 20)) # /api/quote requests per client IP
+    QUOTE_MAX_RUNNING = 2      # Quote analyses running at once; more get a 503
+    QUOTE_TIMEOUT_SECONDS = 30 # An analysis taking longer is abandoned (503)
+
     STAFF_PASSWORD = os.environ.get('STAFF_PASSWORD') or 'defaultstaffpassword' # Change in production
 
+    # Compiled Jinja template bytecode is cached here so templates (including
+    # email bodies) are compiled once rather than on every process start
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(project_root, 'instance', 'jinja_cache')
+
+    # Number of jobs per page on dashboard lists and /dashboard/api/jobs/<status>
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 50))
+    DASHBOARD_MAX_PAGE_SIZE = 200 # Upper bound for the ?limit= parameter on the jobs API
+
     @staticmethod
     def init_app(app):
         # Ensure storage directories exist when the app initializes
@@ -45,7 +104,9 @@ class Config:
                 os.path.join(storage_root, 'Printing'),
                 os.path.join(storage_root, 'Completed'),
                 os.path.join(storage_root, 'PaidPickedUp'),
-                os.path.join(storage_root, 'thumbnails')
+                os.path.join(storage_root, 'thumbnails'),
+                os.path.join(storage_root, 'blobs'),
+                os.path.join(storage_root, 'repaired')
             ]
             for path in required_dirs:
                 try:
@@ -67,6 +128,12 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False # Disable CSRF for tests
+    EMAIL_OUTBOX_WORKER_ENABLED = False # Tests drain the outbox explicitly with deliver_due_messages()
+    FILE_MOVER_ENABLED = False # Tests run queued moves explicitly with process_due_moves()
+    STORAGE_RECONCILE_ENABLED = False # Tests call reconcile_storage() explicitly
+    STORAGE_INDEX_ENABLED = False # File checks stat the file directly in tests
+    JINJA_BYTECODE_CACHE_DIR = None # Don't write template caches from tests
+    WORKER_PROCESSES = 1
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
@@ -21,10 +21,13 @@ def FileSizeLimit(max_size_mb=50, message=None):
     
     def _validate(form, field):
         if field.data:
-            # Get file size by seeking to end and back
-            field.data.seek(0, 2)  # Seek to end
-            file_size = field.data.tell()  # Get position (file size)
-            field.data.seek(0)  # Reset to beginning
+            # Streamed uploads (app.utils.uploads) already know their size
+            file_size = getattr(field.data.stream, 'size', None)
+            if file_size is None:
+                # Get file size by seeking to end and back
+                field.data.seek(0, 2)  # Seek to end
+                file_size = field.data.tell()  # Get position (file size)
+                field.data.seek(0)  # Reset to beginning
             
             max_size_bytes = max_size_mb * 1024 * 1024  # Convert MB to bytes
             if file_size > max_size_bytes:
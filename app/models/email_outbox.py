@@ -0,0 +1,28 @@
+# app/models/email_outbox.py
+from ..extensions import db
+from datetime import datetime
+
+class EmailOutbox(db.Model):
+    """Email waiting for (or done with) background delivery."""
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), db.ForeignKey('jobs.id'), nullable=True) # Job the message is about, if any
+    kind = db.Column(db.String(32), nullable=True)          # e.g. "approval", "rejection", "completion"
+    recipient = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(256), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    text_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='QUEUED', nullable=False) # Enum: QUEUED, SENDING, SENT, FAILED
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False) # Retry time, or lease expiry while SENDING
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_email_outbox_job_id', 'job_id'),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.kind} -> {self.recipient} - {self.status}>'
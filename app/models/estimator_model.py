@@ -0,0 +1,23 @@
+# app/models/estimator_model.py
+from ..extensions import db
+from datetime import datetime
+
+class EstimatorModel(db.Model):
+    """A fitted least-squares model predicting one staff-entered value from mesh features."""
+    __tablename__ = 'estimator_models'
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(64), nullable=False)        # Printer key, or "type:Filament"/"type:Resin" for pooled models
+    target = db.Column(db.String(32), nullable=False)       # "weight_g" or "time_hours"
+    coefficients = db.Column(db.JSON, nullable=False)       # One per estimator_service.FEATURES entry, intercept first
+    xtx_inv = db.Column(db.JSON, nullable=False)            # (X'X)^-1 of the training features, for prediction intervals
+    residual_std = db.Column(db.Float, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    loo_mae = db.Column(db.Float, nullable=True)            # Leave-one-out mean absolute error at training time
+    trained_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'target', name='uq_estimator_models_scope_target'),
+    )
+
+    def __repr__(self):
+        return f'<EstimatorModel {self.scope}/{self.target} n={self.sample_count}>'
@@ -0,0 +1,14 @@
+# app/models/file_blob.py
+from ..extensions import db
+from datetime import datetime
+
+class FileBlob(db.Model):
+    """A deduplicated upload in storage/blobs; jobs point at it through jobs.file_hash."""
+    __tablename__ = 'file_blobs'
+    sha256 = db.Column(db.String(64), primary_key=True)                 # Hex digest; blob lives at blobs/<sha256[:2]>/<sha256>
+    size = db.Column(db.BigInteger, nullable=False)                     # Bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<FileBlob {self.sha256[:12]} {self.size} bytes>'
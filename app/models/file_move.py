@@ -0,0 +1,25 @@
+# app/models/file_move.py
+from ..extensions import db
+from datetime import datetime
+
+class FileMove(db.Model):
+    """Journal entry for a job file moved between status directories (see file_mover)."""
+    __tablename__ = 'file_moves'
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), db.ForeignKey('jobs.id'), nullable=True) # Job whose file_path the move updates
+    source_path = db.Column(db.String(512), nullable=False)
+    dest_path = db.Column(db.String(512), nullable=False)
+    status = db.Column(db.String(20), default='QUEUED', nullable=False) # Enum: QUEUED, MOVING, DONE, FAILED
+    attempts = db.Column(db.Integer, default=0, nullable=False)    # Background move attempts so far
+    next_attempt_at = db.Column(db.DateTime, nullable=True)        # QUEUED: retry time; MOVING: lease expiry
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_file_moves_status_created_at', 'status', 'created_at'),
+        db.Index('ix_file_moves_job_id', 'job_id'),
+    )
+
+    def __repr__(self):
+        return f'<FileMove {self.id} {self.source_path} -> {self.dest_path} - {self.status}>'
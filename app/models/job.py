@@ -11,6 +11,8 @@ class Job(db.Model):
     original_filename = db.Column(db.String(256), nullable=False) # Original name from student upload
     display_name = db.Column(db.String(256), nullable=False)      # Standardized name or slicer output name
     file_path = db.Column(db.String(512), nullable=False)         # Full network path to the authoritative file
+    file_hash = db.Column(db.String(64), nullable=True)           # SHA-256 of the upload; key into file_blobs (NULL for pre-dedup jobs)
+    model_path = db.Column(db.String(512), nullable=True)         # The student's upload when file_path is a staff-sliced file; moves with the job
     status = db.Column(db.String(50), default='UPLOADED', nullable=False) # Enum: UPLOADED, PENDING, REJECTED, READYTOPRINT, PRINTING, COMPLETED, PAIDPICKEDUP
     printer = db.Column(db.String(64), nullable=True)      # Selected printer type/method
     color = db.Column(db.String(32), nullable=True)
@@ -33,6 +35,29 @@ class Job(db.Model):
     scaled_correctly = db.Column(db.Boolean, nullable=True) # From student submission form
     acknowledged_minimum_charge = db.Column(db.Boolean, nullable=True) # From student submission form
 
+    # Measured from the uploaded model at submission (see mesh_analysis); NULL if it could not be parsed
+    triangle_count = db.Column(db.Integer, nullable=True)
+    volume_mm3 = db.Column(db.Float, nullable=True)
+    surface_area_mm2 = db.Column(db.Float, nullable=True)
+    size_x_mm = db.Column(db.Float, nullable=True)   # Bounding box dimensions
+    size_y_mm = db.Column(db.Float, nullable=True)
+    size_z_mm = db.Column(db.Float, nullable=True)
+    slicer_metadata = db.Column(db.JSON, nullable=True) # Estimates embedded by the slicer in 3MF uploads (print_time_hours, filament_g, ...)
+    mesh_health = db.Column(db.JSON, nullable=True)     # Background mesh check/repair report (see mesh_health); NULL until it finishes
+    fit_check = db.Column(db.JSON, nullable=True)       # Build-volume fit report (see fit_check.check_job_fit)
+    estimated_weight_g = db.Column(db.Float, nullable=True)          # Computed at upload (see cost_service.estimate_job)
+    estimated_cost_usd = db.Column(db.Numeric(6, 2), nullable=True)  # Pre-filled on the approve form; staff confirm
+    estimated_time_hours = db.Column(db.Float, nullable=True)
+    estimate_info = db.Column(db.JSON, nullable=True)                # Estimate source and 95% intervals (see cost_service.estimate_job)
+    sliced_analysis = db.Column(db.JSON, nullable=True) # Time/filament from the staff-sliced file (see gcode_analyzer), with its name, size and mtime
+    file_move_status = db.query_expression() # Status of the oldest unfinished file move; only loaded by file_mover.with_move_state()
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_created_at_id', 'status', 'created_at', 'id'), # Dashboard lists, keyset paging, status counts
+        db.Index('ix_jobs_student_email', 'student_email'),
+        db.Index('ix_jobs_updated_at', 'updated_at'),
+        db.Index('ix_jobs_file_hash', 'file_hash'),
+    )
 
     def __repr__(self):
         return f'<Job {self.id} - {self.student_name} - {self.status}>'
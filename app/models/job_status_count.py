@@ -0,0 +1,13 @@
+# app/models/job_status_count.py
+from ..extensions import db
+from datetime import datetime
+
+class JobStatusCount(db.Model):
+    """Incrementally maintained number of jobs in each status (one row per status)."""
+    __tablename__ = 'job_status_counts'
+    status = db.Column(db.String(50), primary_key=True)                 # Same values as Job.status
+    count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<JobStatusCount {self.status}={self.count}>'
@@ -0,0 +1,13 @@
+# app/models/storage_scan.py
+from ..extensions import db
+
+class StorageScanCheckpoint(db.Model):
+    """Last listing of one status directory, reused by the storage reconciler while the directory's mtime is unchanged."""
+    __tablename__ = 'storage_scan_checkpoints'
+    directory = db.Column(db.String(64), primary_key=True)     # Status directory name, e.g. "Pending"
+    mtime_ns = db.Column(db.BigInteger, nullable=False)        # Directory mtime when it was listed
+    listed_at_ns = db.Column(db.BigInteger, nullable=False)    # When it was listed (time.time_ns())
+    entries = db.Column(db.Text, nullable=False)               # JSON list of file names in the directory
+
+    def __repr__(self):
+        return f'<StorageScanCheckpoint {self.directory} mtime_ns={self.mtime_ns}>'
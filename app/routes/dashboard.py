@@ -2,14 +2,26 @@
 """
 Dashboard routes for staff authentication and job management.
 """
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app, jsonify, send_file, abort
 from app.models.job import Job
 from app.extensions import db
-from app.services.cost_service import calculate_cost, get_printer_display_name
-from app.services.email_service import send_approval_email, send_rejection_email
+from app.services.cost_service import calculate_cost, get_printer_display_name, get_default_material
+from app.services.outbox_service import (
+    queue_approval_email, queue_rejection_email, queue_completion_email,
+    get_job_emails, wake_outbox_worker
+)
 from app.services.file_service import FileService
+from app.services.stats_service import get_dashboard_stats, get_status_histogram, record_status_change
+from app.services.thumbnail_service import thumbnail_path, queue_thumbnail
+from app.services.mesh_health import repaired_path, queue_health_check
+from app.services.gcode_analyzer import analyzed_sliced_path, is_current, queue_sliced_analysis
+from app.services.bulk_service import BULK_ACTIONS, bulk_transition
+from app.services.file_mover import queue_move, move_states, retry_failed_moves, wake_file_mover, with_move_state
 from app.utils.tokens import generate_confirmation_token
+from app.utils.pagination import paginate_jobs
 from datetime import datetime
+import os
+import re
 
 dashboard = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -58,23 +70,26 @@ def index():
         status = 'UPLOADED'
     
     try:
-        # Get jobs for the selected status
-        jobs = Job.query.filter_by(status=status).order_by(Job.created_at.desc()).all()
-        
-        # Count jobs by status for dashboard stats
-        stats = {
-            'uploaded': Job.query.filter_by(status='UPLOADED').count(),
-            'pending': Job.query.filter_by(status='PENDING').count(),
-            'ready': Job.query.filter_by(status='READYTOPRINT').count(),
-            'printing': Job.query.filter_by(status='PRINTING').count(),
-            'completed': Job.query.filter_by(status='COMPLETED').count(),
-            'paidpickedup': Job.query.filter_by(status='PAIDPICKEDUP').count(),
-            'rejected': Job.query.filter_by(status='REJECTED').count()
-        }
+        # Get one page of jobs for the selected status
+        try:
+            page = paginate_jobs(
+                with_move_state(Job.query.filter_by(status=status)),
+                page_size=current_app.config.get('DASHBOARD_PAGE_SIZE', 50),
+                after=request.args.get('after'),
+                before=request.args.get('before')
+            )
+        except ValueError:
+            # Stale or tampered cursor - start again from the first page
+            page = paginate_jobs(with_move_state(Job.query.filter_by(status=status)),
+                                 page_size=current_app.config.get('DASHBOARD_PAGE_SIZE', 50))
+        
+        # Count jobs by status for dashboard stats (single aggregate query)
+        stats = get_dashboard_stats()
         
         return render_template('dashboard/index.html', 
                              title='Staff Dashboard',
-                             jobs=jobs,
+                             jobs=page.items,
+                             page=page,
                              stats=stats,
                              current_status=status)
     except Exception as e:
@@ -86,6 +101,21 @@ def index():
                              stats={},
                              current_status=status)
 
+@dashboard.route('/api/stats')
+@login_required
+def api_stats():
+    """API endpoint to get job counts for every status."""
+    try:
+        counts = get_status_histogram()
+        return jsonify({
+            'status': 'success',
+            'counts': counts,
+            'total': sum(counts.values())
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error loading job stats: {str(e)}")
+        return jsonify({'error': 'Error loading stats'}), 500
+
 @dashboard.route('/api/jobs/<status>')
 @login_required
 def api_jobs_by_status(status):
@@ -97,10 +127,21 @@ def api_jobs_by_status(status):
         return jsonify({'error': 'Invalid status'}), 400
     
     try:
-        jobs = Job.query.filter_by(status=status).order_by(Job.created_at.desc()).all()
+        page_size = request.args.get('limit', type=int) or current_app.config.get('DASHBOARD_PAGE_SIZE', 50)
+        page_size = max(1, min(page_size, current_app.config.get('DASHBOARD_MAX_PAGE_SIZE', 200)))
+        
+        try:
+            page = paginate_jobs(
+                with_move_state(Job.query.filter_by(status=status)),
+                page_size=page_size,
+                after=request.args.get('after'),
+                before=request.args.get('before')
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
         jobs_data = []
-        for job in jobs:
+        for job in page.items:
             jobs_data.append({
                 'id': job.id,
                 'display_name': job.display_name,
@@ -111,13 +152,16 @@ def api_jobs_by_status(status):
                 'material': job.material or 'N/A',
                 'status': job.status,
                 'created_at': job.created_at.strftime('%m/%d/%Y at %I:%M %p'),
-                'cost_usd': str(job.cost_usd) if job.cost_usd else 'N/A'
+                'cost_usd': str(job.cost_usd) if job.cost_usd else 'N/A',
+                'file_move': job.file_move_status
             })
         
         return jsonify({
             'status': 'success',
             'jobs': jobs_data,
-            'count': len(jobs_data)
+            'count': len(jobs_data),
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor
         })
     except Exception as e:
         current_app.logger.error(f"Error loading jobs for status {status}: {str(e)}")
@@ -128,9 +172,91 @@ def api_jobs_by_status(status):
 def job_detail(job_id):
     """View detailed information about a specific job."""
     job = Job.query.get_or_404(job_id)
+    if job.mesh_health is None:
+        # Jobs submitted before health checks existed (or whose check was lost) get one now
+        try:
+            queue_health_check(job)
+        except Exception as e:
+            current_app.logger.warning(f"Could not queue mesh health check for job {job_id}: {str(e)}")
+
+    # A sliced file staff saved next to the upload is analyzed for exact time and filament
+    sliced_path = FileService.find_sliced_file(job.file_path) if job.status == 'UPLOADED' else None
+    sliced_analysis = None
+    if sliced_path:
+        if is_current(job, sliced_path):
+            sliced_analysis = job.sliced_analysis
+        else:
+            try:
+                queue_sliced_analysis(job, sliced_path)
+            except Exception as e:
+                current_app.logger.warning(f"Could not queue sliced file analysis for job {job_id}: {str(e)}")
     return render_template('dashboard/job_detail.html', 
                          title=f'Job {job_id[:8]}',
-                         job=job)
+                         job=job,
+                         default_material=get_default_material(job.printer),
+                         sliced_file=os.path.basename(sliced_path) if sliced_path else None,
+                         sliced_analysis=sliced_analysis,
+                         file_move=move_states([job.id]).get(job.id),
+                         file_size=FileService.get_file_size(job.file_path) if FileService.file_exists(job.file_path) else None,
+                         emails=get_job_emails(job.id))
+
+@dashboard.route('/thumbnail/<file_hash>.png')
+@login_required
+def thumbnail(file_hash):
+    """Serve a cached model thumbnail. Thumbnails are keyed by content hash, so they never change."""
+    if not re.fullmatch(r'[0-9a-f]{64}', file_hash):
+        abort(404)
+
+    path = thumbnail_path(file_hash)
+    if not os.path.exists(path):
+        # Not rendered yet (or the job predates thumbnails): queue it for next time
+        job = Job.query.filter_by(file_hash=file_hash).first()
+        if job:
+            try:
+                queue_thumbnail(file_hash, *FileService.model_source(job))
+            except Exception as e:
+                current_app.logger.warning(f"Could not queue thumbnail {file_hash[:12]}: {str(e)}")
+        abort(404)
+
+    response = send_file(path, mimetype='image/png', max_age=31536000)
+    response.cache_control.public = False # Staff-only content
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+@dashboard.route('/job/<job_id>/repaired.stl')
+@login_required
+def download_repaired(job_id):
+    """Download the automatically repaired copy of a job's model."""
+    job = Job.query.get_or_404(job_id)
+    if not (job.mesh_health or {}).get('repaired') or not job.file_hash:
+        abort(404)
+    path = repaired_path(job.file_hash)
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype='model/stl', as_attachment=True,
+                     download_name=f"{os.path.splitext(job.display_name)[0]}_repaired.stl")
+
+@dashboard.route('/job/<job_id>/retry_move', methods=['POST'])
+@login_required
+def retry_file_move(job_id):
+    """Queue a job's failed background file move again."""
+    job = Job.query.get_or_404(job_id)
+    try:
+        retried = retry_failed_moves(job.id)
+        db.session.commit()
+        wake_file_mover()
+    except Exception as e:
+        current_app.logger.error(f"Error retrying file move for job {job_id}: {str(e)}")
+        db.session.rollback()
+        flash('Error retrying the file move. Please try again.', 'error')
+        return redirect(url_for('dashboard.job_detail', job_id=job_id))
+
+    if retried:
+        flash('File move queued again.', 'success')
+    else:
+        flash('This job has no failed file move.', 'info')
+    return redirect(url_for('dashboard.job_detail', job_id=job_id))
 
 @dashboard.route('/job/<job_id>/approve', methods=['POST'])
 @login_required
@@ -173,26 +299,22 @@ def approve_job(job_id):
         job.updated_at = datetime.utcnow()
         job.last_updated_by = 'staff'
         
-        # Move file from Uploaded to Pending
-        try:
-            new_file_path = FileService.move_file(
-                job.file_path, 'Uploaded', 'Pending', job.display_name
-            )
-            job.file_path = new_file_path
-        except Exception as e:
-            current_app.logger.error(f"Error moving file for job {job_id}: {str(e)}")
-            flash('Error moving file. Please try again.', 'error')
-            return redirect(url_for('dashboard.job_detail', job_id=job_id))
-        
-        # Save changes
+        # Move file from Uploaded to Pending (in the background). The sliced file the job page
+        # analyzed becomes the authoritative file; the upload moves with it as model_path.
+        sliced_path = analyzed_sliced_path(job)
+        if sliced_path:
+            job.model_path = job.file_path
+            job.display_name = os.path.basename(sliced_path)
+        queue_move(job, 'Pending', source_path=sliced_path)
+        
+        # Queue approval email and save changes in one transaction
+        queue_approval_email(job)
+        record_status_change('UPLOADED', job.status)
         db.session.commit()
+        wake_outbox_worker()
+        wake_file_mover()
         
-        # Send approval email
-        email_sent = send_approval_email(job)
-        if email_sent:
-            flash(f'Job approved and confirmation email sent to {job.student_email}', 'success')
-        else:
-            flash('Job approved but email failed to send. Please contact student manually.', 'warning')
+        flash(f'Job approved. Confirmation email queued for {job.student_email}.', 'success')
         
         return redirect(url_for('dashboard.index'))
         
@@ -234,15 +356,13 @@ def reject_job(job_id):
         job.updated_at = datetime.utcnow()
         job.last_updated_by = 'staff'
         
-        # Save changes
+        # Queue rejection email and save changes in one transaction
+        queue_rejection_email(job, rejection_reasons)
+        record_status_change('UPLOADED', job.status)
         db.session.commit()
+        wake_outbox_worker()
         
-        # Send rejection email
-        email_sent = send_rejection_email(job, rejection_reasons)
-        if email_sent:
-            flash(f'Job rejected and notification email sent to {job.student_email}', 'success')
-        else:
-            flash('Job rejected but email failed to send. Please contact student manually.', 'warning')
+        flash(f'Job rejected. Notification email queued for {job.student_email}.', 'success')
         
         return redirect(url_for('dashboard.index'))
         
@@ -268,19 +388,13 @@ def mark_printing(job_id):
         job.updated_at = datetime.utcnow()
         job.last_updated_by = 'staff'
         
-        # Move file from ReadyToPrint to Printing
-        try:
-            new_file_path = FileService.move_file(
-                job.file_path, 'ReadyToPrint', 'Printing', job.display_name
-            )
-            job.file_path = new_file_path
-        except Exception as e:
-            current_app.logger.error(f"Error moving file for job {job_id}: {str(e)}")
-            flash('Error moving file. Please try again.', 'error')
-            return redirect(url_for('dashboard.job_detail', job_id=job_id))
+        # Move file from ReadyToPrint to Printing (in the background)
+        queue_move(job, 'Printing')
         
         # Save changes
+        record_status_change('READYTOPRINT', job.status)
         db.session.commit()
+        wake_file_mover()
         
         flash(f'Job {job_id[:8]} marked as printing.', 'success')
         return redirect(url_for('dashboard.index'))
@@ -307,27 +421,17 @@ def mark_complete(job_id):
         job.updated_at = datetime.utcnow()
         job.last_updated_by = 'staff'
         
-        # Move file from Printing to Completed
-        try:
-            new_file_path = FileService.move_file(
-                job.file_path, 'Printing', 'Completed', job.display_name
-            )
-            job.file_path = new_file_path
-        except Exception as e:
-            current_app.logger.error(f"Error moving file for job {job_id}: {str(e)}")
-            flash('Error moving file. Please try again.', 'error')
-            return redirect(url_for('dashboard.job_detail', job_id=job_id))
+        # Move file from Printing to Completed (in the background)
+        queue_move(job, 'Completed')
         
-        # Save changes
+        # Queue completion email and save changes in one transaction
+        queue_completion_email(job)
+        record_status_change('PRINTING', job.status)
         db.session.commit()
+        wake_outbox_worker()
+        wake_file_mover()
         
-        # Send completion email
-        from app.services.email_service import send_completion_email
-        email_sent = send_completion_email(job)
-        if email_sent:
-            flash(f'Job {job_id[:8]} marked as completed and pickup notification sent to {job.student_email}.', 'success')
-        else:
-            flash(f'Job {job_id[:8]} marked as completed but email failed to send. Please contact student manually.', 'warning')
+        flash(f'Job {job_id[:8]} marked as completed. Pickup notification queued for {job.student_email}.', 'success')
         
         return redirect(url_for('dashboard.index'))
         
@@ -363,19 +467,13 @@ def mark_picked_up(job_id):
             existing_notes.append(f"Payment/Pickup Notes: {payment_notes}")
             job.reject_reasons = existing_notes
         
-        # Move file from Completed to PaidPickedUp
-        try:
-            new_file_path = FileService.move_file(
-                job.file_path, 'Completed', 'PaidPickedUp', job.display_name
-            )
-            job.file_path = new_file_path
-        except Exception as e:
-            current_app.logger.error(f"Error moving file for job {job_id}: {str(e)}")
-            flash('Error moving file. Please try again.', 'error')
-            return redirect(url_for('dashboard.job_detail', job_id=job_id))
+        # Move file from Completed to PaidPickedUp (in the background)
+        queue_move(job, 'PaidPickedUp')
         
         # Save changes
+        record_status_change('COMPLETED', job.status)
         db.session.commit()
+        wake_file_mover()
         
         flash(f'Job {job_id[:8]} marked as picked up and paid. Transaction complete!', 'success')
         return redirect(url_for('dashboard.index'))
@@ -386,4 +484,49 @@ def mark_picked_up(job_id):
         flash('Error updating job status. Please try again.', 'error')
         return redirect(url_for('dashboard.job_detail', job_id=job_id))
 
-# print("Dashboard blueprint defined (functional).") # Debug 
\ No newline at end of file
+@dashboard.route('/jobs/bulk', methods=['POST'])
+@login_required
+def bulk_action():
+    """Apply one transition to every selected job (checkboxes on the dashboard list)."""
+    action = request.form.get('action', '')
+    status = request.form.get('status', 'UPLOADED').upper()
+    job_ids = request.form.getlist('job_ids')
+    if action not in BULK_ACTIONS:
+        flash('Unknown bulk action.', 'error')
+        return redirect(url_for('dashboard.index', status=status))
+
+    rejection_reasons = request.form.getlist('rejection_reasons')
+    custom_reason = request.form.get('custom_reason', '').strip()
+    if custom_reason:
+        rejection_reasons.append(custom_reason)
+
+    try:
+        jobs, errors = bulk_transition(action, job_ids, rejection_reasons=rejection_reasons,
+                                       payment_notes=request.form.get('payment_notes', '').strip())
+    except Exception as e:
+        current_app.logger.error(f"Error applying bulk {action} to {len(job_ids)} jobs: {str(e)}")
+        db.session.rollback()
+        flash('Error updating jobs. No jobs were changed; please try again.', 'error')
+        return redirect(url_for('dashboard.index', status=status))
+
+    if errors:
+        shown = errors[:5]
+        if len(errors) > len(shown):
+            shown.append(f"...and {len(errors) - len(shown)} more.")
+        flash('No jobs were changed. ' + ' '.join(shown), 'error')
+        return redirect(url_for('dashboard.index', status=status))
+
+    if action in ('approve', 'reject', 'mark_complete'):
+        wake_outbox_worker()
+    wake_file_mover()
+    labels = {
+        'approve': 'approved; confirmation emails queued',
+        'reject': 'rejected; notification emails queued',
+        'mark_printing': 'marked as printing',
+        'mark_complete': 'marked as completed; pickup notifications queued',
+        'mark_picked_up': 'marked as picked up and paid',
+    }
+    flash(f"{len(jobs)} job{'s' if len(jobs) != 1 else ''} {labels[action]}.", 'success')
+    return redirect(url_for('dashboard.index', status=status))
+
+# print("Dashboard blueprint defined (functional).") # Debug 
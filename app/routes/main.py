@@ -1,9 +1,22 @@
 # app/routes/main.py
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
 from app.forms import SubmissionForm # Import the new form
 from app.models.job import Job
 from app.services.file_service import FileService
+from app.services.stats_service import record_status_change
+from app.services.blob_service import hash_file, register_blob
+from app.services.thumbnail_service import queue_thumbnail
+from app.services.mesh_health import queue_health_check, reuse_health_report
+from app.services.mesh_analysis import analyze_job_file
+from app.services.cost_service import estimate_job, get_printer_display_name
+from app.services.fit_check import check_job_fit
+from app.services.quote_service import QuoteUnavailable, allow_quote_request, quote_file, quote_hash
+from app.services.file_mover import queue_move, wake_file_mover
+from app.utils.uploads import HashingUploadStream
 from app.extensions import db
+import os
+import re
+import tempfile
 import uuid
 
 main = Blueprint('main', __name__)
@@ -22,7 +35,7 @@ def submit_form():
             job_id = str(uuid.uuid4())
             
             # Save uploaded file with standardized naming
-            original_filename, display_name, file_path = FileService.save_uploaded_file(
+            original_filename, display_name, file_path, file_hash = FileService.save_uploaded_file(
                 uploaded_file=form.file_upload.data,
                 student_name=form.student_name.data,
                 print_method=form.print_method.data,
@@ -38,6 +51,7 @@ def submit_form():
                 original_filename=original_filename,
                 display_name=display_name,
                 file_path=file_path,
+                file_hash=file_hash,
                 status='UPLOADED',
                 printer=form.printer_selection.data,  # Use the new printer selection field
                 color=form.color_preference.data,
@@ -47,12 +61,38 @@ def submit_form():
                 last_updated_by='student'
             )
             
+            # Measure the model (volume, area, bounding box) and pre-compute the
+            # weight/cost estimate staff see on the approve form
+            stats = analyze_job_file(new_job)
+            # Check the model fits the chosen printer (moves it to a larger one of the same type if needed)
+            fit = check_job_fit(new_job, stats)
+            estimate_job(new_job)
+            
             # Save to database
             db.session.add(new_job)
+            record_status_change(None, new_job.status)
+            register_blob(file_hash, FileService.get_file_size(file_path))
+            reuse_health_report(new_job)  # Identical uploads share one report
             db.session.commit()
             
+            # Render the preview and check the mesh in the background; a failure here must not fail the submission
+            try:
+                queue_thumbnail(file_hash, file_path)
+            except Exception as e:
+                current_app.logger.warning(f"Could not queue thumbnail for job {job_id}: {str(e)}")
+            try:
+                queue_health_check(new_job)
+            except Exception as e:
+                current_app.logger.warning(f"Could not queue mesh health check for job {job_id}: {str(e)}")
+            
             # Success - redirect to success page with job ID
             flash(f'Job submitted successfully! Your Job ID is: {job_id[:8]}', 'success')
+            if fit and fit['reassigned']:
+                flash(f"Your model is too large for the {get_printer_display_name(fit['requested_printer'])}, "
+                      f"so it has been assigned to the {get_printer_display_name(new_job.printer)}.", 'info')
+            elif fit and not fit['fits']:
+                flash(f"Your model may be too large for the {get_printer_display_name(new_job.printer)} in any "
+                      f"orientation. Staff will review it and contact you if it needs to be scaled or split.", 'warning')
             return redirect(url_for('main.submit_success', job_id=job_id))
             
         except Exception as e:
@@ -66,6 +106,69 @@ def submit_form():
     # Errors from form.validate_on_submit() will be automatically available in the template.
     return render_template('main/submit.html', title='Submit Job', form=form)
 
+@main.route('/api/quote', methods=['POST'])
+def api_quote():
+    """
+    Quote a model on every printer before it is submitted.
+
+    Send either the model as multipart field "file", or "file_hash" (SHA-256
+    of the model, as form field or JSON) to reuse a quote for a file already
+    quoted; an unknown hash returns 404 so the client can upload instead.
+    Clients over their request budget get 429, and 503 means the quote could
+    not be calculated right now.
+    """
+    # Checked before the body is read, so a throttled client's upload is never parsed
+    if not allow_quote_request(request.remote_addr or 'unknown'):
+        return jsonify({'error': 'Too many quote requests. Please wait a minute and try again.'}), 429
+    upload = request.files.get('file')
+    file_hash = (request.form.get('file_hash') or (request.get_json(silent=True) or {}).get('file_hash') or '').lower()
+    try:
+        if upload and upload.filename:
+            file_type = os.path.splitext(upload.filename)[1].lower()
+            if file_type.lstrip('.') not in ('stl', 'obj', '3mf'):
+                return jsonify({'error': 'Please upload a .stl, .obj or .3mf file'}), 400
+            stream = upload.stream
+            if isinstance(stream, HashingUploadStream):
+                # Already on disk and hashed while the request was read; discarded when the request ends
+                stream.flush()
+                result = quote_file(stream.temp_path, file_type, stream.hexdigest())
+            else:
+                fd, temp_path = tempfile.mkstemp(suffix=file_type)
+                os.close(fd)
+                try:
+                    upload.save(temp_path)
+                    result = quote_file(temp_path, file_type, hash_file(temp_path))
+                finally:
+                    os.remove(temp_path)
+        elif file_hash:
+            if not re.fullmatch(r'[0-9a-f]{64}', file_hash):
+                return jsonify({'error': 'Invalid file hash'}), 400
+            result = quote_hash(file_hash)
+            if result is None:
+                return jsonify({'error': 'Unknown file; upload it to get a quote'}), 404
+        else:
+            return jsonify({'error': 'No file provided'}), 400
+    except QuoteUnavailable as e:
+        current_app.logger.warning(f"Quote unavailable: {str(e)}")
+        return jsonify({'error': 'A cost estimate is not available right now. You can still submit your file.'}), 503
+    except (ValueError, OSError) as e:
+        current_app.logger.info(f"Could not quote model: {str(e)}")
+        return jsonify({'error': 'We could not read this model. Please check the file and try again.'}), 400
+
+    quote, cached = result
+    return jsonify(dict(quote, cached=cached))
+
+@main.app_errorhandler(413)
+def upload_too_large(e):
+    # Raised while the upload is still streaming in, before the form is validated
+    max_size_mb = current_app.config.get('MAX_UPLOAD_SIZE_MB', 50)
+    wants_json = request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+    if '/api/' in request.path or wants_json:
+        return jsonify({'error': f'File size cannot exceed {max_size_mb}MB.'}), 413
+    flash(f'File size cannot exceed {max_size_mb}MB.', 'error')
+    form = SubmissionForm(formdata=None)
+    return render_template('main/submit.html', title='Submit Job', form=form), 413
+
 @main.route('/submit/success')
 def submit_success():
     job_id = request.args.get('job_id')
@@ -146,22 +249,19 @@ def confirm_job_post(token):
         return redirect(url_for('main.index'))
     
     try:
-        # Move file from Pending to ReadyToPrint
-        new_file_path = FileService.move_file_between_status_dirs(
-            current_path=job.file_path,
-            from_status='PENDING',
-            to_status='READYTOPRINT'
-        )
+        # Move file from Pending to ReadyToPrint (in the background)
+        queue_move(job, 'ReadyToPrint', display_name=os.path.basename(job.file_path))
         
         # Update job in database
         job.status = 'READYTOPRINT'
         job.student_confirmed = True
         job.student_confirmed_at = datetime.utcnow()
-        job.file_path = new_file_path
         job.last_updated_by = 'student'
         # Keep the token for potential future reference, but it's no longer valid for confirmation
         
+        record_status_change('PENDING', job.status)
         db.session.commit()
+        wake_file_mover()
         
         # Success message
         flash(f'Job confirmed successfully! Your print job (ID: {job.id[:8]}) is now in the queue.', 'success')
@@ -0,0 +1,75 @@
+# app/services/background.py
+"""
+Long-running background threads (email outbox, file mover, storage
+reconciler, storage index).
+
+Each service subclasses BackgroundWorker, which owns the thread and its
+start/wake/stop handling, and is wired up with register_worker(): stored in
+app.extensions and started with the first request rather than in
+create_app, so `flask db ...` and other CLI commands never start threads or
+query tables that may not exist yet.
+"""
+import threading
+from flask import current_app
+
+class BackgroundWorker:
+    """One daemon thread running _run(), started on demand and stopped with stop()."""
+
+    thread_name = 'background-worker'
+
+    def __init__(self, app):
+        self.app = app
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the thread (idempotent)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._starting()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Ask the thread to run its next pass now instead of at the next poll."""
+        self._wake.set()
+
+    def stop(self):
+        """Stop the thread and wait for the pass in progress."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._stopped()
+
+    def _starting(self):
+        """Called under the start lock just before the thread starts (e.g. to create an executor)."""
+
+    def _stopped(self):
+        """Called once the thread has finished (e.g. to shut an executor down)."""
+
+    def _sleep(self, seconds: float):
+        """Wait up to seconds, or until woken or stopped."""
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _run(self):
+        raise NotImplementedError
+
+def register_worker(app, name: str, worker: BackgroundWorker, enabled: bool) -> BackgroundWorker:
+    """Store worker as app.extensions[name] and, if enabled, start it with the first request."""
+    app.extensions[name] = worker
+    if enabled:
+        app.before_request(worker.start)
+    return worker
+
+def wake_worker(name: str):
+    """Wake the current app's worker registered as name, if there is one."""
+    worker = current_app.extensions.get(name)
+    if worker is not None:
+        worker.wake()
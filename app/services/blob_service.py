@@ -0,0 +1,205 @@
+# app/services/blob_service.py
+"""
+Content-addressed storage for uploaded model files.
+
+Each distinct upload is stored once under storage/blobs/<sha[:2]>/<sha>, keyed by
+its SHA-256. The file a job points at in the status directories (Uploaded,
+Pending, ...) is a hardlink to that blob, so resubmitting the same model costs
+a directory entry instead of another copy, and moving a job between status
+directories is still a plain rename. Where hardlinks are not supported (e.g.
+some network shares) no blob is kept: the file in the status directory stays
+the only copy, file_blobs still records its hash, and a warning is logged once.
+
+Because a link shares its content with the blob, blobs are made read-only once
+stored: a model opened from a status directory and saved in place would
+otherwise rewrite the blob under its SHA-256 name, and with it every job that
+shares the upload. Slicers save their output as a new file, so they are not
+affected.
+
+file_blobs lists the stored blobs; prune_unreferenced_blobs() deletes the ones
+no job's file_hash points at.
+"""
+import hashlib
+import os
+import stat
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, exists
+from app.extensions import db
+from app.models.file_blob import FileBlob
+from app.models.job import Job
+
+ORPHAN_GRACE_SECONDS = 3600  # Blob files without a row are only pruned after this long (upload may be mid-commit)
+
+_link_warning_logged = False
+
+def get_blob_dir() -> str:
+    """Get the blob store directory (storage/blobs)."""
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    if not storage_root:
+        raise ValueError("APP_STORAGE_ROOT not configured")
+    return os.path.join(storage_root, 'blobs')
+
+def blob_path(sha256: str) -> str:
+    """Get the path of the blob with the given hex digest."""
+    return os.path.join(get_blob_dir(), sha256[:2], sha256)
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 hex digest of a file on disk."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_file(source: str, destination: str) -> bool:
+    """
+    Hardlink destination to source.
+
+    Returns:
+        Whether the link was made; if the filesystem refused it a warning is
+        logged (once per process) and the caller keeps a single copy instead
+    """
+    global _link_warning_logged
+    try:
+        os.link(source, destination)
+        return True
+    except OSError as e:
+        if not _link_warning_logged:
+            _link_warning_logged = True
+            current_app.logger.warning(f"Hardlinks are not supported in {os.path.dirname(destination)} ({str(e)}); "
+                                       "uploads are stored without a blob copy, so identical uploads are not shared")
+        return False
+
+def seal_blob(path: str):
+    """Make a blob read-only so its content can't change under its hash."""
+    try:
+        if os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+            os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    except OSError as e:
+        # Some shares ignore or refuse permission changes; the upload itself is fine
+        current_app.logger.warning(f"Could not make blob {path} read-only: {str(e)}")
+
+def store_stream(stream, destination: str) -> str:
+    """
+    Store a streamed upload (app.utils.uploads.HashingUploadStream) in the blob
+    store and place it at destination.
+
+    If a blob with the same content already exists the upload is discarded and
+    destination is linked to the existing blob.
+
+    Returns:
+        SHA-256 hex digest of the upload
+    """
+    sha256 = stream.hexdigest()
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        if link_file(path, destination):
+            stream.discard()
+            seal_blob(path)
+            return sha256
+        stream.commit(destination)
+        return sha256
+    stream.commit(destination)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if link_file(destination, path):
+        seal_blob(path)
+    return sha256
+
+def store_file(file_path: str) -> str:
+    """
+    Move an already-saved file into the blob store, leaving file_path in place
+    as a link to the blob.
+
+    Returns:
+        SHA-256 hex digest of the file
+    """
+    sha256 = hash_file(file_path)
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        # Swap the duplicate for a link to the existing blob
+        temp_path = f"{file_path}.link"
+        if link_file(path, temp_path):
+            os.replace(temp_path, file_path)
+            seal_blob(path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if link_file(file_path, path):
+            seal_blob(path)
+    return sha256
+
+def register_blob(sha256: str, size: int):
+    """
+    Record a stored blob in file_blobs if it isn't there yet.
+
+    Call before the caller's db.session.commit() so the row is committed (or
+    rolled back) together with the job that points at the blob.
+    """
+    if db.session.get(FileBlob, sha256) is None:
+        db.session.add(FileBlob(sha256=sha256, size=size))
+
+def prune_unreferenced_blobs() -> tuple[int, int]:
+    """
+    Delete blobs that no job references.
+
+    Removes blobs whose hash is no job's file_hash, plus blob files with no
+    row at all (left behind by an upload whose database commit failed). Both
+    only once older than ORPHAN_GRACE_SECONDS, so an upload that is still
+    being committed keeps its blob. Files in the status directories are
+    separate links and are never touched. Blobs stored before blobs were made
+    read-only are sealed on the way.
+
+    Returns:
+        Tuple of (blobs_removed, bytes_freed)
+    """
+    removed = 0
+    freed = 0
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    created_cutoff = datetime.utcnow() - timedelta(seconds=ORPHAN_GRACE_SECONDS)
+
+    referenced = {file_hash for (file_hash,) in db.session.query(Job.file_hash).filter(Job.file_hash.isnot(None)).distinct()}
+    known = set(referenced)
+    for sha256, created_at in db.session.query(FileBlob.sha256, FileBlob.created_at).all():
+        if sha256 in referenced or created_at >= created_cutoff:
+            known.add(sha256)
+            continue
+        # Conditional delete so a blob a new job started using in the meantime is kept
+        result = db.session.execute(
+            delete(FileBlob).where(FileBlob.sha256 == sha256, ~exists().where(Job.file_hash == sha256))
+        )
+        db.session.commit()
+        if result.rowcount:
+            freed += _remove_blob_file(blob_path(sha256))
+            removed += 1
+        else:
+            known.add(sha256)
+
+    blob_dir = get_blob_dir()
+    if os.path.isdir(blob_dir):
+        for prefix in os.scandir(blob_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if not entry.is_file():
+                    continue
+                if entry.name in known:
+                    seal_blob(entry.path)
+                elif entry.stat().st_mtime < cutoff:
+                    freed += _remove_blob_file(entry.path)
+                    removed += 1
+
+    return removed, freed
+
+def _remove_blob_file(path: str) -> int:
+    """Remove a blob file, returning the bytes freed (0 if it was already gone)."""
+    try:
+        size = os.path.getsize(path)
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)  # Windows refuses to delete read-only files
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        current_app.logger.warning(f"Could not remove blob {path}: {str(e)}")
+        return 0
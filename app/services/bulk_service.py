@@ -0,0 +1,139 @@
+# app/services/bulk_service.py
+"""
+Bulk status transitions for the staff dashboard.
+
+A bulk action applies one dashboard transition (approve, reject, mark
+printing, mark complete, mark picked up) to many jobs at once: the jobs are
+loaded with one query and all validated before anything changes, then the
+status changes, file moves (run in the background by file_mover), summary
+counts and notification emails are committed in a single transaction. If
+validation or the commit fails, nothing changes.
+
+Bulk approval charges the weight and time from the analysis of the sliced file
+staff saved next to each upload. Jobs without one must be approved from the job
+page, so upload-time estimates are never sent to students as a price or
+recorded as staff-entered values (estimator_service trains on those).
+"""
+import os
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.models.job import Job
+from app.services.cost_service import calculate_cost, get_default_material
+from app.services.file_service import FileService
+from app.services.file_mover import queue_move
+from app.services.gcode_analyzer import is_current, queue_sliced_analysis
+from app.services.outbox_service import queue_approval_email, queue_rejection_email, queue_completion_email
+from app.services.stats_service import record_status_change
+from app.utils.helpers import round_time_conservative
+from app.utils.tokens import generate_confirmation_token
+
+# Action -> (from status, to status, target directory); rejected files stay in Uploaded
+BULK_ACTIONS = {
+    'approve': ('UPLOADED', 'PENDING', 'Pending'),
+    'reject': ('UPLOADED', 'REJECTED', None),
+    'mark_printing': ('READYTOPRINT', 'PRINTING', 'Printing'),
+    'mark_complete': ('PRINTING', 'COMPLETED', 'Completed'),
+    'mark_picked_up': ('COMPLETED', 'PAIDPICKEDUP', 'PaidPickedUp'),
+}
+
+def _approval_values(job, sliced_path):
+    """
+    Weight, time and material for approving a job without the approve form,
+    from the current analysis of the sliced file staff saved next to the upload.
+
+    Returns:
+        Tuple of (weight_g, time_hours, material), or an error message
+    """
+    if not sliced_path:
+        return "no sliced file yet; slice it or approve it from the job page"
+    if not is_current(job, sliced_path):
+        try:
+            queue_sliced_analysis(job, sliced_path)
+        except Exception as e:
+            current_app.logger.warning(f"Could not queue sliced file analysis for job {job.id}: {str(e)}")
+        return "sliced file is still being analyzed"
+    weight_g = job.sliced_analysis.get('filament_g')
+    time_hours = job.sliced_analysis.get('print_time_hours')
+    if not weight_g or not time_hours:
+        return "no weight or time in the sliced file; approve it from the job page"
+    return weight_g, round_time_conservative(time_hours), get_default_material(job.printer)
+
+def bulk_transition(action: str, job_ids: list, rejection_reasons: list = None, payment_notes: str = None) -> tuple[list, list]:
+    """
+    Apply one transition to many jobs in a single transaction.
+
+    Args:
+        action: Key of BULK_ACTIONS
+        job_ids: IDs of the jobs to move
+        rejection_reasons: Reasons sent to every student (required for 'reject')
+        payment_notes: Note stored on every job (optional, 'mark_picked_up')
+
+    Returns:
+        Tuple of (jobs changed, errors). If errors is not empty nothing was
+        changed; each error is a message naming the job it is about.
+        Call wake_file_mover() (and wake_outbox_worker()) afterwards.
+
+    Raises:
+        ValueError: If the action is unknown
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unknown bulk action: {action}")
+    from_status, to_status, to_dir = BULK_ACTIONS[action]
+    if action == 'reject' and not rejection_reasons:
+        return [], ["Please provide at least one rejection reason."]
+
+    job_ids = list(dict.fromkeys(job_ids))
+    jobs = Job.query.filter(Job.id.in_(job_ids)).all() if job_ids else []
+    by_id = {job.id: job for job in jobs}
+    errors = [f"Job {job_id[:8]} was not found." for job_id in job_ids if job_id not in by_id]
+    jobs = [by_id[job_id] for job_id in job_ids if job_id in by_id]
+    if not jobs:
+        return [], errors or ["No jobs selected."]
+
+    # Validate everything before changing anything
+    errors += [f"Job {job.id[:8]} ({job.display_name}) is not {from_status.lower()}."
+               for job in jobs if job.status != from_status]
+    approvals = {}
+    sliced = {}
+    if action == 'approve' and not errors:
+        sliced = FileService.find_sliced_files([job.file_path for job in jobs])
+        for job in jobs:
+            values = _approval_values(job, sliced.get(job.file_path))
+            if isinstance(values, str):
+                errors.append(f"Job {job.id[:8]} ({job.display_name}): {values}.")
+                continue
+            weight_g, time_hours, material = values
+            try:
+                approvals[job.id] = (weight_g, time_hours, material, calculate_cost(job.printer, weight_g, time_hours))
+            except ValueError as e:
+                errors.append(f"Job {job.id[:8]} ({job.display_name}): {str(e)}.")
+    if errors:
+        return [], errors
+
+    # Files move in the background once this commits. An approved job's sliced file becomes its file, as on the approve form.
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = to_status
+        job.updated_at = now
+        job.last_updated_by = 'staff'
+        if to_dir:
+            source = sliced.get(job.file_path)
+            if source:
+                job.model_path = job.file_path
+                job.display_name = os.path.basename(source)
+            queue_move(job, to_dir, source_path=source)
+        if action == 'approve':
+            job.weight_g, job.time_hours, job.material, job.cost_usd = approvals[job.id]
+            job.confirm_token, job.confirm_token_expires = generate_confirmation_token(job.id)
+            queue_approval_email(job)
+        elif action == 'reject':
+            job.reject_reasons = list(rejection_reasons)
+            queue_rejection_email(job, rejection_reasons)
+        elif action == 'mark_complete':
+            queue_completion_email(job)
+        elif action == 'mark_picked_up' and payment_notes:
+            job.reject_reasons = (job.reject_reasons or []) + [f"Payment/Pickup Notes: {payment_notes}"]
+    record_status_change(from_status, to_status, len(jobs))
+    db.session.commit()
+    return jobs, []
@@ -5,15 +5,37 @@ from decimal import Decimal
 # Printer configuration - Weight-based pricing only
 # Filament printers: $0.10 per gram
 # Resin printers: $0.20 per gram
+# build_mm: usable build volume (x, y, z) in millimetres, used by fit_check
 PRINTERS = {
-    "prusa_mk4s": {"rate_g": 0.10, "type": "Filament", "display_name": "Prusa MK4S"},
-    "prusa_xl": {"rate_g": 0.10, "type": "Filament", "display_name": "Prusa XL"},
-    "raise3d_pro2plus": {"rate_g": 0.10, "type": "Filament", "display_name": "Raise3D Pro 2 Plus"},
-    "formlabs_form3": {"rate_g": 0.20, "type": "Resin", "display_name": "Form 3"},
+    "prusa_mk4s": {"rate_g": 0.10, "type": "Filament", "display_name": "Prusa MK4S", "build_mm": (250, 210, 220)},
+    "prusa_xl": {"rate_g": 0.10, "type": "Filament", "display_name": "Prusa XL", "build_mm": (360, 360, 360)},
+    "raise3d_pro2plus": {"rate_g": 0.10, "type": "Filament", "display_name": "Raise3D Pro 2 Plus", "build_mm": (305, 305, 605)},
+    "formlabs_form3": {"rate_g": 0.20, "type": "Resin", "display_name": "Form 3", "build_mm": (145, 145, 185)},
 }
 
 MINIMUM_CHARGE = Decimal("3.00")
 
+# Material densities in g/cm³ (solid filament / cured resin)
+MATERIAL_DENSITY = {
+    "PLA": 1.24,
+    "PLA+": 1.24,
+    "PETG": 1.27,
+    "ABS": 1.04,
+    "TPU": 1.21,
+    "Standard Resin": 1.18,
+    "Tough Resin": 1.15,
+    "Clear Resin": 1.18,
+}
+
+# Assumed material for estimates, before staff choose one
+DEFAULT_MATERIAL = {"Filament": "PLA", "Resin": "Standard Resin"}
+
+# Estimate model for FDM prints: a solid shell (perimeters plus top/bottom
+# layers) around sparse infill. Resin prints are solid, plus supports and rafts.
+FILAMENT_SHELL_MM = 1.2
+FILAMENT_INFILL = 0.15
+RESIN_SUPPORT_FACTOR = 1.10
+
 def calculate_cost(printer_key: str, weight_g: float, time_hours: float = None) -> Decimal:
     """
     Calculate printing cost based on weight only and enforce minimum charge.
@@ -51,5 +73,81 @@ def get_printer_type(printer_key: str) -> str:
     printer_config = PRINTERS.get(printer_key)
     return printer_config["type"] if printer_config else "Unknown"
 
+def estimate_weight_g(printer_key: str, volume_mm3: float, surface_area_mm2: float, material: str = None) -> float:
+    """
+    Estimate printed weight from a model's measured volume and surface area.
+
+    Filament: the outer FILAMENT_SHELL_MM of the part is solid and the rest is
+    filled at FILAMENT_INFILL. Resin: the whole volume plus RESIN_SUPPORT_FACTOR.
+
+    Args:
+        printer_key: Key from PRINTERS dict
+        volume_mm3: Enclosed model volume
+        surface_area_mm2: Model surface area
+        material: Key from MATERIAL_DENSITY (defaults to the printer type's usual material)
+
+    Returns:
+        Estimated weight in grams
+
+    Raises:
+        ValueError: If printer_key or material is not found
+    """
+    print_type = get_printer_type(printer_key)
+    if print_type not in DEFAULT_MATERIAL:
+        raise ValueError(f"Unknown printer: {printer_key}")
+    density = MATERIAL_DENSITY.get(material or DEFAULT_MATERIAL[print_type])
+    if density is None:
+        raise ValueError(f"Unknown material: {material}")
+
+    if print_type == "Resin":
+        solid_mm3 = volume_mm3 * RESIN_SUPPORT_FACTOR
+    else:
+        shell_mm3 = min(surface_area_mm2 * FILAMENT_SHELL_MM, volume_mm3)
+        solid_mm3 = shell_mm3 + (volume_mm3 - shell_mm3) * FILAMENT_INFILL
+    return solid_mm3 / 1000 * density
+
+def estimate_job(job) -> bool:
+    """
+    Store pre-filled weight, time and cost estimates on a job (caller commits).
+
+    In order of preference: the slicer's own estimates when the upload embeds
+    them, models trained on past jobs (estimator_service), and finally
+    estimate_weight_g on the measured mesh. Where the source gives one, the
+    95% interval is stored in job.estimate_info.
+
+    Returns:
+        True if an estimate was stored, False if the job has nothing to estimate from
+    """
+    from app.services.estimator_service import predict_job
+
+    slicer = job.slicer_metadata or {}
+    prediction = predict_job(job)
+    info = {}
+    time_hours = None
+    if slicer.get("filament_g"):
+        weight_g = float(slicer["filament_g"])
+        time_hours = slicer.get("print_time_hours")
+        info["source"] = "slicer"
+    elif prediction and prediction["weight_g"][0] > 0:
+        weight_g, *weight_range = prediction["weight_g"]
+        time_hours, *time_range = prediction["time_hours"]
+        info.update(source="history", model=prediction["model"], samples=prediction["samples"],
+                    weight_g=[round(v, 1) for v in weight_range], time_hours=[round(v, 2) for v in time_range])
+    elif job.volume_mm3 and job.printer in PRINTERS:
+        weight_g = estimate_weight_g(job.printer, job.volume_mm3, job.surface_area_mm2 or 0.0)
+        info["source"] = "volume"
+    else:
+        return False
+
+    job.estimated_weight_g = round(weight_g, 1)
+    job.estimated_time_hours = round(time_hours, 2) if time_hours else None
+    job.estimated_cost_usd = calculate_cost(job.printer, job.estimated_weight_g) if job.printer in PRINTERS else None
+    job.estimate_info = info
+    return True
+
+def get_default_material(printer_key: str) -> str:
+    """Get the material assumed for estimates on a printer (e.g. "PLA")."""
+    return DEFAULT_MATERIAL.get(get_printer_type(printer_key), "")
+
 # print("cost_service.py loaded (placeholder).") # Debug
 pass 
\ No newline at end of file
@@ -5,9 +5,10 @@
 
 from flask_mail import Message
 from app.extensions import mail
-from flask import current_app, render_template_string
+from flask import current_app, render_template
 from app.utils.helpers import round_time_conservative
 import logging
+import smtplib
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,32 @@ def get_email_status():
             'message': 'Email not configured. Set MAIL_SERVER, MAIL_USERNAME, MAIL_PASSWORD, and MAIL_DEFAULT_SENDER in environment variables.'
         }
 
+def build_message(to, subject, html_content, text_content=None):
+    """
+    Build a Flask-Mail Message with HTML and plain text bodies.
+    
+    Args:
+        to: Recipient email address
+        subject: Email subject
+        html_content: HTML content for email
+        text_content: Plain text content (optional, derived from HTML if omitted)
+    
+    Returns:
+        Message ready to be sent
+    """
+    msg = Message(
+        subject=subject, 
+        sender=current_app.config['MAIL_DEFAULT_SENDER'], 
+        recipients=[to]
+    )
+    msg.html = html_content
+    if text_content:
+        msg.body = text_content
+    else:
+        # Simple text fallback by stripping HTML
+        msg.body = html_content.replace('<br>', '\n').replace('<p>', '').replace('</p>', '\n')
+    return msg
+
 def send_email(to, subject, html_content, text_content=None):
     """
     Send an email using Flask-Mail.
@@ -58,18 +85,7 @@ def send_email(to, subject, html_content, text_content=None):
         return False
     
     try:
-        msg = Message(
-            subject=subject, 
-            sender=current_app.config['MAIL_DEFAULT_SENDER'], 
-            recipients=[to]
-        )
-        msg.html = html_content
-        if text_content:
-            msg.body = text_content
-        else:
-            # Simple text fallback by stripping HTML
-            msg.body = html_content.replace('<br>', '\n').replace('<p>', '').replace('</p>', '\n')
-        
+        msg = build_message(to, subject, html_content, text_content)
         mail.send(msg)
         logger.info(f"Email sent successfully to {to}: {subject}")
         return True
@@ -77,54 +93,167 @@ def send_email(to, subject, html_content, text_content=None):
         logger.error(f"Failed to send email to {to}: {str(e)}")
         return False
 
-def send_approval_email(job):
+# Errors that mean the SMTP connection itself is gone (as opposed to one message being refused)
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+def _is_connection_lost(error):
+    """Check whether a send error means the connection must be re-opened."""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    # 421 = server is closing the channel; smtplib has already closed the socket
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+
+def _close_connection(connection):
+    """Close a Flask-Mail connection, ignoring errors from an already-dead socket."""
+    try:
+        connection.__exit__(None, None, None)
+    except Exception:
+        pass
+
+def send_batch(messages, max_per_connection=None):
     """
-    Send approval email to student requesting confirmation.
+    Send several messages over as few SMTP connections as possible.
+    
+    One authenticated connection (via mail.connect()) is reused for up to
+    max_per_connection messages, which avoids a TLS handshake and login per
+    message. If the connection drops mid-batch, a new one is opened and the
+    interrupted message is retried once.
     
     Args:
-        job: Job model instance
+        messages: List of Flask-Mail Message objects (see build_message)
+        max_per_connection: Messages per connection before reconnecting
+            (defaults to MAIL_MAX_PER_CONNECTION)
     
     Returns:
-        bool: True if email sent successfully
+        List of (sent, error) tuples in the same order as messages;
+        error is None for sent messages
     """
-    subject = f"3D Print Job Approved - Confirmation Required (Job #{job.id[:8]})"
-    
-    html_content = f"""
-    <h2>Your 3D Print Job Has Been Approved!</h2>
+    if not messages:
+        return []
     
-    <p>Dear {job.student_name},</p>
+    if not _is_email_configured():
+        logger.warning(f"Email not configured - cannot send batch of {len(messages)} email(s)")
+        return [(False, 'Email not configured')] * len(messages)
+    
+    max_per_connection = max_per_connection or current_app.config.get('MAIL_MAX_PER_CONNECTION', 50)
+    results = [None] * len(messages)
+    index = 0
+    retried_index = None
+    
+    while index < len(messages):
+        # Open (or re-open) an authenticated connection
+        try:
+            connection = mail.connect()
+            connection.__enter__()
+        except Exception as e:
+            # Can't reach or log in to the server - nothing else in this batch will get through
+            logger.error(f"Failed to open SMTP connection: {str(e)}")
+            for remaining in range(index, len(messages)):
+                results[remaining] = (False, f"Connection failed: {str(e)}")
+            break
+        
+        try:
+            sent_on_connection = 0
+            while index < len(messages) and sent_on_connection < max_per_connection:
+                msg = messages[index]
+                try:
+                    connection.send(msg)
+                    results[index] = (True, None)
+                    logger.info(f"Email sent successfully to {', '.join(msg.recipients)}: {msg.subject}")
+                except Exception as e:
+                    if _is_connection_lost(e):
+                        if retried_index == index:
+                            # Already retried on a fresh connection - give up on this one
+                            results[index] = (False, str(e))
+                            index += 1
+                        else:
+                            retried_index = index
+                        logger.warning(f"SMTP connection lost, reconnecting: {str(e)}")
+                        break
+                    # Refused recipient, bad headers, etc. - the connection is still usable
+                    results[index] = (False, str(e))
+                    logger.error(f"Failed to send email to {', '.join(msg.recipients)}: {str(e)}")
+                index += 1
+                sent_on_connection += 1
+        finally:
+            _close_connection(connection)
+    
+    return results
+
+# Email bodies live in app/templates/email/ as <name>.html and <name>.txt pairs
+EMAIL_TEMPLATES = ['approval', 'rejection', 'completion']
+
+def render_email(template_name, **context):
+    """
+    Render the HTML and plain text variants of an email template.
     
-    <p>Great news! Your 3D print job has been reviewed and approved by our staff. Here are the details:</p>
+    Both variants share one context. Templates are compiled once and kept in
+    the Jinja environment's cache (see warm_email_templates), so rendering is
+    just executing the compiled template code.
     
-    <h3>Job Details:</h3>
-    <ul>
-        <li><strong>Job ID:</strong> {job.id[:8]}</li>
-        <li><strong>File:</strong> {job.display_name}</li>
-        <li><strong>Printer:</strong> {job.printer}</li>
-        <li><strong>Color:</strong> {job.color}</li>
-        <li><strong>Material:</strong> {job.material}</li>
-        <li><strong>Estimated Weight:</strong> {job.weight_g}g</li>
-                    <li><strong>Estimated Print Time:</strong> {round_time_conservative(job.time_hours or 0)} hours</li>
-        <li><strong>Estimated Cost:</strong> ${job.cost_usd:.2f}</li>
-    </ul>
+    Args:
+        template_name: Base name in app/templates/email/ (e.g., "approval")
+        **context: Template variables
     
-    <h3>CONFIRMATION REQUIRED</h3>
-    <p><strong>Your print will NOT proceed without your confirmation.</strong></p>
+    Returns:
+        Tuple of (html_content, text_content)
+    """
+    html_content = render_template(f'email/{template_name}.html', **context)
+    text_content = render_template(f'email/{template_name}.txt', **context)
+    return html_content, text_content
+
+def warm_email_templates(app):
+    """Compile every email template at startup so the first send doesn't pay for it."""
+    for template_name in EMAIL_TEMPLATES:
+        for extension in ('html', 'txt'):
+            app.jinja_env.get_template(f'email/{template_name}.{extension}')
+
+def build_approval_email(job):
+    """
+    Build the approval email asking the student to confirm.
     
-    <p>Please review the cost estimate and confirm your job by clicking the link below:</p>
-    <p><a href="{current_app.config.get('BASE_URL', 'http://localhost:5000')}/confirm/{job.confirm_token}" 
-          style="background: #2563eb; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px;">
-          CONFIRM PRINT JOB
-    </a></p>
+    Args:
+        job: Job model instance
     
-    <p><strong>Important:</strong> This confirmation link will expire in 7 days. If you don't confirm by then, your job will be removed from the queue.</p>
+    Returns:
+        Tuple of (subject, html_content, text_content)
+    """
+    subject = f"3D Print Job Approved - Confirmation Required (Job #{job.id[:8]})"
+    html_content, text_content = render_email(
+        'approval',
+        job=job,
+        estimated_time_hours=round_time_conservative(job.time_hours or 0),
+        confirm_url=f"{current_app.config.get('BASE_URL', 'http://localhost:5000')}/confirm/{job.confirm_token}"
+    )
+    return subject, html_content, text_content
+
+def send_approval_email(job):
+    """
+    Send approval email to student requesting confirmation.
     
-    <p>Questions? Contact us in person at the makerspace.</p>
+    Args:
+        job: Job model instance
     
-    <p>Best regards,<br>3D Print Service Team</p>
+    Returns:
+        bool: True if email sent successfully
     """
+    subject, html_content, text_content = build_approval_email(job)
+    return send_email(job.student_email, subject, html_content, text_content)
+
+def build_rejection_email(job, rejection_reasons):
+    """
+    Build the rejection email listing the reasons.
     
-    return send_email(job.student_email, subject, html_content)
+    Args:
+        job: Job model instance
+        rejection_reasons: List of rejection reason strings
+    
+    Returns:
+        Tuple of (subject, html_content, text_content)
+    """
+    subject = f"3D Print Job Update - Action Required (Job #{job.id[:8]})"
+    html_content, text_content = render_email('rejection', job=job, rejection_reasons=rejection_reasons or [])
+    return subject, html_content, text_content
 
 def send_rejection_email(job, rejection_reasons):
     """
@@ -137,41 +266,22 @@ def send_rejection_email(job, rejection_reasons):
     Returns:
         bool: True if email sent successfully
     """
-    subject = f"3D Print Job Update - Action Required (Job #{job.id[:8]})"
-    
-    reasons_html = ""
-    if rejection_reasons:
-        reasons_html = "<ul>"
-        for reason in rejection_reasons:
-            reasons_html += f"<li>{reason}</li>"
-        reasons_html += "</ul>"
-    
-    html_content = f"""
-    <h2>3D Print Job Update Required</h2>
-    
-    <p>Dear {job.student_name},</p>
-    
-    <p>We've reviewed your 3D print job submission and found some issues that need to be addressed before we can proceed with printing.</p>
-    
-    <h3>Job Details:</h3>
-    <ul>
-        <li><strong>Job ID:</strong> {job.id[:8]}</li>
-        <li><strong>File:</strong> {job.display_name}</li>
-        <li><strong>Submitted:</strong> {job.created_at.strftime('%B %d, %Y')}</li>
-    </ul>
-    
-    <h3>Issues Found:</h3>
-    {reasons_html}
-    
-    <h3>Next Steps:</h3>
-    <p>Please address these issues and submit a new print job when ready. You can submit a new job using the same submission form.</p>
+    subject, html_content, text_content = build_rejection_email(job, rejection_reasons)
+    return send_email(job.student_email, subject, html_content, text_content)
+
+def build_completion_email(job):
+    """
+    Build the completion email telling the student their print is ready.
     
-    <p>If you have questions about any of these issues or need help fixing your model, please visit us in person at the makerspace. Our staff are happy to help!</p>
+    Args:
+        job: Job model instance
     
-    <p>Best regards,<br>3D Print Service Team</p>
+    Returns:
+        Tuple of (subject, html_content, text_content)
     """
-    
-    return send_email(job.student_email, subject, html_content)
+    subject = f"3D Print Ready for Pickup! (Job #{job.id[:8]})"
+    html_content, text_content = render_email('completion', job=job)
+    return subject, html_content, text_content
 
 def send_completion_email(job):
     """
@@ -183,36 +293,8 @@ def send_completion_email(job):
     Returns:
         bool: True if email sent successfully
     """
-    subject = f"3D Print Ready for Pickup! (Job #{job.id[:8]})"
-    
-    html_content = f"""
-    <h2>Your 3D Print is Ready!</h2>
-    
-    <p>Dear {job.student_name},</p>
-    
-    <p>Great news! Your 3D print job has been completed and is ready for pickup.</p>
-    
-    <h3>Job Details:</h3>
-    <ul>
-        <li><strong>Job ID:</strong> {job.id[:8]}</li>
-        <li><strong>File:</strong> {job.display_name}</li>
-        <li><strong>Final Cost:</strong> ${job.cost_usd:.2f}</li>
-    </ul>
-    
-    <h3>Pickup Information:</h3>
-    <p><strong>Location:</strong> Makerspace - 3D Print Pickup Area<br>
-    <strong>Hours:</strong> Monday-Friday, 8:00 AM - 5:00 PM</p>
-    
-    <p>Please bring your student ID and be prepared to pay the final cost of ${job.cost_usd:.2f}.</p>
-    
-    <p><strong>Important:</strong> Please pick up your print within 30 days. Items not collected will be recycled.</p>
-    
-    <p>We hope you're pleased with your print!</p>
-    
-    <p>Best regards,<br>3D Print Service Team</p>
-    """
-    
-    return send_email(job.student_email, subject, html_content)
+    subject, html_content, text_content = build_completion_email(job)
+    return send_email(job.student_email, subject, html_content, text_content)
 
 # print("email_service.py loaded (placeholder).") # Debug
 pass 
\ No newline at end of file
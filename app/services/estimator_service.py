@@ -0,0 +1,204 @@
+# app/services/estimator_service.py
+"""
+Print time and weight estimates learned from past jobs.
+
+Every job staff approve records the sliced weight and print time next to the
+mesh measurements taken at upload. This module fits ordinary least-squares
+models (numpy.linalg.lstsq) from those measurements to each staff-entered
+value, one model per printer, with a pooled model per print type for printers
+that do not have enough history yet. Models are stored in the
+estimator_models table by `flask train-estimator`; predictions come with 95%
+prediction intervals from the residual variance and (X'X)^-1.
+"""
+from datetime import datetime
+import numpy as np
+from app.extensions import db
+from app.models.job import Job
+from app.models.estimator_model import EstimatorModel
+from app.services.cost_service import PRINTERS, get_printer_type
+
+# Mesh features used by every model (an intercept is prepended)
+FEATURES = ('volume_cm3', 'surface_area_cm2', 'height_mm')
+TARGETS = ('weight_g', 'time_hours')
+MIN_TRAINING_JOBS = 10  # Fewer past jobs than this and a scope gets no model
+
+# Two-sided 95% Student t critical values by degrees of freedom; 1.96 beyond the table
+_T_95 = [(1, 12.71), (2, 4.30), (3, 3.18), (4, 2.78), (5, 2.57), (6, 2.45), (7, 2.36), (8, 2.31),
+         (9, 2.26), (10, 2.23), (12, 2.18), (15, 2.13), (20, 2.09), (30, 2.04), (60, 2.00), (120, 1.98)]
+
+def _t_critical(dof: int) -> float:
+    for limit, value in _T_95:
+        if dof <= limit:
+            return value
+    return 1.96
+
+def job_features(job):
+    """
+    Feature vector for a job, intercept first.
+
+    Height is taken from the orientation the fit check chose when there is
+    one, since that is how the part will be printed.
+
+    Returns:
+        float64 array of len(FEATURES) + 1, or None if the model was not measured
+    """
+    if not job.volume_mm3 or job.surface_area_mm2 is None or job.size_z_mm is None:
+        return None
+    height = job.size_z_mm
+    orientation = (job.fit_check or {}).get('orientation')
+    if orientation:
+        height = orientation['size_mm'][2]
+    return np.array([1.0, job.volume_mm3 / 1000, job.surface_area_mm2 / 100, height])
+
+def fit_model(features: np.ndarray, values: np.ndarray) -> dict:
+    """
+    Fit values ~ features by least squares.
+
+    Args:
+        features: (n, p) design matrix including the intercept column
+        values: (n,) targets
+
+    Returns:
+        Dict with coefficients, xtx_inv, residual_std, sample_count and loo_mae
+    """
+    count, width = features.shape
+    coefficients, _, _, _ = np.linalg.lstsq(features, values, rcond=None)
+    residuals = values - features @ coefficients
+    dof = max(count - width, 1)
+    xtx_inv = np.linalg.pinv(features.T @ features)
+
+    # Leave-one-out residuals without refitting: e_i / (1 - h_ii)
+    leverage = np.einsum('ij,jk,ik->i', features, xtx_inv, features)
+    loo = residuals / np.maximum(1 - leverage, 1e-9)
+
+    return {
+        'coefficients': coefficients.tolist(),
+        'xtx_inv': xtx_inv.tolist(),
+        'residual_std': float(np.sqrt(residuals @ residuals / dof)),
+        'sample_count': int(count),
+        'loo_mae': float(np.mean(np.abs(loo))),
+    }
+
+def predict(model: EstimatorModel, features: np.ndarray) -> tuple[float, float, float]:
+    """
+    Predict one value with a 95% prediction interval.
+
+    Returns:
+        Tuple of (estimate, low, high); low is clipped at zero
+    """
+    coefficients = np.asarray(model.coefficients)
+    estimate = float(features @ coefficients)
+    spread = model.residual_std * np.sqrt(1 + features @ np.asarray(model.xtx_inv) @ features)
+    margin = _t_critical(model.sample_count - len(coefficients)) * float(spread)
+    return max(estimate, 0.0), max(estimate - margin, 0.0), estimate + margin
+
+def _training_rows():
+    """(printer, features, (weight_g, time_hours)) for every job with measurements and staff-entered values."""
+    jobs = (Job.query
+            .filter(Job.weight_g.isnot(None), Job.time_hours.isnot(None), Job.volume_mm3.isnot(None))
+            .filter(Job.printer.in_(list(PRINTERS)))
+            .all())
+    rows = []
+    for job in jobs:
+        features = job_features(job)
+        if features is not None and job.weight_g > 0 and job.time_hours > 0:
+            rows.append((job.printer, features, (job.weight_g, job.time_hours)))
+    return rows
+
+def retrain() -> list:
+    """
+    Refit every model from the job history and replace the stored models.
+
+    Returns:
+        List of (scope, target, sample_count, loo_mae) for the models stored
+    """
+    rows = _training_rows()
+    scopes = {}
+    for printer, features, targets in rows:
+        scopes.setdefault(printer, []).append((features, targets))
+        scopes.setdefault(f"type:{get_printer_type(printer)}", []).append((features, targets))
+
+    trained = []
+    EstimatorModel.query.delete()
+    now = datetime.utcnow()
+    for scope, samples in sorted(scopes.items()):
+        if len(samples) < MIN_TRAINING_JOBS:
+            continue
+        features = np.array([f for f, _ in samples])
+        values = np.array([t for _, t in samples])
+        for index, target in enumerate(TARGETS):
+            fitted = fit_model(features, values[:, index])
+            db.session.add(EstimatorModel(scope=scope, target=target, trained_at=now, **fitted))
+            trained.append((scope, target, fitted['sample_count'], fitted['loo_mae']))
+    db.session.commit()
+    return trained
+
+def _models_for(printer_key: str) -> dict:
+    """The stored models to use for a printer: its own if trained, else its print type's."""
+    scopes = [printer_key, f"type:{get_printer_type(printer_key)}"]
+    models = EstimatorModel.query.filter(EstimatorModel.scope.in_(scopes)).all()
+    for scope in scopes:
+        chosen = {m.target: m for m in models if m.scope == scope}
+        if len(chosen) == len(TARGETS):
+            return chosen
+    return {}
+
+def predict_job(job):
+    """
+    Predict weight and print time for a job from the trained models.
+
+    Returns:
+        Dict {'weight_g': (estimate, low, high), 'time_hours': (...), 'model': scope,
+        'samples': n}, or None if there is no model or the job was not measured
+    """
+    features = job_features(job)
+    if features is None or job.printer not in PRINTERS:
+        return None
+    models = _models_for(job.printer)
+    if not models:
+        return None
+    prediction = {target: predict(models[target], features) for target in TARGETS}
+    prediction['model'] = models['weight_g'].scope
+    prediction['samples'] = models['weight_g'].sample_count
+    return prediction
+
+def accuracy_report() -> list:
+    """
+    Compare the estimates stored at upload with what staff entered at approval.
+
+    Returns:
+        One dict per printer ('unknown' for jobs without one), per estimate
+        source ("source:history", ...) and for 'all', with keys group, jobs and, for each target, its mean absolute
+        error, mean absolute percentage error and the share of actual values
+        inside the stored 95% interval (None if no intervals were stored)
+    """
+    jobs = (Job.query
+            .filter(Job.weight_g.isnot(None), Job.time_hours.isnot(None), Job.estimate_info.isnot(None))
+            .all())
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.printer or 'unknown', []).append(job)
+        groups.setdefault(f"source:{job.estimate_info.get('source')}", []).append(job)
+        groups.setdefault('all', []).append(job)
+
+    report = []
+    estimated = {'weight_g': 'estimated_weight_g', 'time_hours': 'estimated_time_hours'}
+    for group, members in sorted(groups.items(), key=lambda item: (item[0] == 'all', item[0])):
+        row = {'group': group, 'jobs': len(members)}
+        for target, column in estimated.items():
+            pairs = [(getattr(j, column), getattr(j, target), (j.estimate_info or {}).get(target))
+                     for j in members if getattr(j, column) is not None]
+            if not pairs:
+                row[target] = None
+                continue
+            predicted = np.array([p for p, _, _ in pairs])
+            actual = np.array([a for _, a, _ in pairs])
+            intervals = [(a, i) for _, a, i in pairs if i]
+            row[target] = {
+                'jobs': len(pairs),
+                'mae': float(np.mean(np.abs(predicted - actual))),
+                'mape': float(np.mean(np.abs(predicted - actual) / np.maximum(actual, 1e-9))) * 100,
+                'coverage': (sum(lo <= a <= hi for a, (lo, hi) in intervals) / len(intervals) * 100) if intervals else None,
+            }
+        report.append(row)
+    return report
@@ -0,0 +1,333 @@
+# app/services/file_mover.py
+"""
+Background file moves for status transitions.
+
+On the production share every rename, makedirs and exists check can take
+hundreds of milliseconds, so transitions no longer move files on the request
+thread. queue_move points the job's file_path at the destination and adds a
+QUEUED file_moves entry in the caller's transaction; once that commits the
+mover renames the file in the background. Until then the job shows "file
+move pending" on the dashboard.
+
+The mover mirrors the email outbox: a dispatcher thread claims due moves with
+a conditional UPDATE (QUEUED -> MOVING with a lease, so concurrent processes
+never run the same move and a move abandoned by a dead process is claimed
+again) and runs them on a bounded thread pool. At most
+FILE_MOVE_MAX_PER_SHARE moves touch one share at a time. A job's moves run in
+the order they were queued. Failures are retried with exponential backoff and
+marked FAILED after FILE_MOVE_MAX_ATTEMPTS; staff can retry them from the job page.
+
+Because claims carry a lease and place_file is idempotent (a file already at
+its destination counts as moved, and it never overwrites one), the dispatcher
+is also the recovery pass: at startup and on every poll it finishes whatever a
+crashed process left QUEUED or half done. Finished entries are deleted after
+FILE_MOVE_JOURNAL_RETENTION_DAYS.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from app.extensions import db
+from app.models.file_move import FileMove
+from app.models.job import Job
+from app.services.background import BackgroundWorker, register_worker, wake_worker
+from app.services.storage_index import note_file
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = ('QUEUED', 'MOVING', 'FAILED')
+PRUNE_INTERVAL_SECONDS = 3600  # How often the dispatcher deletes old finished entries
+
+def place_file(source: str, dest: str) -> bool:
+    """Rename source to dest unless that would overwrite a file; returns whether the file is now at dest."""
+    if os.path.exists(dest):
+        return not os.path.exists(source)
+    if not os.path.exists(source):
+        return False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.rename(source, dest)
+    return True
+
+def queue_move(job, to_status: str, display_name: str = None, source_path: str = None) -> str:
+    """
+    Point a job at its file's new location and queue the rename (caller commits).
+
+    Touches no files, so it costs nothing on a slow share. Call
+    wake_file_mover() after committing. If the job has a model_path (its
+    original upload, kept next to a sliced file_path) that file is moved too.
+
+    Args:
+        job: Job being moved
+        to_status: Target status directory name (e.g., "Pending")
+        display_name: File name in the target directory (default job.display_name)
+        source_path: File to move (default job.file_path)
+
+    Returns:
+        The new file path
+
+    Raises:
+        ValueError: If APP_STORAGE_ROOT is not configured
+    """
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    if not storage_root:
+        raise ValueError("APP_STORAGE_ROOT not configured")
+    dest_path = os.path.join(storage_root, to_status, display_name or job.display_name)
+    moves = [(source_path or job.file_path, dest_path)]
+    if job.model_path:
+        model_dest = os.path.join(storage_root, to_status, os.path.basename(job.model_path))
+        if model_dest != job.model_path:
+            moves.append((job.model_path, model_dest))
+        job.model_path = model_dest
+    now = datetime.utcnow()
+    for source, dest in moves:
+        db.session.add(FileMove(job_id=job.id, source_path=source, dest_path=dest, status='QUEUED', next_attempt_at=now))
+    job.file_path = dest_path
+    return dest_path
+
+def move_states(job_ids: list) -> dict:
+    """
+    Unfinished background moves for some jobs, with their attempts and errors (job page).
+
+    Lists use with_move_state() instead, which needs no extra query.
+
+    Returns:
+        Dict mapping job id to its oldest unfinished FileMove; jobs whose files are in place are absent
+    """
+    if not job_ids:
+        return {}
+    states = {}
+    for entry in (FileMove.query
+                  .filter(FileMove.job_id.in_(job_ids), FileMove.status.in_(UNFINISHED))
+                  .order_by(FileMove.id.asc())):
+        states.setdefault(entry.job_id, entry)
+    return states
+
+def with_move_state(query):
+    """
+    Load each job's move state in the same SELECT as the jobs themselves.
+
+    Sets Job.file_move_status to the status of the job's oldest unfinished
+    move (QUEUED, MOVING or FAILED), or None when its files are in place.
+    """
+    oldest_unfinished = (select(FileMove.status)
+                         .where(FileMove.job_id == Job.id, FileMove.status.in_(UNFINISHED))
+                         .order_by(FileMove.id.asc())
+                         .limit(1)
+                         .correlate(Job)
+                         .scalar_subquery())
+    return query.options(db.with_expression(Job.file_move_status, oldest_unfinished))
+
+def claim_due_moves(limit: int) -> list:
+    """
+    Claim up to limit moves that are due, at most one per job (its oldest unfinished move).
+
+    Returns:
+        List of claimed FileMove IDs
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=current_app.config.get('FILE_MOVE_LEASE_SECONDS', 300))
+
+    candidates = (db.session.query(FileMove.id, FileMove.job_id)
+                  .filter(FileMove.status.in_(['QUEUED', 'MOVING']), FileMove.next_attempt_at <= now)
+                  .order_by(FileMove.id.asc())
+                  .limit(limit)
+                  .all())
+    job_ids = {job_id for _, job_id in candidates if job_id}
+    first_unfinished = dict(db.session.query(FileMove.job_id, func.min(FileMove.id))
+                            .filter(FileMove.job_id.in_(job_ids), FileMove.status.in_(UNFINISHED))
+                            .group_by(FileMove.job_id)
+                            .all()) if job_ids else {}
+
+    claimed = []
+    for entry_id, job_id in candidates:
+        if job_id and first_unfinished.get(job_id) != entry_id:
+            continue  # An earlier move of the same file has to finish first
+        result = db.session.execute(
+            update(FileMove)
+            .where(FileMove.id == entry_id,
+                   FileMove.status.in_(['QUEUED', 'MOVING']),
+                   FileMove.next_attempt_at <= now)
+            .values(status='MOVING', next_attempt_at=lease_until)
+        )
+        if result.rowcount:
+            claimed.append(entry_id)
+    db.session.commit()
+    return claimed
+
+def _record_failure(entry, error: str):
+    """Schedule a retry with exponential backoff, or give up after the last attempt."""
+    max_attempts = current_app.config.get('FILE_MOVE_MAX_ATTEMPTS', 8)
+    base_delay = current_app.config.get('FILE_MOVE_RETRY_BASE_SECONDS', 5)
+
+    entry.last_error = error
+    if entry.attempts >= max_attempts:
+        entry.status = 'FAILED'
+        logger.error(f"Giving up on moving {entry.source_path} to {entry.dest_path} after {entry.attempts} attempts: {error}")
+    else:
+        entry.status = 'QUEUED'
+        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=base_delay * 2 ** (entry.attempts - 1))
+        logger.warning(f"Moving {entry.source_path} to {entry.dest_path} failed (attempt {entry.attempts}), will retry: {error}")
+
+def _share_of(path: str) -> str:
+    """The share a path lives on (\\\\server\\share on Windows), or the storage root for local paths."""
+    return os.path.splitdrive(path)[0] or current_app.config.get('APP_STORAGE_ROOT', '')
+
+def perform_move(entry_id: int, share_limits=None) -> bool:
+    """
+    Run one claimed move and record the outcome.
+
+    Args:
+        entry_id: ID of a FileMove claimed by claim_due_moves
+        share_limits: Optional callable returning a context manager that
+            limits concurrent moves on a share
+
+    Returns:
+        Whether the file is now at its destination
+    """
+    entry = db.session.get(FileMove, entry_id)
+    if entry is None or entry.status != 'MOVING':
+        return False
+
+    entry.attempts += 1
+    error = None
+    try:
+        if share_limits is not None:
+            with share_limits(_share_of(entry.dest_path)):
+                placed = place_file(entry.source_path, entry.dest_path)
+        else:
+            placed = place_file(entry.source_path, entry.dest_path)
+        if not placed:
+            error = (f"Both {entry.source_path} and {entry.dest_path} exist" if os.path.exists(entry.source_path)
+                     else f"Source file not found: {entry.source_path}")
+    except OSError as e:
+        placed = False
+        error = str(e)
+
+    if placed:
+        note_file(entry.source_path, entry.dest_path)
+        entry.status = 'DONE'
+        entry.finished_at = datetime.utcnow()
+        entry.last_error = None
+    else:
+        _record_failure(entry, error)
+    db.session.commit()
+    return placed
+
+def process_due_moves(limit: int = None) -> tuple[int, int]:
+    """
+    Synchronously claim and run due moves until none are left (used by the CLI and tests).
+
+    Returns:
+        Tuple of (moved_count, failed_count)
+    """
+    limit = limit or current_app.config.get('FILE_MOVE_BATCH_SIZE', 20)
+    moved = failed = 0
+    while True:
+        claimed = claim_due_moves(limit)
+        if not claimed:
+            return moved, failed
+        for entry_id in claimed:
+            if perform_move(entry_id):
+                moved += 1
+            else:
+                failed += 1
+
+def prune_finished_moves() -> int:
+    """
+    Delete entries that finished more than FILE_MOVE_JOURNAL_RETENTION_DAYS ago.
+
+    Returns:
+        Number of entries deleted
+    """
+    retention_days = current_app.config.get('FILE_MOVE_JOURNAL_RETENTION_DAYS', 30)
+    pruned = db.session.execute(
+        delete(FileMove)
+        .where(FileMove.status == 'DONE', FileMove.finished_at < datetime.utcnow() - timedelta(days=retention_days))
+    ).rowcount
+    db.session.commit()
+    return pruned
+
+def retry_failed_moves(job_id: str = None) -> int:
+    """
+    Queue FAILED moves again with a fresh set of attempts (caller commits).
+
+    Args:
+        job_id: Only retry this job's moves
+
+    Returns:
+        Number of moves queued
+    """
+    query = update(FileMove).where(FileMove.status == 'FAILED')
+    if job_id:
+        query = query.where(FileMove.job_id == job_id)
+    return db.session.execute(
+        query.values(status='QUEUED', attempts=0, next_attempt_at=datetime.utcnow())
+    ).rowcount
+
+class FileMover(BackgroundWorker):
+    """Background dispatcher that runs queued file moves on a bounded thread pool."""
+
+    thread_name = 'file-mover-dispatcher'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._executor = None
+        self._shares = {}
+
+    def _starting(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.app.config.get('FILE_MOVE_WORKERS', 4),
+            thread_name_prefix='file-mover'
+        )
+
+    def _stopped(self):
+        # Wait for moves in progress
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _share_limit(self, share: str):
+        with self._lock:
+            if share not in self._shares:
+                self._shares[share] = threading.BoundedSemaphore(self.app.config.get('FILE_MOVE_MAX_PER_SHARE', 2))
+            return self._shares[share]
+
+    def _run(self):
+        poll_seconds = self.app.config.get('FILE_MOVE_POLL_SECONDS', 5)
+        batch_size = self.app.config.get('FILE_MOVE_BATCH_SIZE', 20)
+        next_prune = 0
+        while not self._stop.is_set():
+            claimed = []
+            try:
+                with self.app.app_context():
+                    if time.monotonic() >= next_prune:
+                        prune_finished_moves()
+                        next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+                    claimed = claim_due_moves(batch_size)
+                if claimed:
+                    wait([self._executor.submit(self._move, entry_id) for entry_id in claimed])
+            except Exception as e:
+                logger.error(f"File mover dispatcher error: {str(e)}")
+
+            # Keep going while there is a backlog; otherwise sleep until woken or the next poll
+            if len(claimed) < batch_size:
+                self._sleep(poll_seconds)
+
+    def _move(self, entry_id):
+        with self.app.app_context():
+            try:
+                perform_move(entry_id, share_limits=self._share_limit)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error moving file for journal entry {entry_id}: {str(e)}")
+
+def init_file_mover(app):
+    """Create the file mover and start it lazily with the first request."""
+    register_worker(app, 'file_mover', FileMover(app), app.config.get('FILE_MOVER_ENABLED', True))
+
+def wake_file_mover():
+    """Nudge the mover after committing newly queued moves."""
+    wake_worker('file_mover')
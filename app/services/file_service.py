@@ -2,13 +2,28 @@
 
 """
 File service for handling 3D print job file operations.
-Handles standardized naming, file saving, and file movements between status directories.
+Handles standardized naming, file saving, and file lookups in the status directories.
 """
 import os
 import uuid
 from pathlib import Path
 from werkzeug.utils import secure_filename
 from flask import current_app
+from app.utils.uploads import HashingUploadStream
+from app.services import blob_service, storage_index
+
+# Slicer output staff may save next to an upload (".gcode.3mf" ends in ".3mf")
+SLICED_FILE_EXTENSIONS = ('.gcode', '.gco', '.g', '.3mf')
+
+def _list_sliced_files(directory: str) -> dict:
+    """File name -> (size, mtime) for the slicer output in a directory."""
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(SLICED_FILE_EXTENSIONS) and entry.is_file():
+                info = entry.stat()
+                files[entry.name] = (info.st_size, info.st_mtime)
+    return files
 
 class FileService:
     """Service for handling file operations in the 3D print system."""
@@ -56,9 +71,13 @@ class FileService:
         return standardized_name
     
     @staticmethod
-    def save_uploaded_file(uploaded_file, student_name: str, print_method: str, color: str, job_id: str) -> tuple[str, str, str]:
+    def save_uploaded_file(uploaded_file, student_name: str, print_method: str, color: str, job_id: str) -> tuple[str, str, str, str]:
         """
         Save uploaded file to the Uploaded directory with standardized naming.
+
+        The content is stored once in the blob store (see blob_service) and the
+        file in Uploaded is a link to it, so identical resubmissions share storage.
+        The caller is responsible for blob_service.register_blob() on the returned hash.
         
         Args:
             uploaded_file: FileStorage object from form
@@ -68,7 +87,7 @@ class FileService:
             job_id: UUID job ID
             
         Returns:
-            Tuple of (original_filename, display_name, file_path)
+            Tuple of (original_filename, display_name, file_path, file_hash)
             
         Raises:
             OSError: If file saving fails
@@ -98,85 +117,110 @@ class FileService:
         # Create full file path
         file_path = os.path.join(uploaded_dir, display_name)
         
-        # Save the file
+        # Save the file. Streamed uploads were already written to storage and
+        # hashed while the request was parsed, so they only need a rename (or
+        # nothing at all if the blob already exists) plus a link.
         try:
-            uploaded_file.save(file_path)
+            stream = uploaded_file.stream
+            if isinstance(stream, HashingUploadStream):
+                file_hash = blob_service.store_stream(stream, file_path)
+            else:
+                uploaded_file.save(file_path)
+                file_hash = blob_service.store_file(file_path)
         except Exception as e:
             raise OSError(f"Failed to save file: {str(e)}")
+        storage_index.note_file(file_path)
         
-        return original_filename, display_name, file_path
+        return original_filename, display_name, file_path, file_hash
     
     @staticmethod
-    def move_file(current_path: str, from_status: str, to_status: str, display_name: str) -> str:
+    def find_sliced_file(file_path: str) -> str:
         """
-        Move file between status directories.
-        
+        Find a sliced version of a job file saved next to it by staff.
+
+        Slicers name their output after the input file (PrusaSlicer adds layer
+        height, material, printer and print time), so any G-code or 3MF in the
+        same directory whose name starts with the job file's name counts. The
+        most recently modified one wins.
+
         Args:
-            current_path: Current full path to the file
-            from_status: Current status directory name (e.g., "Uploaded")
-            to_status: Target status directory name (e.g., "Pending")
-            display_name: Current display name of the file
-            
+            file_path: Full path to the job's current file
+
         Returns:
-            New file path after moving
-            
-        Raises:
-            OSError: If file move fails
-            ValueError: If paths are invalid
+            Path to the sliced file, or None if there is none
         """
-        storage_root = current_app.config.get('APP_STORAGE_ROOT')
-        if not storage_root:
-            raise ValueError("APP_STORAGE_ROOT not configured")
-        
-        # Construct new path
-        new_dir = os.path.join(storage_root, to_status)
-        new_path = os.path.join(new_dir, display_name)
-        
-        # Ensure target directory exists
-        os.makedirs(new_dir, exist_ok=True)
-        
-        # Move file
-        try:
-            if os.path.exists(current_path):
-                os.rename(current_path, new_path)
-            else:
-                raise FileNotFoundError(f"Source file not found: {current_path}")
-        except Exception as e:
-            raise OSError(f"Failed to move file from {current_path} to {new_path}: {str(e)}")
-        
-        return new_path
-    
+        return FileService.find_sliced_files([file_path]).get(file_path)
+
     @staticmethod
-    def move_file_between_status_dirs(current_path: str, from_status: str, to_status: str) -> str:
+    def find_sliced_files(file_paths: list) -> dict:
         """
-        Move file between status directories (convenience wrapper).
-        
+        Find sliced versions of many job files, listing each directory once
+        (from the storage index when it has the directory).
+
         Args:
-            current_path: Current full path to the file
-            from_status: Current status directory name (e.g., "PENDING")
-            to_status: Target status directory name (e.g., "READYTOPRINT")
-            
+            file_paths: Full paths to the jobs' current files
+
         Returns:
-            New file path after moving
-            
-        Raises:
-            OSError: If file move fails
-            ValueError: If paths are invalid
+            Dict mapping each file path that has a sliced version to the sliced file's path
         """
-        # Extract the filename from current path
-        filename = os.path.basename(current_path)
-        
-        # Use the existing move_file method
-        return FileService.move_file(current_path, from_status, to_status, filename)
-    
+        by_directory = {}
+        for file_path in file_paths:
+            directory, filename = os.path.split(file_path)
+            by_directory.setdefault(directory, {})[filename] = os.path.splitext(filename)[0]
+
+        found = {}
+        for directory, stems in by_directory.items():
+            files = storage_index.list_directory(directory)
+            if files is None:
+                try:
+                    files = _list_sliced_files(directory)
+                except OSError:
+                    continue
+            newest = {}
+            for name, (_, mtime) in files.items():
+                if not name.lower().endswith(SLICED_FILE_EXTENSIONS):
+                    continue
+                for filename, stem in stems.items():
+                    if name != filename and name.startswith(stem):
+                        if filename not in newest or mtime > newest[filename][0]:
+                            newest[filename] = (mtime, os.path.join(directory, name))
+            for filename, (_, path) in newest.items():
+                found[os.path.join(directory, filename)] = path
+        return found
+
+    @staticmethod
+    def model_source(job) -> tuple[str, str]:
+        """
+        Find the student's model for a job, even after a sliced file has replaced it as file_path.
+
+        Returns:
+            Tuple of (path, file_type): the blob if it exists, otherwise
+            model_path or file_path; file_type (e.g. ".stl") comes from
+            original_filename, since blobs have no extension
+        """
+        file_type = os.path.splitext(job.original_filename or '')[1].lower()
+        if job.file_hash:
+            path = blob_service.blob_path(job.file_hash)
+            if os.path.exists(path):
+                return path, file_type
+        return job.model_path or job.file_path, file_type
+
     @staticmethod
     def file_exists(file_path: str) -> bool:
-        """Check if a file exists at the given path."""
-        return os.path.exists(file_path) if file_path else False
+        """Check if a file exists at the given path (answered from the storage index when it can be)."""
+        if not file_path:
+            return False
+        size = storage_index.lookup_file_size(file_path)
+        if size is not None:
+            return size is not storage_index.ABSENT
+        return os.path.exists(file_path)
     
     @staticmethod
     def get_file_size(file_path: str) -> int:
-        """Get file size in bytes. Returns 0 if file doesn't exist."""
+        """Get file size in bytes (from the storage index when it can be). Returns 0 if file doesn't exist."""
+        size = storage_index.lookup_file_size(file_path)
+        if size is not None:
+            return 0 if size is storage_index.ABSENT else size
         try:
             return os.path.getsize(file_path) if os.path.exists(file_path) else 0
         except OSError:
@@ -0,0 +1,157 @@
+# app/services/fit_check.py
+"""
+Build-volume fit check for uploaded models.
+
+A model fits a printer if some orientation puts its bounding box inside the
+printer's build volume (PRINTERS[...]['build_mm']). The orientations searched
+are the ones staff actually use: any of the three model axes pointing up (the
+90-degree rotations), combined with any rotation about the vertical axis on
+the bed, in ROTATION_STEP_DEG steps. Tilting a part off its axes changes how
+it prints and needs supports, so it is left to staff.
+
+The rotated bounding boxes are computed from a compact outline of the mesh
+projected along each axis. The outline is built block by block while the
+mesh is measured (see mesh_analysis), by marking the cells of a fixed
+GRID_CELLS x GRID_CELLS grid the vertices fall in and keeping the corners of
+the outermost cell in every row. It is conservative: the outline encloses the
+model, so a rotated box may be up to one grid cell too large but never too
+small. Axis-aligned boxes use the exact extents.
+"""
+from dataclasses import dataclass
+import numpy as np
+from app.services.cost_service import PRINTERS, get_printer_type
+
+ROTATION_STEP_DEG = 1
+GRID_CELLS = 512
+
+AXES = 'xyz'
+# Up axis -> the two axes that lie on the bed (as seen from above)
+BED_AXES = {0: (1, 2), 1: (2, 0), 2: (0, 1)}
+
+@dataclass
+class Orientation:
+    """A way to place the model on the bed."""
+    up_axis: str          # Model axis pointing up: 'x', 'y' or 'z' (as uploaded: 'z')
+    rotation_deg: int     # Rotation about the up axis
+    size_mm: tuple        # Resulting bounding box (bed x, bed y, height)
+
+    def to_dict(self) -> dict:
+        return {'up_axis': self.up_axis, 'rotation_deg': self.rotation_deg,
+                'size_mm': [round(v, 1) for v in self.size_mm]}
+
+class FootprintHull:
+    """Conservative outline of a mesh seen along each axis, built block by block."""
+
+    def __init__(self):
+        self.low = np.full(3, np.inf)
+        self.high = np.full(3, -np.inf)
+        self._outlines = {up: [] for up in BED_AXES}
+
+    def add(self, points: np.ndarray):
+        """Add a (3, n) array of vertex coordinates (x row, y row, z row)."""
+        if points.shape[1] == 0:
+            return
+        low, high = points.min(axis=1), points.max(axis=1)
+        self.low = np.minimum(self.low, low)
+        self.high = np.maximum(self.high, high)
+
+        # Grid cell of every coordinate, computed once and shared by the two planes each axis is in
+        cell = np.maximum(high - low, 1e-9) / GRID_CELLS
+        cells = ((points - low[:, None]) / cell[:, None]).astype(np.int32)
+        np.minimum(cells, GRID_CELLS - 1, out=cells)
+        for up, (a, b) in BED_AXES.items():
+            self._outlines[up].append(_outline(cells[a], cells[b], low[[a, b]], cell[[a, b]]))
+
+    def orientations(self) -> list:
+        """Every searched orientation with its bounding box, as-uploaded first."""
+        if not np.all(np.isfinite(self.low)):
+            return []
+        exact = self.high - self.low
+        angles = np.arange(0, 180, ROTATION_STEP_DEG)
+        radians = np.radians(angles)
+        directions = np.stack([np.cos(radians), np.sin(radians)])   # (2, angles)
+        found = []
+        for up in (2, 0, 1):
+            a, b = BED_AXES[up]
+            outline = np.concatenate(self._outlines[up])
+            projected = outline @ directions                         # (points, angles)
+            widths = projected.max(axis=0) - projected.min(axis=0)
+            # The depth at an angle is the width at angle + 90
+            quarter = 90 // ROTATION_STEP_DEG
+            depths = np.roll(widths, -quarter)
+            # Exact extents where the rotation is axis-aligned
+            widths[0], depths[0] = exact[a], exact[b]
+            widths[quarter], depths[quarter] = exact[b], exact[a]
+            for angle, width, depth in zip(angles, widths, depths):
+                found.append(Orientation(AXES[up], int(angle), (float(width), float(depth), float(exact[up]))))
+        return found
+
+def _outline(cols: np.ndarray, rows: np.ndarray, low: np.ndarray, cell: np.ndarray) -> np.ndarray:
+    """Corners of the outermost occupied grid cell in every row, as (m, 2) coordinates."""
+    occupied = np.bincount(rows * GRID_CELLS + cols, minlength=GRID_CELLS * GRID_CELLS)
+    occupied = occupied.reshape(GRID_CELLS, GRID_CELLS) > 0
+
+    used = np.flatnonzero(occupied.any(axis=1))
+    left = occupied[used].argmax(axis=1)
+    right = GRID_CELLS - occupied[used, ::-1].argmax(axis=1)   # One past the last occupied cell
+    xs = np.concatenate([left, left, right, right]) * cell[0] + low[0]
+    ys = np.concatenate([used, used + 1, used, used + 1]) * cell[1] + low[1]
+    return np.stack([xs, ys], axis=1)
+
+def find_fit(orientations: list, build_mm: tuple):
+    """
+    Pick an orientation that fits a build volume.
+
+    Prefers the model as uploaded, then the smallest rotation on the bed, then
+    laying it on another side.
+
+    Returns:
+        Orientation, or None if nothing fits
+    """
+    fitting = [o for o in orientations
+               if o.size_mm[0] <= build_mm[0] and o.size_mm[1] <= build_mm[1] and o.size_mm[2] <= build_mm[2]]
+    if not fitting:
+        return None
+    return min(fitting, key=lambda o: (o.up_axis != 'z', min(o.rotation_deg, 180 - o.rotation_deg)))
+
+def check_job_fit(job, stats) -> dict:
+    """
+    Check a measured job against every printer and store the result on the job (caller commits).
+
+    If the model cannot fit the printer the student picked but fits another
+    printer of the same type, the job is moved to that printer (the smallest
+    that fits). Otherwise a job that fits nothing is left for staff review.
+
+    Args:
+        job: Job with printer set
+        stats: MeshStats from mesh_analysis.analyze_job_file (may be None)
+
+    Returns:
+        The stored report, or None if the model could not be measured
+    """
+    if stats is None or stats.footprint is None:
+        return None
+
+    orientations = stats.footprint.orientations()
+    fits = {}
+    for key, config in PRINTERS.items():
+        orientation = find_fit(orientations, config['build_mm'])
+        if orientation:
+            fits[key] = orientation
+
+    requested = job.printer
+    if requested in PRINTERS and requested not in fits:
+        same_type = [key for key in fits if get_printer_type(key) == get_printer_type(requested)]
+        if same_type:
+            job.printer = min(same_type, key=lambda key: np.prod(PRINTERS[key]['build_mm']))
+
+    report = {
+        'requested_printer': requested,
+        'printer': job.printer,
+        'fits_on': list(fits),
+        'reassigned': job.printer != requested,
+        'fits': job.printer in fits,
+        'orientation': fits[job.printer].to_dict() if job.printer in fits else None,
+    }
+    job.fit_check = report
+    return report
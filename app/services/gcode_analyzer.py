@@ -0,0 +1,516 @@
+# app/services/gcode_analyzer.py
+"""
+Streaming analyzer for sliced G-code.
+
+When staff slice a job and save the output next to the upload, the sliced
+file is the authoritative source for print time and filament use. Most
+slicers write their own estimates as comments at the top (Cura, Bambu Studio,
+OrcaSlicer, Simplify3D, ideaMaker) or bottom (PrusaSlicer, SuperSlicer) of
+the file, so those are read first from the first and last few hundred KB.
+
+Files without estimates are simulated instead. The G-code is read in
+fixed-size blocks of complete lines and each block is parsed in bulk with
+NumPy byte masks, as in obj_reader: words are located with masks, converted
+with one np.fromstring call per block, and modal values (positions,
+feedrate, acceleration) are forward-filled. Move times use a trapezoidal
+speed profile with the junction speed between moves set by the angle between
+them. Only commands that affect time or extrusion are interpreted: G0-G3
+(including I/J arcs), G4, G28, G90/G91, G92, M82/M83 and M204.
+
+Bambu Studio / OrcaSlicer .gcode.3mf projects are read from the G-code plate
+stored inside the package; other 3MF projects fall back to their embedded
+slicer config (threemf_reader.read_3mf_metadata).
+"""
+import logging
+import math
+import os
+import re
+import zipfile
+from functools import partial
+import numpy as np
+from flask import current_app
+from app.extensions import db
+from app.models.job import Job
+from app.services import storage_index
+from app.services.cost_service import MATERIAL_DENSITY, get_default_material
+from app.services.threemf_reader import parse_duration_hours, read_3mf_metadata
+from app.services.worker_pool import InFlightTasks
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 1 << 22         # Bytes of G-code simulated per block
+HEADER_BYTES = 1 << 18        # Read from the start of the file for slicer estimates
+FOOTER_BYTES = 1 << 19        # Read from the end (PrusaSlicer writes estimates before its config dump)
+
+DEFAULT_FEEDRATE_MM_MIN = 1500
+DEFAULT_ACCEL_MM_S2 = 1000
+DEFAULT_FILAMENT_DIAMETER_MM = 1.75
+
+# Comment keys slicers use for their estimates, in order of preference
+TIME_KEYS = ['estimated printing time (normal mode)', 'estimated printing time', 'total estimated time',
+             'time', 'print time', 'build time']
+WEIGHT_KEYS = ['total filament used [g]', 'total filament weight [g]', 'filament used [g]', 'plastic weight']
+LENGTH_MM_KEYS = ['filament used [mm]', 'total filament length [mm]', 'filament length', 'material#1 used']
+LENGTH_M_KEYS = ['filament used']   # Cura: ";Filament used: 1.2345m"
+DIAMETER_KEYS = ['filament_diameter', 'filament diameter']
+DENSITY_KEYS = ['filament_density']
+
+_GCODE_PART_RE = re.compile(r'Metadata/plate_\d+\.gcode$')
+_COMMENT_RE = re.compile(rb'^[ \t]*;([^\n]*)', re.M)
+_KEY_VALUE_RE = re.compile(r'^([^=:]+?)\s*[=:]\s*(.+)$')
+_GENERATOR_RE = re.compile(r'(?:generated (?:by|with)|sliced by)\s+(.+)', re.I)
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+_M73_RE = re.compile(rb'^M73 P0 R(\d+)', re.M)
+_WORD_RE = re.compile(rb'([A-Z])(-?\d*\.?\d+)')
+
+_NEWLINE = ord('\n')
+_SEMICOLON = ord(';')
+_SPACE = ord(' ')
+_BLANK_MAX = ord(' ')
+
+# Command keys: G codes as is, M codes + 1000
+_MOVES = (0, 1, 2, 3)
+_DWELL, _HOME, _ABSOLUTE, _RELATIVE, _SET_POSITION = 4, 28, 90, 91, 92
+_E_ABSOLUTE, _E_RELATIVE, _SET_ACCEL = 1082, 1083, 1204
+_MODE_CHANGES = (_ABSOLUTE, _RELATIVE, _E_ABSOLUTE, _E_RELATIVE)
+_COMMANDS = np.array(_MOVES + (_DWELL, _HOME, _SET_POSITION, _SET_ACCEL) + _MODE_CHANGES)
+
+# Parameter word -> table column
+_COLUMNS = b'XYZEFIJSP'
+_X, _Y, _Z, _E, _F, _I, _J, _S, _P = range(len(_COLUMNS))
+_COLUMN_OF = np.full(256, -1, dtype=np.int8)
+for _index, _letter in enumerate(_COLUMNS):
+    _COLUMN_OF[_letter] = _index
+
+_tasks = InFlightTasks()  # Keyed by job id
+
+def _read_comments(text: bytes, found: dict):
+    """Collect "; key = value" / ";KEY:value" comments into found (first occurrence wins)."""
+    for raw in _COMMENT_RE.findall(text):
+        line = raw.decode('utf-8', errors='replace')
+        generator = _GENERATOR_RE.search(line)
+        if generator and 'application' not in found:
+            found['application'] = re.split(r' on |,', generator.group(1))[0].strip()
+            continue
+        # Bambu Studio puts several "key: value" pairs on one line, separated by ';'
+        for part in line.split(';'):
+            match = _KEY_VALUE_RE.match(part.strip())
+            if match:
+                found.setdefault(match.group(1).strip().lower(), match.group(2).strip())
+
+def _sum_numbers(value: str) -> float:
+    """Sum the numbers in a value, one per extruder ("12.3, 0.0"), ignoring parenthesised conversions."""
+    return sum(float(n) for n in _NUMBER_RE.findall(re.sub(r'\(.*?\)', '', value)))
+
+def _first(found: dict, keys: list):
+    return next((found[key] for key in keys if found.get(key)), None)
+
+def _slicer_estimates(comments: dict, density_g_cm3: float) -> dict:
+    """Turn collected comments into a result dict; print time and filament are None if missing."""
+    result = {'source': 'slicer', 'application': comments.get('application'),
+              'print_time_hours': None, 'filament_mm': None, 'filament_g': None}
+
+    value = _first(comments, TIME_KEYS)
+    if value:
+        result['print_time_hours'] = parse_duration_hours(value)
+    elif comments.get('m73_minutes'):
+        result['print_time_hours'] = comments['m73_minutes'] / 60
+
+    value = _first(comments, LENGTH_MM_KEYS)
+    if value:
+        result['filament_mm'] = _sum_numbers(value)
+    else:
+        value = _first(comments, LENGTH_M_KEYS)
+        if value and value.rstrip().endswith('m'):
+            result['filament_mm'] = _sum_numbers(value) * 1000
+
+    value = _first(comments, WEIGHT_KEYS)
+    if value:
+        result['filament_g'] = _sum_numbers(value)
+    elif result['filament_mm']:
+        diameter = _sum_numbers(_first(comments, DIAMETER_KEYS) or '') or DEFAULT_FILAMENT_DIAMETER_MM
+        density = _sum_numbers(_first(comments, DENSITY_KEYS) or '') or density_g_cm3
+        result['filament_g'] = filament_grams(result['filament_mm'], density, diameter)
+    return result
+
+def filament_grams(length_mm: float, density_g_cm3: float,
+                   diameter_mm: float = DEFAULT_FILAMENT_DIAMETER_MM) -> float:
+    """Weight of a length of filament."""
+    return length_mm * math.pi * (diameter_mm / 2) ** 2 / 1000 * density_g_cm3
+
+def _ffill(values: np.ndarray, start: float) -> np.ndarray:
+    """Forward-fill NaNs, starting from start; returns len(values) + 1 values (start first)."""
+    filled = np.concatenate(([start], values))
+    index = np.where(np.isnan(filled), 0, np.arange(len(filled)))
+    np.maximum.accumulate(index, out=index)
+    return filled[index]
+
+class _Simulator:
+    """Time and extrusion totals for a stream of parsed G-code rows, carried across blocks."""
+
+    def __init__(self):
+        self.position = np.full(4, np.nan)   # X Y Z E, as last commanded
+        self.feedrate = float(DEFAULT_FEEDRATE_MM_MIN)
+        self.accel = float(DEFAULT_ACCEL_MM_S2)
+        self.absolute = np.array([True, True, True, True])  # Per axis; G90/G91 set XYZ(E), M82/M83 set E
+        self.direction = np.zeros(3)
+        self.speed = 0.0
+        self.seconds = 0.0
+        self.extruded_mm = 0.0
+        self.moves = 0
+
+    def run(self, codes: np.ndarray, table: np.ndarray):
+        """Simulate rows in file order, splitting at positioning mode changes."""
+        boundaries = np.flatnonzero(np.isin(codes, _MODE_CHANGES))
+        start = 0
+        for boundary in boundaries:
+            self._run_modal(codes[start:boundary], table[start:boundary])
+            code = codes[boundary]
+            if code in (_ABSOLUTE, _RELATIVE):
+                self.absolute[:] = code == _ABSOLUTE   # Marlin: G90/G91 switch the extruder too
+            else:
+                self.absolute[3] = code == _E_ABSOLUTE
+            start = boundary + 1
+        self._run_modal(codes[start:], table[start:])
+
+    def _run_modal(self, codes: np.ndarray, table: np.ndarray):
+        if not len(codes):
+            return
+        is_move = codes <= 3
+        is_set = (codes == _SET_POSITION) | (codes == _HOME)
+        homed = codes == _HOME
+        table[homed, _X:_E] = 0.0
+
+        dwell = codes == _DWELL
+        if dwell.any():
+            self.seconds += np.nansum(table[dwell, _P]) / 1000 + np.nansum(table[dwell, _S])
+
+        feedrate = _ffill(np.where(is_move, table[:, _F], np.nan), self.feedrate)
+        accel = np.where(codes == _SET_ACCEL, np.where(np.isnan(table[:, _S]), table[:, _P], table[:, _S]), np.nan)
+        accel = _ffill(accel, self.accel)
+        self.feedrate, self.accel = feedrate[-1], accel[-1]
+
+        deltas = np.empty((len(codes), 4))
+        for axis in range(4):
+            values = np.where(is_move | is_set, table[:, axis], np.nan)
+            if self.absolute[axis]:
+                filled = _ffill(values, self.position[axis])
+                delta = np.diff(filled)
+                self.position[axis] = filled[-1]
+            else:
+                delta = np.nan_to_num(values)
+                delta[is_set] = 0.0
+                self.position[axis] = np.nan_to_num(self.position[axis]) + delta.sum()
+            delta[is_set] = 0.0
+            deltas[:, axis] = np.nan_to_num(delta)
+
+        moves = deltas[is_move]
+        self.extruded_mm += moves[:, 3].sum()
+        self._add_move_times(moves, codes[is_move], table[is_move, _I], table[is_move, _J],
+                             feedrate[1:][is_move], accel[1:][is_move])
+
+    def _add_move_times(self, moves, codes, i_offset, j_offset, feedrate, accel):
+        xyz = moves[:, :3]
+        chord = np.sqrt(np.einsum('ij,ij->i', xyz, xyz))
+
+        # Arcs: angle swept around the centre (start + I/J), clockwise for G2
+        arc = (codes >= 2) & ~np.isnan(i_offset) & ~np.isnan(j_offset)
+        length = chord
+        if arc.any():
+            ci, cj = -i_offset[arc], -j_offset[arc]                          # Centre -> start
+            ei, ej = moves[arc, 0] + ci, moves[arc, 1] + cj                  # Centre -> end
+            swept = np.arctan2(ci * ej - cj * ei, ci * ei + cj * ej)
+            swept = np.where(codes[arc] == 2, -swept, swept) % (2 * np.pi)
+            swept = np.where(swept < 1e-9, 2 * np.pi, swept)                 # Same start and end: full circle
+            length = chord.copy()
+            length[arc] = np.hypot(np.hypot(i_offset[arc], j_offset[arc]) * swept, moves[arc, 2])
+        length = np.where(length > 0, length, np.abs(moves[:, 3]))        # Extruder-only moves (retracts)
+
+        moving = length > 0
+        if not moving.any():
+            return
+        length, chord, xyz = length[moving], chord[moving], xyz[moving]
+        speed = np.maximum(feedrate[moving], 1e-3) / 60
+        accel = np.maximum(accel[moving], 1.0)
+        direction = xyz / np.maximum(chord, 1e-12)[:, None]
+
+        # Junction speed: full speed through a straight continuation, stop at a right angle or sharper
+        previous_direction = np.vstack([self.direction, direction[:-1]])
+        previous_speed = np.concatenate(([self.speed], speed[:-1]))
+        cosine = np.clip(np.einsum('ij,ij->i', direction, previous_direction), 0.0, 1.0)
+        entry = np.minimum(speed, previous_speed) * cosine
+        exit_ = np.concatenate((entry[1:], speed[-1:]))
+
+        # Trapezoid: accelerate from entry, cruise, decelerate to exit. Moves too short to
+        # reach cruise speed peak where the acceleration and braking distances meet.
+        ramps = (2 * speed ** 2 - entry ** 2 - exit_ ** 2) / (2 * accel)
+        peak = np.where(length >= ramps, speed,
+                        np.sqrt(np.maximum(accel * length + (entry ** 2 + exit_ ** 2) / 2, 0.0)))
+        cruise = np.maximum(length - ramps, 0.0) / speed
+        seconds = cruise + (np.maximum(peak - entry, 0.0) + np.maximum(peak - exit_, 0.0)) / accel
+        seconds = np.maximum(seconds, length / speed)
+
+        self.seconds += float(seconds.sum())
+        self.moves += len(length)
+        self.direction, self.speed = direction[-1], float(speed[-1])
+
+def _parse_block(data: bytes):
+    """
+    Parse one block of complete lines into (codes, table) for the interpreted commands.
+
+    Returns None if a parameter word has no number; the caller then parses the
+    block line by line.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buf == _NEWLINE)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+
+    # Command code of every line starting with G or M, digit by digit (at most 4 digits)
+    letter = buf[starts]
+    code = np.zeros(len(starts), dtype=np.int64)
+    digits = np.zeros(len(starts), dtype=np.int64)
+    reading = (letter == ord('G')) | (letter == ord('M'))
+    for offset in range(1, 6):
+        char = buf[np.minimum(starts + offset, len(buf) - 1)].astype(np.int64)
+        is_digit = reading & (char >= ord('0')) & (char <= ord('9'))
+        code = np.where(is_digit, code * 10 + char - ord('0'), code)
+        digits += is_digit
+        reading &= is_digit
+    # The code must end at a blank, a comment or the next word ("G1X10"), not at "." (M862.3)
+    after = buf[np.minimum(starts + digits + 1, len(buf) - 1)]
+    ended = (after <= _BLANK_MAX) | (after == _SEMICOLON) | ((after >= ord('A')) & (after <= ord('Z')))
+    code += np.where(letter == ord('M'), 1000, 0)
+    wanted = (digits > 0) & ended & np.isin(code, _COMMANDS)
+    codes = code[wanted]
+    table = np.full((len(codes), len(_COLUMNS)), np.nan)
+
+    # Parameters: copy out the lines that have them ("G28 W" has none worth reading), blank
+    # comments and word letters, and parse every number in one call
+    parsed = wanted & (code != _HOME)
+    if not parsed.any():
+        return codes, table
+    text = buf[np.repeat(parsed, lengths)]
+    semicolons = np.flatnonzero(text == _SEMICOLON)
+    if len(semicolons):
+        # Blank from each ';' up to the end of its line
+        comment_ends = np.flatnonzero(text == _NEWLINE)
+        comment_ends = comment_ends[np.searchsorted(comment_ends, semicolons)]
+        spans = comment_ends - semicolons
+        offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        text[np.repeat(semicolons, spans) + offsets] = _SPACE
+    words = np.flatnonzero((text >= ord('A')) & (text <= ord('Z')))
+    letters = text[words]
+    text[words] = _SPACE
+    try:
+        values = np.fromstring(text.tobytes(), dtype=np.float64, sep=' ')
+    except ValueError:
+        return None
+    if len(values) != len(words):
+        return None
+
+    # Each parsed line's first word is its command; number the rows from those
+    is_command = np.ones(len(words), dtype=bool)
+    is_command[1:] = text[words[1:] - 1] == _NEWLINE
+    rows = np.flatnonzero(parsed[wanted])[np.cumsum(is_command) - 1]
+    column = _COLUMN_OF[letters]
+    keep = ~is_command & (column >= 0)
+    table[rows[keep], column[keep]] = values[keep]
+    return codes, table
+
+def _parse_lines(data: bytes):
+    """Line-by-line fallback for blocks _parse_block cannot handle."""
+    codes, rows = [], []
+    for line in data.split(b'\n'):
+        words = _WORD_RE.findall(line.split(b';', 1)[0])
+        if not words or words[0][0] not in (b'G', b'M') or b'.' in words[0][1]:
+            continue
+        code = int(words[0][1]) + (1000 if words[0][0] == b'M' else 0)
+        if code not in _COMMANDS:
+            continue
+        row = [np.nan] * len(_COLUMNS)
+        if code != _HOME:
+            for letter, value in words[1:]:
+                column = _COLUMN_OF[letter[0]]
+                if column >= 0:
+                    row[column] = float(value)
+        codes.append(code)
+        rows.append(row)
+    return np.array(codes, dtype=np.int64), np.array(rows, dtype=np.float64).reshape(-1, len(_COLUMNS))
+
+def simulate_gcode(stream) -> dict:
+    """
+    Estimate print time and filament length by simulating every move.
+
+    Args:
+        stream: Binary file-like object positioned at the start of the G-code
+
+    Returns:
+        Dict with print_time_hours, filament_mm and moves
+    """
+    simulator = _Simulator()
+    tail = b''
+    while True:
+        chunk = stream.read(CHUNK_BYTES)
+        data = tail + chunk
+        if chunk:
+            cut = data.rfind(b'\n') + 1
+            data, tail = data[:cut], data[cut:]
+        elif data and not data.endswith(b'\n'):
+            data += b'\n'
+        if data:
+            parsed = _parse_block(data)
+            if parsed is None:
+                parsed = _parse_lines(data)
+            simulator.run(*parsed)
+        if not chunk:
+            break
+    return {'print_time_hours': float(simulator.seconds) / 3600,
+            'filament_mm': max(float(simulator.extruded_mm), 0.0),
+            'moves': simulator.moves}
+
+def analyze_gcode(stream, size: int = None, density_g_cm3: float = MATERIAL_DENSITY['PLA']) -> dict:
+    """
+    Work out print time and filament use for a G-code stream.
+
+    The slicer's own estimates are used when the file has them; otherwise the
+    whole file is simulated.
+
+    Args:
+        stream: Seekable binary file-like object
+        size: Stream length in bytes, if known
+        density_g_cm3: Filament density used to convert length to weight when the slicer gives no weight
+
+    Returns:
+        Dict with source ('slicer' or 'simulated'), application, print_time_hours,
+        filament_mm and filament_g (None where unknown)
+    """
+    comments = {}
+    head = stream.read(HEADER_BYTES)
+    _read_comments(head, comments)
+    m73 = _M73_RE.search(head)
+    if m73:
+        comments['m73_minutes'] = int(m73.group(1))
+    if size and size > HEADER_BYTES:
+        stream.seek(max(size - FOOTER_BYTES, HEADER_BYTES))
+        footer = stream.read()
+        footer = footer[footer.find(b'\n') + 1:]      # Skip the partial first line
+        _read_comments(footer, comments)
+
+    result = _slicer_estimates(comments, density_g_cm3)
+    if result['print_time_hours'] and result['filament_mm'] is not None:
+        return result
+
+    stream.seek(0)
+    simulated = simulate_gcode(stream)
+    result['source'] = 'simulated'
+    result['print_time_hours'] = simulated['print_time_hours']
+    result['filament_mm'] = simulated['filament_mm']
+    result['filament_g'] = filament_grams(simulated['filament_mm'], density_g_cm3)
+    return result
+
+def analyze_sliced_file(file_path: str, density_g_cm3: float = MATERIAL_DENSITY['PLA']) -> dict:
+    """
+    Analyze a sliced file: G-code, a .gcode.3mf with G-code plates, or a slicer 3MF project.
+
+    Runs in a worker process.
+
+    Returns:
+        Dict as from analyze_gcode, values rounded for storage
+
+    Raises:
+        ValueError: If a 3MF holds neither G-code nor slicer estimates
+        OSError: If the file cannot be read
+    """
+    if file_path.lower().endswith('.3mf'):
+        try:
+            with zipfile.ZipFile(file_path) as package:
+                plates = sorted(info for info in package.infolist() if _GCODE_PART_RE.match(info.filename))
+                if plates:
+                    # Estimates are per plate; report the first, as read_3mf_metadata does
+                    with package.open(plates[0]) as stream:
+                        result = analyze_gcode(stream, plates[0].file_size, density_g_cm3)
+                    return _rounded(result)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Not a valid 3MF file: {e}")
+        metadata = read_3mf_metadata(file_path)
+        if not metadata.get('print_time_hours') and not metadata.get('filament_g'):
+            raise ValueError("3MF file has no G-code or slicer estimates")
+        filament_mm = metadata['filament_m'] * 1000 if metadata.get('filament_m') else None
+        filament_g = metadata.get('filament_g')
+        if filament_g is None and filament_mm:
+            filament_g = filament_grams(filament_mm, density_g_cm3)
+        return _rounded({'source': 'slicer', 'application': metadata.get('application'),
+                         'print_time_hours': metadata.get('print_time_hours'),
+                         'filament_mm': filament_mm, 'filament_g': filament_g})
+
+    with open(file_path, 'rb') as stream:
+        return _rounded(analyze_gcode(stream, os.path.getsize(file_path), density_g_cm3))
+
+def _rounded(result: dict) -> dict:
+    for key, digits in (('print_time_hours', 3), ('filament_mm', 1), ('filament_g', 2)):
+        if result.get(key) is not None:
+            result[key] = round(result[key], digits)
+    return result
+
+def _file_stamp(path: str) -> dict:
+    """Name, size and mtime of a sliced file (from the storage index when it has the file)."""
+    found = storage_index.lookup_file(path)
+    if found is storage_index.ABSENT:
+        raise FileNotFoundError(path)
+    if found is None:
+        info = os.stat(path)
+        found = (info.st_size, info.st_mtime)
+    return {'file': os.path.basename(path), 'size': found[0], 'mtime': found[1]}
+
+def is_current(job, sliced_path: str) -> bool:
+    """Whether job.sliced_analysis was made from the sliced file as it is now."""
+    analysis = job.sliced_analysis or {}
+    try:
+        stamp = _file_stamp(sliced_path)
+    except OSError:
+        return False
+    return all(analysis.get(key) == value for key, value in stamp.items())
+
+def analyzed_sliced_path(job):
+    """Path of the sliced file job.sliced_analysis was made from (saved next to job.file_path), or None."""
+    name = (job.sliced_analysis or {}).get('file')
+    return os.path.join(os.path.dirname(job.file_path), name) if name else None
+
+def queue_sliced_analysis(job, sliced_path: str):
+    """
+    Queue a background analysis of a job's sliced file; the result is saved to job.sliced_analysis.
+
+    Nothing is queued if the stored analysis is for the same file, size and
+    modification time.
+
+    Returns:
+        Future for the analysis, or None if nothing was queued
+    """
+    if is_current(job, sliced_path):
+        return None
+    stamp = _file_stamp(sliced_path)
+
+    density = MATERIAL_DENSITY.get(job.material or get_default_material(job.printer), MATERIAL_DENSITY['PLA'])
+    return _tasks.submit(job.id, analyze_sliced_file, sliced_path, density,
+                         on_done=partial(_on_analyzed, current_app._get_current_object(), job.id, stamp))
+
+def _on_analyzed(app, job_id, stamp, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.warning(f"Sliced file analysis failed for job {job_id}: {error}")
+        result = {'error': str(error)}
+    else:
+        result = future.result()
+
+    with app.app_context():
+        try:
+            job = db.session.get(Job, job_id)
+            if job is not None:
+                job.sliced_analysis = {**stamp, **result}
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not save sliced file analysis for job {job_id}: {str(e)}")
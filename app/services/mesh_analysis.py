@@ -0,0 +1,142 @@
+# app/services/mesh_analysis.py
+"""
+Geometry measurements for uploaded models (volume, surface area, bounding box).
+
+STL is measured block by block as mesh_loader.iter_stl_triangles reads it
+(binary memory-mapped, ASCII streamed in chunks), so memory stays bounded
+regardless of file size. Other formats are loaded with mesh_loader and
+measured the same way.
+
+All values are in model units, which for STL/3MF/OBJ from slicers is millimetres.
+"""
+import os
+from dataclasses import dataclass
+import numpy as np
+from flask import current_app
+from app.services.mesh_loader import BLOCK_TRIANGLES, iter_stl_triangles, load_mesh
+from app.services.threemf_reader import read_3mf_metadata
+from app.services.fit_check import FootprintHull
+
+@dataclass
+class MeshStats:
+    """Measurements of a triangle mesh."""
+    triangle_count: int
+    volume_mm3: float       # Absolute enclosed volume (meaningful for closed meshes)
+    surface_area_mm2: float
+    bbox_min: tuple         # (x, y, z)
+    bbox_max: tuple         # (x, y, z)
+    footprint: FootprintHull = None  # Outline for the build-volume fit check (see fit_check)
+
+    @property
+    def dimensions_mm(self) -> tuple:
+        """Bounding box size as (x, y, z)."""
+        return tuple(hi - lo for lo, hi in zip(self.bbox_min, self.bbox_max))
+
+class _Accumulator:
+    """Running totals over blocks of triangles."""
+
+    def __init__(self):
+        self.count = 0
+        self.signed_volume6 = 0.0
+        self.double_area = 0.0
+        self.footprint = FootprintHull()
+
+    def add(self, triangles: np.ndarray):
+        if len(triangles) == 0:
+            return
+        # One contiguous float64 column per vertex coordinate; np.cross and
+        # reductions over the short axes are much slower than plain ufuncs
+        coords = np.ascontiguousarray(triangles.reshape(-1, 9).T, dtype=np.float64)
+        x0, y0, z0, x1, y1, z1, x2, y2, z2 = coords
+
+        # Signed volume of the tetrahedron each face forms with the origin (x6)
+        self.signed_volume6 += float(np.sum(x0 * (y1 * z2 - z1 * y2) +
+                                            y0 * (z1 * x2 - x1 * z2) +
+                                            z0 * (x1 * y2 - y1 * x2)))
+
+        ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+        vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+        cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+        self.double_area += float(np.sum(np.sqrt(cx * cx + cy * cy + cz * cz)))
+
+        # Every vertex as an (x, y, z) row triple; the footprint also tracks the bounding box
+        self.footprint.add(coords.reshape(3, 3, -1).swapaxes(0, 1).reshape(3, -1))
+        self.count += len(triangles)
+
+    def result(self) -> MeshStats:
+        if self.count == 0:
+            return MeshStats(0, 0.0, 0.0, (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+        return MeshStats(
+            triangle_count=self.count,
+            volume_mm3=abs(self.signed_volume6) / 6.0,
+            surface_area_mm2=self.double_area / 2.0,
+            bbox_min=tuple(float(v) for v in self.footprint.low),
+            bbox_max=tuple(float(v) for v in self.footprint.high),
+            footprint=self.footprint,
+        )
+
+def measure_triangles(triangles: np.ndarray) -> MeshStats:
+    """Measure an (n, 3, 3) triangle array (see mesh_loader)."""
+    totals = _Accumulator()
+    for start in range(0, len(triangles), BLOCK_TRIANGLES):
+        totals.add(triangles[start:start + BLOCK_TRIANGLES])
+    return totals.result()
+
+def analyze_stl(file_path: str) -> MeshStats:
+    """
+    Measure a binary or ASCII STL file block by block (see mesh_loader.iter_stl_triangles).
+
+    Raises:
+        ValueError: If the file is not a valid STL
+        OSError: If the file cannot be read
+    """
+    totals = _Accumulator()
+    for block in iter_stl_triangles(file_path):
+        totals.add(block)
+    return totals.result()
+
+def analyze_model(file_path: str, file_type: str = None) -> MeshStats:
+    """
+    Measure a model file of any supported format.
+
+    Args:
+        file_path: Path to the model
+        file_type: Extension to parse as (defaults to file_path's extension)
+
+    Raises:
+        ValueError: If the format is unsupported or the file is malformed
+        OSError: If the file cannot be read
+    """
+    ext = (file_type or os.path.splitext(file_path)[1]).lower().lstrip('.')
+    if ext == 'stl':
+        return analyze_stl(file_path)
+    return measure_triangles(load_mesh(file_path, ext))
+
+def analyze_job_file(job) -> MeshStats:
+    """
+    Measure a job's model and store the results on the job (caller commits).
+    For 3MF uploads any slicer estimates embedded in the package are stored too.
+
+    Analysis problems are logged and leave the fields empty rather than
+    failing the caller.
+
+    Returns:
+        MeshStats, or None if the file could not be analyzed
+    """
+    try:
+        stats = analyze_model(job.file_path)
+    except (ValueError, OSError) as e:
+        current_app.logger.warning(f"Could not analyze model for job {job.id}: {str(e)}")
+        return None
+
+    job.triangle_count = stats.triangle_count
+    job.volume_mm3 = stats.volume_mm3
+    job.surface_area_mm2 = stats.surface_area_mm2
+    job.size_x_mm, job.size_y_mm, job.size_z_mm = stats.dimensions_mm
+
+    if job.file_path.lower().endswith('.3mf'):
+        try:
+            job.slicer_metadata = read_3mf_metadata(job.file_path) or None
+        except (ValueError, OSError) as e:
+            current_app.logger.warning(f"Could not read 3MF metadata for job {job.id}: {str(e)}")
+    return stats
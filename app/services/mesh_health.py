@@ -0,0 +1,338 @@
+# app/services/mesh_health.py
+"""
+Mesh health checks and automatic repair for uploaded models.
+
+Checks run in the shared worker pool after submission, so large meshes never
+hold up a request. The mesh is welded into an indexed form (identical vertex
+coordinates become one vertex) and every check is done with sorted NumPy
+keys rather than per-triangle Python:
+
+- degenerate triangles: two corners on the same vertex, or zero area
+- duplicate triangles: the same three vertices as another triangle
+- boundary edges (used by one triangle) and non-manifold edges (used by
+  three or more); a mesh with neither is watertight
+- inconsistent winding: a shared edge traversed in the same direction by
+  both triangles, i.e. one of them is flipped
+- inverted: a closed mesh whose enclosed volume is negative (normals inward)
+
+Repair removes degenerate and duplicate triangles, re-orients flipped
+triangles consistently with their neighbours, and turns inverted shells the
+right way out. Holes and non-manifold edges need a human and are only
+reported. A repaired copy is cached as storage/repaired/<file_hash>.stl.
+"""
+import logging
+import os
+from functools import partial
+import numpy as np
+from flask import current_app
+from app.extensions import db
+from app.models.job import Job
+from app.services.file_service import FileService
+from app.services.mesh_loader import STL_HEADER_SIZE, STL_RECORD_DTYPE, load_mesh
+from app.services.worker_pool import InFlightTasks
+
+logger = logging.getLogger(__name__)
+
+DEGENERATE_AREA_RATIO = 1e-12  # Twice-area below this fraction of the squared model size counts as zero
+
+_tasks = InFlightTasks()  # Keyed by file hash (or job id for jobs without one)
+
+def get_repaired_dir() -> str:
+    """Get the repaired model cache directory (storage/repaired)."""
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    if not storage_root:
+        raise ValueError("APP_STORAGE_ROOT not configured")
+    return os.path.join(storage_root, 'repaired')
+
+def repaired_path(file_hash: str) -> str:
+    """Get the cached repaired model path for a file hash."""
+    return os.path.join(get_repaired_dir(), f"{file_hash}.stl")
+
+def weld_vertices(triangles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert an (n, 3, 3) triangle array to indexed form, merging corners with identical coordinates.
+
+    Returns:
+        Tuple of (vertices float32 (v, 3), faces int64 (n, 3))
+    """
+    corners = np.ascontiguousarray(triangles.reshape(-1, 3), dtype=np.float32) + np.float32(0)  # -0.0 -> 0.0
+    if len(corners) == 0:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int64)
+
+    # Sort the raw bits: x and y packed into one 64-bit key, z as the second key
+    bits = corners.view(np.uint32)
+    xy = (bits[:, 0].astype(np.uint64) << np.uint64(32)) | bits[:, 1]
+    order = np.lexsort((bits[:, 2], xy))
+    xy, z = xy[order], bits[order, 2]
+    first = np.empty(len(order), dtype=bool)
+    first[0] = True
+    first[1:] = (xy[1:] != xy[:-1]) | (z[1:] != z[:-1])
+
+    index = np.empty(len(order), dtype=np.int64)
+    index[order] = np.cumsum(first) - 1
+    return corners[order[first]], index.reshape(-1, 3)
+
+def _group_sizes(sorted_keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start offsets and lengths of the runs of equal values in a sorted array."""
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    return starts, np.diff(np.append(starts, len(sorted_keys)))
+
+def _signed_volume6(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Six times the signed volume each face forms with the origin."""
+    a, b, c = (vertices[faces[:, i]].astype(np.float64) for i in range(3))
+    return np.einsum('ij,ij->i', a, np.cross(b, c))
+
+def _analyze(vertices: np.ndarray, faces: np.ndarray) -> tuple[dict, tuple]:
+    """Run every check; returns the report plus the intermediate arrays repair needs."""
+    vertex_count = max(len(vertices), 1)
+
+    # Degenerate: a repeated corner, or (near) zero area
+    a, b, c = (vertices[faces[:, i]].astype(np.float64) for i in range(3))
+    double_area = np.linalg.norm(np.cross(b - a, c - a), axis=1)
+    extent = float(np.ptp(vertices, axis=0).max()) if len(vertices) else 0.0
+    degenerate = ((faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 2] == faces[:, 0]) |
+                  (double_area <= DEGENERATE_AREA_RATIO * extent * extent))
+
+    # Duplicate: same vertex set as an earlier (non-degenerate) face, in any order
+    candidates = np.flatnonzero(~degenerate)
+    corner_sets = np.sort(faces[candidates], axis=1)
+    order = np.lexsort(corner_sets.T[::-1])
+    ordered = corner_sets[order]
+    repeat = np.zeros(len(order), dtype=bool)
+    repeat[1:] = (ordered[1:] == ordered[:-1]).all(axis=1)
+    duplicate = np.zeros(len(faces), dtype=bool)
+    duplicate[candidates[order[repeat]]] = True
+
+    # Edge topology of the cleaned faces: three directed edges per face
+    kept = np.flatnonzero(~(degenerate | duplicate))
+    clean = faces[kept]
+    start = clean.ravel()
+    end = clean[:, [1, 2, 0]].ravel()
+    undirected = np.minimum(start, end) * vertex_count + np.maximum(start, end)
+    edge_order = np.argsort(undirected, kind='stable')
+    edge_starts, edge_uses = _group_sizes(undirected[edge_order])
+
+    # Two faces sharing an edge should traverse it in opposite directions
+    forward = (start < end)[edge_order]
+    pairs = edge_starts[edge_uses == 2]
+    same_direction = forward[pairs] == forward[pairs + 1]
+
+    volume6 = float(_signed_volume6(vertices, clean).sum()) if len(clean) else 0.0
+    boundary = int(np.count_nonzero(edge_uses == 1))
+    non_manifold = int(np.count_nonzero(edge_uses > 2))
+    inconsistent = int(np.count_nonzero(same_direction))
+    watertight = len(clean) > 0 and boundary == 0 and non_manifold == 0
+
+    report = {
+        'triangles': int(len(faces)),
+        'vertices': int(len(vertices)),
+        'degenerate_triangles': int(np.count_nonzero(degenerate)),
+        'duplicate_triangles': int(np.count_nonzero(duplicate)),
+        'boundary_edges': boundary,
+        'non_manifold_edges': non_manifold,
+        'inconsistent_edges': inconsistent,
+        'watertight': watertight,
+        'inverted': watertight and inconsistent == 0 and volume6 < 0,
+    }
+    adjacency = (kept, edge_order[pairs] // 3, edge_order[pairs + 1] // 3, same_direction)
+    return report, adjacency
+
+def check_mesh(triangles: np.ndarray) -> dict:
+    """
+    Check an (n, 3, 3) triangle array (see mesh_loader) for printability problems.
+
+    Returns:
+        Report dict (see _analyze for the keys) with 'healthy' set when nothing is wrong
+    """
+    vertices, faces = weld_vertices(triangles)
+    report, _ = _analyze(vertices, faces)
+    report['healthy'] = _is_healthy(report)
+    return report
+
+def _is_healthy(report: dict) -> bool:
+    return (report['watertight'] and not report['inverted'] and report['inconsistent_edges'] == 0
+            and report['degenerate_triangles'] == 0 and report['duplicate_triangles'] == 0)
+
+def _orient_faces(face_count: int, first: np.ndarray, second: np.ndarray, same_direction: np.ndarray) -> np.ndarray:
+    """
+    Decide which faces to flip so neighbours agree, walking each connected patch from a seed face.
+
+    Returns:
+        Boolean array, True for faces to flip
+    """
+    # Adjacency in CSR form; each pair is listed from both sides
+    source = np.concatenate([first, second])
+    target = np.concatenate([second, first])
+    relation = np.concatenate([same_direction, same_direction])
+    order = np.argsort(source, kind='stable')
+    offsets = np.searchsorted(source[order], np.arange(face_count + 1))
+    targets = target[order].tolist()
+    relations = relation[order].tolist()
+    offsets = offsets.tolist()
+
+    flip = [False] * face_count
+    patch = [-1] * face_count
+    patches = 0
+    for seed in range(face_count):
+        if patch[seed] >= 0:
+            continue
+        patch[seed] = patches
+        stack = [seed]
+        while stack:
+            face = stack.pop()
+            for k in range(offsets[face], offsets[face + 1]):
+                neighbour = targets[k]
+                if patch[neighbour] < 0:
+                    patch[neighbour] = patches
+                    # Same direction across the edge means the neighbour is wound the other way
+                    flip[neighbour] = flip[face] != relations[k]
+                    stack.append(neighbour)
+        patches += 1
+
+    # The walk only fixes orientation relative to the seed face; flip whichever
+    # side of each patch is smaller, on the assumption most faces were right
+    flip = np.array(flip, dtype=bool)
+    patch = np.array(patch, dtype=np.int64)
+    flipped = np.bincount(patch, weights=flip, minlength=patches)
+    sizes = np.bincount(patch, minlength=patches)
+    return flip ^ (flipped > sizes / 2)[patch]
+
+def repair_mesh(triangles: np.ndarray) -> tuple[np.ndarray, dict, list]:
+    """
+    Check a mesh and repair what can be repaired automatically.
+
+    Returns:
+        Tuple of (repaired (m, 3, 3) triangles, report for the original mesh,
+        list of repairs made; empty if the mesh was left unchanged)
+    """
+    vertices, faces = weld_vertices(triangles)
+    report, (kept, first, second, same_direction) = _analyze(vertices, faces)
+    report['healthy'] = _is_healthy(report)
+    repairs = []
+
+    if report['degenerate_triangles']:
+        repairs.append(f"removed {report['degenerate_triangles']} degenerate triangles")
+    if report['duplicate_triangles']:
+        repairs.append(f"removed {report['duplicate_triangles']} duplicate triangles")
+    clean = faces[kept]
+
+    if report['inconsistent_edges']:
+        flip = _orient_faces(len(clean), first, second, same_direction)
+        clean[flip] = clean[flip][:, ::-1]
+        repairs.append(f"re-oriented {int(np.count_nonzero(flip))} flipped triangles")
+
+    # A closed mesh facing inwards: the orientation above is only relative to
+    # neighbours, so also check the sign of the enclosed volume
+    if report['watertight'] and _signed_volume6(vertices, clean).sum() < 0:
+        clean = clean[:, ::-1]
+        repairs.append("turned inverted normals outward")
+
+    return vertices[clean], report, repairs
+
+def write_binary_stl(path: str, triangles: np.ndarray):
+    """Write an (n, 3, 3) triangle array as a binary STL (normals computed), via a temp file."""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    records = np.zeros(len(triangles), dtype=STL_RECORD_DTYPE)
+    records['vertices'] = triangles
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    records['normal'] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(b'Repaired by 3DPrintSystem'.ljust(STL_HEADER_SIZE, b' '))
+        f.write(np.uint32(len(records)).tobytes())
+        f.write(records.tobytes())
+    os.replace(temp_path, path)
+
+def run_health_check(source_path: str, file_type: str = None, repaired_dest: str = None) -> dict:
+    """
+    Check a model file and optionally write a repaired copy. Runs in a worker process.
+
+    Args:
+        source_path: Path to the STL/OBJ/3MF file
+        file_type: Model extension, e.g. ".stl" (needed for extensionless blobs)
+        repaired_dest: Where to write the repaired STL if any repair was made (None: don't repair)
+
+    Returns:
+        Report dict; 'repairs' lists what was fixed and 'repaired' says whether a copy was written
+
+    Raises:
+        ValueError: If the model format is unsupported or malformed
+        OSError: If the model cannot be read or the copy written
+    """
+    triangles = load_mesh(source_path, file_type)
+    if repaired_dest is None:
+        report = check_mesh(triangles)
+        report['repairs'] = []
+        report['repaired'] = False
+        return report
+
+    repaired, report, repairs = repair_mesh(triangles)
+    report['repairs'] = repairs
+    report['repaired'] = bool(repairs)
+    if repairs:
+        os.makedirs(os.path.dirname(repaired_dest), exist_ok=True)
+        write_binary_stl(repaired_dest, repaired)
+    return report
+
+def reuse_health_report(job) -> bool:
+    """
+    Copy the health report of another job with the same file content (caller commits).
+
+    Returns:
+        Whether a report was found
+    """
+    if job.mesh_health is not None or not job.file_hash:
+        return job.mesh_health is not None
+    existing = (db.session.query(Job.mesh_health)
+                .filter(Job.file_hash == job.file_hash, Job.mesh_health.isnot(None))
+                .first())
+    if existing:
+        job.mesh_health = existing[0]
+    return existing is not None
+
+def queue_health_check(job):
+    """
+    Queue a background health check for a job's model; the report is saved to job.mesh_health.
+
+    Writes nothing itself, so it is safe on a page view. When the check
+    finishes the report is also saved to other unchecked jobs with the same
+    file_hash. Jobs from before the blob store (no file_hash) are checked
+    from their model file, without a repaired copy (those are cached by hash).
+
+    Returns:
+        Future for the check, or None if nothing was queued
+    """
+    if job.mesh_health is not None or not job.file_path:
+        return None
+
+    source, file_type = FileService.model_source(job)
+
+    dest = repaired_path(job.file_hash) if job.file_hash and current_app.config.get('MESH_REPAIR_ENABLED', True) else None
+    return _tasks.submit(job.file_hash or job.id, run_health_check, source, file_type, dest,
+                         on_done=partial(_on_checked, current_app._get_current_object(), job.id, job.file_hash))
+
+def _on_checked(app, job_id, file_hash, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.warning(f"Mesh health check failed for job {job_id}: {error}")
+        report = {'error': str(error)}
+    else:
+        report = future.result()
+
+    with app.app_context():
+        try:
+            job = db.session.get(Job, job_id)
+            if job is not None:
+                job.mesh_health = report
+            if file_hash and 'error' not in report:
+                # Jobs with the same upload submitted while this check ran
+                for other in Job.query.filter(Job.file_hash == file_hash, Job.mesh_health.is_(None)):
+                    other.mesh_health = report
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not save mesh health report for job {job_id}: {str(e)}")
@@ -0,0 +1,169 @@
+# app/services/mesh_loader.py
+"""
+Minimal readers for the model formats students can upload (STL, OBJ, 3MF).
+
+Every loader returns the mesh as a float32 array of shape (n_triangles, 3, 3):
+one row per triangle, three vertices, xyz. Polygons are fan-triangulated.
+Only NumPy and the standard library are required, so these run in the worker
+pool on a headless server.
+
+STL is the one format with a block reader (iter_stl_triangles): binary files
+are memory-mapped and ASCII files streamed in chunks, so mesh_analysis can
+measure a large upload in bounded memory and load_stl never holds the raw
+file alongside the parsed triangles.
+"""
+import mmap
+import os
+import warnings
+import numpy as np
+
+STL_HEADER_SIZE = 80
+STL_RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])  # 50 bytes per triangle
+
+BLOCK_TRIANGLES = 1 << 18   # Triangles per block from iter_stl_triangles
+ASCII_CHUNK_BYTES = 1 << 22 # Bytes of ASCII STL read at a time
+
+def load_mesh(file_path: str, file_type: str = None) -> np.ndarray:
+    """
+    Load a model file as an array of triangles.
+
+    Args:
+        file_path: Path to an .stl, .obj or .3mf file
+        file_type: Extension to parse the file as (e.g. ".stl"); defaults to
+            file_path's own extension (blobs in the blob store have none)
+
+    Returns:
+        float32 array of shape (n, 3, 3)
+
+    Raises:
+        ValueError: If the format is unsupported or the file is malformed
+        OSError: If the file cannot be read
+    """
+    ext = (file_type or os.path.splitext(file_path)[1]).lower()
+    if ext and not ext.startswith('.'):
+        ext = f'.{ext}'
+    if ext == '.stl':
+        return load_stl(file_path)
+    if ext == '.obj':
+        return load_obj(file_path)
+    if ext == '.3mf':
+        return load_3mf(file_path)
+    raise ValueError(f"Unsupported model format: {ext or file_path}")
+
+def load_stl(file_path: str) -> np.ndarray:
+    """Load a binary or ASCII STL file (read in blocks; see iter_stl_triangles)."""
+    with open(file_path, 'rb') as f:
+        count = _binary_stl_count(f, os.path.getsize(file_path))
+        if count is not None:
+            # Filled block by block, so the file is never held in memory next to the result
+            triangles = np.empty((count, 3, 3), dtype=np.float32)
+            if count:
+                start = 0
+                for block in _iter_binary_stl(f, count, BLOCK_TRIANGLES):
+                    triangles[start:start + len(block)] = block
+                    start += len(block)
+            return triangles
+
+    blocks = [block.astype(np.float32) for block in iter_stl_triangles(file_path)]
+    if not blocks:
+        return np.empty((0, 3, 3), dtype=np.float32)
+    return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+def iter_stl_triangles(file_path: str, block_triangles: int = BLOCK_TRIANGLES):
+    """
+    Read a binary or ASCII STL file as blocks of triangles.
+
+    Args:
+        file_path: Path to the STL file
+        block_triangles: Triangles per block for binary files (ASCII blocks
+            follow ASCII_CHUNK_BYTES instead)
+
+    Yields:
+        Arrays of shape (k, 3, 3): float32 for binary files, float64 for ASCII
+
+    Raises:
+        ValueError: If the file is not a valid STL
+        OSError: If the file cannot be read
+    """
+    with open(file_path, 'rb') as f:
+        count = _binary_stl_count(f, os.path.getsize(file_path))
+        if count is not None:
+            if count:
+                yield from _iter_binary_stl(f, count, block_triangles)
+            return
+        f.seek(0)
+        if f.read(512).lstrip()[:5].lower() != b'solid':
+            raise ValueError("Not a valid STL file")
+        f.seek(0)
+        yield from _iter_ascii_stl(f)
+
+def _binary_stl_count(f, size: int):
+    """Triangle count of a binary STL, or None if the file isn't one."""
+    if size < STL_HEADER_SIZE + 4:
+        return None
+    f.seek(STL_HEADER_SIZE)
+    count = int.from_bytes(f.read(4), 'little')
+    # Binary STLs may also start with "solid", so trust the size check rather than the header
+    return count if size == STL_HEADER_SIZE + 4 + count * STL_RECORD_DTYPE.itemsize else None
+
+def _iter_binary_stl(f, count: int, block_triangles: int):
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        records = np.frombuffer(mapped, dtype=STL_RECORD_DTYPE, count=count, offset=STL_HEADER_SIZE + 4)
+        try:
+            for start in range(0, count, block_triangles):
+                # A copy, so no view of the map outlives it
+                yield np.array(records['vertices'][start:start + block_triangles])
+        finally:
+            # Drop the view before the map is closed (mmap refuses to close with exports)
+            del records
+
+def _parse_ascii_vertices(data: bytes) -> np.ndarray:
+    """Extract the coordinates of every "vertex x y z" line in a block of complete lines."""
+    # Splitting on the keyword and cutting each piece at its newline is several
+    # times faster than a regex over the block
+    lines = [piece.partition(b'\n')[0] for piece in data.split(b'vertex')[1:] if piece[:1].isspace()]
+    if not lines:
+        return np.empty(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)  # Raised on malformed numbers; checked below
+        values = np.fromstring(b' '.join(lines), dtype=np.float64, sep=' ')
+    if len(values) != 3 * len(lines):
+        raise ValueError("ASCII STL vertex does not have three numeric coordinates")
+    return values
+
+def _iter_ascii_stl(f):
+    pending = np.empty(0)  # Coordinates left over from a facet split across chunks
+    tail = b''
+    while True:
+        chunk = f.read(ASCII_CHUNK_BYTES)
+        data = tail + chunk
+        if chunk:
+            # Only parse complete lines; keep the partial last line for the next read
+            cut = data.rfind(b'\n') + 1
+            data, tail = data[:cut], data[cut:]
+        values = _parse_ascii_vertices(data)
+        if len(values):
+            values = np.concatenate([pending, values])
+            usable = len(values) - len(values) % 9
+            if usable:
+                yield values[:usable].reshape(-1, 3, 3)
+            pending = values[usable:]
+        if not chunk:
+            break
+    if len(pending):
+        raise ValueError("ASCII STL has an incomplete facet")
+
+def load_obj(file_path: str) -> np.ndarray:
+    """Load the geometry of a Wavefront OBJ file (chunked; see obj_reader)."""
+    from app.services.obj_reader import read_obj
+    vertices, triangles = read_obj(file_path)
+    return vertices[triangles]
+
+def load_3mf(file_path: str) -> np.ndarray:
+    """Load the build items of a 3MF package (streamed; see threemf_reader)."""
+    from app.services.threemf_reader import read_3mf_mesh
+    return read_3mf_mesh(file_path)
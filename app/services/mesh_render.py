@@ -0,0 +1,181 @@
+# app/services/mesh_render.py
+"""
+Headless CPU renderer for model thumbnails.
+
+A small software rasterizer written with vectorized NumPy: triangles are
+projected orthographically from a fixed three-quarter view, rasterized with
+edge functions, resolved with a z-buffer and Lambert (flat per-face) shaded.
+It needs no OpenGL context, display or GPU, so it runs on the server's worker
+pool. Output is an RGBA image with a transparent background, encoded as PNG
+with zlib.
+"""
+import struct
+import zlib
+import numpy as np
+
+BASE_COLOR = np.array([37, 99, 235], dtype=np.float32)  # Dashboard blue (#2563eb)
+AMBIENT = 0.3
+DIFFUSE = 0.7
+MARGIN = 0.06           # Fraction of the image left empty around the model
+FRAGMENT_BUDGET = 1 << 20  # Candidate pixels evaluated per vectorized batch (bounds memory use)
+
+def _view_basis():
+    """Camera basis (right, up, toward-eye) for a front-right-above view of a Z-up model."""
+    eye = np.array([1.0, -1.3, 1.0])
+    eye /= np.linalg.norm(eye)
+    right = np.cross(-eye, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, -eye)
+    light = eye + 0.5 * up - 0.25 * right
+    light /= np.linalg.norm(light)
+    return right, up, eye, light
+
+def render_mesh(triangles: np.ndarray, size: int = 300) -> np.ndarray:
+    """
+    Render triangles to an RGBA image.
+
+    Args:
+        triangles: float array of shape (n, 3, 3) (see mesh_loader)
+        size: Width and height in pixels
+
+    Returns:
+        uint8 array of shape (size, size, 4); background is transparent
+    """
+    image = np.zeros((size * size, 4), dtype=np.uint8)
+    vertices = np.asarray(triangles, dtype=np.float32).reshape(-1, 3)
+    right, up, eye, light = _view_basis()
+
+    # Orthographic projection of every vertex in one matrix product:
+    # columns are screen x, screen y (up) and depth (toward the eye)
+    projected = (vertices @ np.stack([right, up, eye], axis=1).astype(np.float32)).reshape(-1, 3, 3)
+    finite = np.isfinite(projected).all(axis=(1, 2))
+    if not finite.all():
+        projected = projected[finite]
+    if len(projected) == 0:
+        return image.reshape(size, size, 4)
+
+    # Lambert shading from geometric face normals, computed in view space (the
+    # basis is orthonormal, so the light is too); two-sided because STL winding
+    # from student tools is often inconsistent
+    e1 = projected[:, 1] - projected[:, 0]
+    e2 = projected[:, 2] - projected[:, 0]
+    nx = e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1]
+    ny = e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2]
+    nz = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    view_light = np.array([light @ right, light @ up, light @ eye], dtype=np.float32)
+    lengths = np.sqrt(nx * nx + ny * ny + nz * nz)
+    np.maximum(lengths, np.float32(1e-30), out=lengths)
+    intensity = AMBIENT + DIFFUSE * np.abs(nx * view_light[0] + ny * view_light[1] + nz * view_light[2]) / lengths
+    colors = np.clip(BASE_COLOR * intensity[:, None], 0, 255).astype(np.uint8)
+
+    # Scale to fit the image with a margin
+    sx = projected[:, :, 0]
+    sy = projected[:, :, 1]
+    depth = projected[:, :, 2]
+    min_x, max_x = float(sx.min()), float(sx.max())
+    min_y, max_y = float(sy.min()), float(sy.max())
+    extent = max(max_x - min_x, max_y - min_y) or 1.0
+    scale = np.float32(size * (1 - 2 * MARGIN) / extent)
+    px = (sx - np.float32((min_x + max_x) / 2)) * scale + np.float32(size / 2)
+    py = np.float32(size / 2) - (sy - np.float32((min_y + max_y) / 2)) * scale  # Image rows grow downward
+
+    fragment_index, fragment_depth, fragment_face = _rasterize(px, py, depth, size)
+    if len(fragment_index) == 0:
+        return image.reshape(size, size, 4)
+
+    # Z-buffer resolve: for each pixel keep the fragment nearest the eye
+    order = np.lexsort((-fragment_depth, fragment_index))
+    fragment_index = fragment_index[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = fragment_index[1:] != fragment_index[:-1]
+    pixels = fragment_index[first]
+    image[pixels, :3] = colors[fragment_face[order][first]]
+    image[pixels, 3] = 255
+    return image.reshape(size, size, 4)
+
+def _rasterize(px, py, depth, size):
+    """
+    Find every pixel center covered by each projected triangle.
+
+    Triangles are bucketed by bounding-box size (powers of two) so that each
+    bucket is rasterized with one vectorized pass per batch over a fixed grid
+    of candidate pixels; tiny triangles (the common case for dense meshes) cost
+    only a few candidates each.
+
+    Returns:
+        (flat pixel index, interpolated depth, triangle index) per covered fragment
+    """
+    # Work on contiguous per-vertex columns; reductions along the short axis
+    # of an (n, 3) array are several times slower
+    ax, bx, cx = (np.ascontiguousarray(px[:, i]) for i in range(3))
+    ay, by, cy = (np.ascontiguousarray(py[:, i]) for i in range(3))
+    az, bz, cz = (np.ascontiguousarray(depth[:, i]) for i in range(3))
+
+    x0 = np.clip(np.minimum(np.minimum(ax, bx), cx), 0, size - 1).astype(np.int32)
+    y0 = np.clip(np.minimum(np.minimum(ay, by), cy), 0, size - 1).astype(np.int32)
+    x1 = np.clip(np.ceil(np.maximum(np.maximum(ax, bx), cx)), 0, size).astype(np.int32)
+    y1 = np.clip(np.ceil(np.maximum(np.maximum(ay, by), cy)), 0, size).astype(np.int32)
+    extent = np.maximum(np.maximum(x1 - x0, y1 - y0), 1)
+    buckets = np.ceil(np.log2(extent, dtype=np.float32)).astype(np.int32)
+
+    # Edge function denominators; zero-area (edge-on) triangles cover nothing
+    area = (bx - ax) * (cy - ay) - (cx - ax) * (by - ay)
+    buckets[np.abs(area) <= 1e-12] = -1
+
+    indices, depths, faces = [], [], []
+    for bucket in np.nonzero(np.bincount(buckets + 1))[0] - 1:
+        if bucket < 0:
+            continue
+        span = min(1 << int(bucket), size)
+        offsets = np.arange(span, dtype=np.int32)
+        grid_x = np.tile(offsets, span)
+        grid_y = np.repeat(offsets, span)
+        members = np.nonzero(buckets == bucket)[0]
+        batch = max(1, FRAGMENT_BUDGET // (span * span))
+        for start in range(0, len(members), batch):
+            tri = members[start:start + batch]
+            pixel_x = x0[tri, None] + grid_x
+            pixel_y = y0[tri, None] + grid_y
+            sample_x = pixel_x.astype(np.float32) + np.float32(0.5)
+            sample_y = pixel_y.astype(np.float32) + np.float32(0.5)
+
+            tax, tbx, tcx = ax[tri, None], bx[tri, None], cx[tri, None]
+            tay, tby, tcy = ay[tri, None], by[tri, None], cy[tri, None]
+            inv_area = 1.0 / area[tri, None]
+            w0 = ((tbx - sample_x) * (tcy - sample_y) - (tcx - sample_x) * (tby - sample_y)) * inv_area
+            w1 = ((tcx - sample_x) * (tay - sample_y) - (tax - sample_x) * (tcy - sample_y)) * inv_area
+            w2 = 1.0 - w0 - w1
+            inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+            if span > 1:
+                inside &= (pixel_x < size) & (pixel_y < size)
+            if not inside.any():
+                continue
+
+            rows, cols = np.nonzero(inside)
+            hit = tri[rows]
+            z = w0[rows, cols] * az[hit] + w1[rows, cols] * bz[hit] + w2[rows, cols] * cz[hit]
+            indices.append(pixel_y[rows, cols] * size + pixel_x[rows, cols])
+            depths.append(z)
+            faces.append(hit)
+
+    if not indices:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return np.concatenate(indices), np.concatenate(depths), np.concatenate(faces)
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode an (h, w, 4) uint8 RGBA array as PNG bytes."""
+    height, width = image.shape[:2]
+    # Filter type 0 (None) byte at the start of every scanline
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+def render_png(triangles: np.ndarray, size: int = 300) -> bytes:
+    """Render triangles and return the thumbnail as PNG bytes."""
+    return encode_png(render_mesh(triangles, size))
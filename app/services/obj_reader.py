@@ -0,0 +1,202 @@
+# app/services/obj_reader.py
+"""
+Chunked, bounded-memory reader for Wavefront OBJ files.
+
+The file is read in fixed-size blocks of complete lines. Vertex coordinates
+and face indices from each block are parsed in bulk with NumPy and appended to
+preallocated arrays that grow geometrically, so memory use is proportional to
+the mesh itself (about 12 bytes per vertex and 12 per triangle) rather than to
+Python lists of tuples. Parsing a block needs a few block-sized temporaries
+on top of that (see BLOCK_WORKING_SET_CHUNKS); each is released as soon as
+the next step no longer needs it.
+
+Only geometry is read: "v" and "f" records. Texture/normal references
+("f 1/2/3") are ignored, negative (relative) indices are resolved against the
+vertices defined so far, and polygons are fan-triangulated.
+"""
+import os
+import re
+import numpy as np
+
+CHUNK_BYTES = 1 << 22          # Bytes of OBJ text parsed per block
+BYTES_PER_VERTEX_GUESS = 40    # Initial capacity estimate from the file size
+BLOCK_WORKING_SET_CHUNKS = 5   # Peak memory for one block (its text plus parse temporaries), in multiples of CHUNK_BYTES
+
+_FACE_REF_SUFFIX_RE = re.compile(rb'/[^\s]*')  # "12/4/7" -> "12"
+_NEWLINE = ord('\n')
+_BLANK_MAX = ord(' ')  # Space, tab, CR and LF (and other control bytes) separate tokens
+
+class GrowableArray:
+    """Preallocated 2-D NumPy array with amortized O(1) row appends."""
+
+    def __init__(self, dtype, width: int, capacity: int = 1024):
+        self._data = np.empty((max(capacity, 16), width), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, rows: np.ndarray):
+        self.append_rows(len(rows))[:] = rows
+
+    def append_rows(self, count: int) -> np.ndarray:
+        """Add count uninitialized rows and return them as a view to fill in place."""
+        start = self._size
+        needed = start + count
+        if needed > len(self._data):
+            capacity = len(self._data)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty((capacity, self._data.shape[1]), dtype=self._data.dtype)
+            grown[:start] = self._data[:start]
+            self._data = grown
+        self._size = needed
+        return self._data[start:needed]
+
+    def finish(self) -> np.ndarray:
+        """Return the filled rows, releasing any unused capacity."""
+        # In-place shrink (realloc) rather than a copy, so the peak stays at one array
+        self._data.resize((self._size, self._data.shape[1]), refcheck=False)
+        return self._data
+
+def _parse_numbers(text: bytes, dtype) -> np.ndarray:
+    """Parse whitespace-separated numbers in one C call; raises ValueError on anything non-numeric."""
+    try:
+        return np.fromstring(text, dtype=dtype, sep=' ')
+    except ValueError:
+        raise ValueError("OBJ file contains a malformed number")
+
+def read_obj(file_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read the vertices and triangulated faces of an OBJ file.
+
+    Returns:
+        Tuple of (vertices float32 (n, 3), triangles int32 (m, 3) of 0-based indices)
+
+    Raises:
+        ValueError: If a record is malformed or a face references a missing vertex
+        OSError: If the file cannot be read
+    """
+    estimate = max(os.path.getsize(file_path) // BYTES_PER_VERTEX_GUESS, 1024)
+    vertices = GrowableArray(np.float32, 3, estimate)
+    triangles = GrowableArray(np.int32, 3, estimate * 2)
+
+    with open(file_path, 'rb') as f:
+        tail = b''
+        while True:
+            data = f.read(CHUNK_BYTES)
+            if not data:
+                _parse_block(tail, vertices, triangles)
+                break
+            if tail:
+                data = tail + data
+            # Only parse complete lines; keep the partial last line for the next read
+            cut = data.rfind(b'\n') + 1
+            tail = data[cut:]
+            _parse_block(memoryview(data)[:cut], vertices, triangles)
+            del data
+
+    vertex_array = vertices.finish()
+    triangle_array = triangles.finish()
+    if len(triangle_array) and (triangle_array.min() < 0 or triangle_array.max() >= len(vertex_array)):
+        raise ValueError("OBJ face references a missing vertex")
+    return vertex_array, triangle_array
+
+def _parse_block(data, vertices: GrowableArray, triangles: GrowableArray):
+    """Parse one block of complete lines (bytes or memoryview) and append its vertices and triangles."""
+    if not data:
+        return
+    if data[-1] != _NEWLINE:
+        data = bytes(data) + b'\n'
+    buf = np.frombuffer(data, dtype=np.uint8)
+
+    # Classify every line by its first two bytes without a Python-level loop
+    ends = np.flatnonzero(buf == _NEWLINE)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    del ends
+    separated = (buf[np.minimum(starts + 1, len(buf) - 1)] <= _BLANK_MAX) & (lengths > 2)
+    is_vertex = separated & (buf[starts] == ord('v'))
+    is_face = separated & (buf[starts] == ord('f'))
+    del separated
+    vertex_base = len(vertices)
+
+    if is_vertex.any():
+        text = _select_lines(buf, starts, lengths, is_vertex)
+        count = int(is_vertex.sum())
+        try:
+            coordinates = np.fromstring(text, dtype=np.float32, sep=' ')
+        except ValueError:
+            coordinates = None
+        if coordinates is None or len(coordinates) != 3 * count:
+            # Some vertices carry a w or per-vertex colour (or are malformed); keep x y z only
+            coordinates = _parse_numbers(
+                b' '.join(b' '.join(line.split()[:3]) for line in text.splitlines()), np.float32)
+            if len(coordinates) != 3 * count:
+                raise ValueError("OBJ vertex does not have three coordinates")
+        del text
+        vertices.extend(coordinates.reshape(-1, 3))
+        del coordinates
+
+    if is_face.any():
+        # Vertices defined before each face line, for resolving negative indices
+        defined = (vertex_base + np.cumsum(is_vertex))[is_face]
+        text = _FACE_REF_SUFFIX_RE.sub(b'', _select_lines(buf, starts, lengths, is_face))
+        del buf, starts, lengths
+
+        # References per face: count the token starts before each line end
+        chars = np.frombuffer(text, dtype=np.uint8)
+        token_start = chars > _BLANK_MAX
+        token_start[1:] &= chars[:-1] <= _BLANK_MAX
+        token_positions = np.flatnonzero(token_start)
+        del token_start
+        line_ends = np.flatnonzero(chars == _NEWLINE)
+        del chars
+        sizes = np.diff(np.searchsorted(token_positions, line_ends), prepend=0)
+        del token_positions, line_ends
+
+        indices = _parse_numbers(text, np.int64)
+        del text
+        if len(indices) != sizes.sum() or not indices.all():
+            raise ValueError("OBJ face has an invalid vertex index")
+
+        # Lines with fewer than three references are not faces; drop them
+        polygon = sizes >= 3
+        if not polygon.all():
+            indices = indices[np.repeat(polygon, sizes)]
+            sizes = sizes[polygon]
+            defined = defined[polygon]
+        del polygon
+        if not len(sizes):
+            return
+
+        # 1-based positive indices; negative ones count back from the latest vertex
+        negative = indices < 0
+        if negative.any():
+            indices[negative] += np.repeat(defined, sizes)[negative]
+            indices[~negative] -= 1
+        else:
+            indices -= 1
+        del negative, defined
+        if indices.min() < 0 or indices.max() > np.iinfo(np.int32).max:
+            raise ValueError("OBJ face references a missing vertex")
+        indices = indices.astype(np.int32)
+
+        # Fan triangulation: polygon (p0, p1, ..., pk) -> (p0, pi, pi+1) for i in 1..k-1,
+        # written straight into the triangle array
+        fan_counts = sizes - 2
+        first = np.repeat(np.cumsum(sizes) - sizes, fan_counts)
+        rows = triangles.append_rows(len(first))
+        rows[:, 0] = indices[first]
+        first += np.arange(1, len(first) + 1) - np.repeat(np.cumsum(fan_counts) - fan_counts, fan_counts)
+        rows[:, 1] = indices[first]
+        first += 1
+        rows[:, 2] = indices[first]
+
+def _select_lines(buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray, selected: np.ndarray) -> bytes:
+    """Concatenate the selected lines, each without its one-letter record type."""
+    keep = np.repeat(selected, lengths)
+    keep[starts[selected]] = False
+    lines = buf[keep]
+    del keep
+    return lines.tobytes()
@@ -0,0 +1,230 @@
+# app/services/outbox_service.py
+"""
+Persistent email outbox with background delivery.
+
+Routes enqueue messages in the same transaction as the status change they report,
+so a notification is never lost or sent for a change that rolled back. A delivery
+worker (a dispatcher thread feeding a small thread pool) drains the table with
+retries and exponential backoff, so staff requests never wait on SMTP. Each
+delivery thread sends its share of a batch over one pooled SMTP connection.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from app.extensions import db
+from app.models.email_outbox import EmailOutbox
+from app.services.background import BackgroundWorker, register_worker, wake_worker
+from app.services.email_service import (
+    build_message, send_batch,
+    build_approval_email, build_rejection_email, build_completion_email
+)
+
+logger = logging.getLogger(__name__)
+
+def enqueue_email(to, subject, html_content, text_content=None, job_id=None, kind=None):
+    """
+    Add an email to the outbox as part of the current database transaction.
+
+    The message is only visible to the delivery worker once the caller commits.
+
+    Args:
+        to: Recipient email address
+        subject: Email subject
+        html_content: HTML content for email
+        text_content: Plain text content (optional)
+        job_id: Job the message is about (optional)
+        kind: Short message type for display, e.g. "approval" (optional)
+
+    Returns:
+        The pending EmailOutbox instance
+    """
+    message = EmailOutbox(
+        job_id=job_id,
+        kind=kind,
+        recipient=to,
+        subject=subject,
+        html_body=html_content,
+        text_body=text_content,
+        status='QUEUED',
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(message)
+    return message
+
+def queue_approval_email(job):
+    """Queue the approval/confirmation email for a job."""
+    subject, html_content, text_content = build_approval_email(job)
+    return enqueue_email(job.student_email, subject, html_content, text_content, job_id=job.id, kind='approval')
+
+def queue_rejection_email(job, rejection_reasons):
+    """Queue the rejection email for a job."""
+    subject, html_content, text_content = build_rejection_email(job, rejection_reasons)
+    return enqueue_email(job.student_email, subject, html_content, text_content, job_id=job.id, kind='rejection')
+
+def queue_completion_email(job):
+    """Queue the ready-for-pickup email for a job."""
+    subject, html_content, text_content = build_completion_email(job)
+    return enqueue_email(job.student_email, subject, html_content, text_content, job_id=job.id, kind='completion')
+
+def get_job_emails(job_id: str) -> list:
+    """Get all outbox messages for a job, oldest first."""
+    return (EmailOutbox.query
+            .filter_by(job_id=job_id)
+            .order_by(EmailOutbox.created_at.asc(), EmailOutbox.id.asc())
+            .all())
+
+def claim_due_messages(limit: int) -> list:
+    """
+    Claim up to limit messages that are due for delivery.
+
+    Claiming flips QUEUED to SENDING with a conditional UPDATE and pushes
+    next_attempt_at out by a lease, so concurrent workers (threads or processes)
+    never send the same message twice. SENDING messages whose lease has expired
+    (e.g. the process died mid-send) are claimed again.
+
+    Returns:
+        List of claimed message IDs
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=current_app.config.get('EMAIL_SEND_LEASE_SECONDS', 300))
+
+    candidates = (db.session.query(EmailOutbox.id)
+                  .filter(EmailOutbox.status.in_(['QUEUED', 'SENDING']),
+                          EmailOutbox.next_attempt_at <= now)
+                  .order_by(EmailOutbox.next_attempt_at.asc())
+                  .limit(limit)
+                  .all())
+
+    claimed = []
+    for (message_id,) in candidates:
+        result = db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message_id,
+                   EmailOutbox.status.in_(['QUEUED', 'SENDING']),
+                   EmailOutbox.next_attempt_at <= now)
+            .values(status='SENDING', next_attempt_at=lease_until)
+        )
+        if result.rowcount:
+            claimed.append(message_id)
+    db.session.commit()
+    return claimed
+
+def _record_failure(message, error: str):
+    """Schedule a retry with exponential backoff, or give up after the last attempt."""
+    max_attempts = current_app.config.get('EMAIL_MAX_ATTEMPTS', 6)
+    base_delay = current_app.config.get('EMAIL_RETRY_BASE_SECONDS', 30)
+
+    message.last_error = error
+    if message.attempts >= max_attempts:
+        message.status = 'FAILED'
+        logger.error(f"Giving up on email {message.id} to {message.recipient} after {message.attempts} attempts: {error}")
+    else:
+        message.status = 'QUEUED'
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=base_delay * 2 ** (message.attempts - 1))
+        logger.warning(f"Email {message.id} to {message.recipient} failed (attempt {message.attempts}), will retry: {error}")
+
+def deliver_messages(message_ids: list) -> tuple[int, int]:
+    """
+    Send claimed outbox messages over a shared SMTP connection and record each outcome.
+
+    Returns:
+        Tuple of (sent_count, not_sent_count)
+    """
+    messages = [message for message in
+                (db.session.get(EmailOutbox, message_id) for message_id in message_ids)
+                if message is not None and message.status == 'SENDING']
+    if not messages:
+        return 0, 0
+
+    results = send_batch([
+        build_message(message.recipient, message.subject, message.html_body, message.text_body)
+        for message in messages
+    ])
+
+    sent = 0
+    now = datetime.utcnow()
+    for message, (was_sent, error) in zip(messages, results):
+        message.attempts += 1
+        if was_sent:
+            message.status = 'SENT'
+            message.sent_at = now
+            message.last_error = None
+            sent += 1
+        else:
+            _record_failure(message, error)
+
+    db.session.commit()
+    return sent, len(messages) - sent
+
+def deliver_due_messages(limit: int = None) -> tuple[int, int]:
+    """
+    Synchronously claim and deliver due messages (used by the CLI and tests).
+
+    Returns:
+        Tuple of (sent_count, not_sent_count)
+    """
+    limit = limit or current_app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 20)
+    claimed = claim_due_messages(limit)
+    if not claimed:
+        return 0, 0
+    return deliver_messages(claimed)
+
+class OutboxWorker(BackgroundWorker):
+    """Background dispatcher that drains the outbox through a thread pool."""
+
+    thread_name = 'email-outbox-dispatcher'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._executor = None
+        self._max_workers = 1
+
+    def _starting(self):
+        self._max_workers = self.app.config.get('EMAIL_OUTBOX_WORKERS', 2)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix='email-outbox'
+        )
+
+    def _stopped(self):
+        # Wait for in-flight deliveries
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _run(self):
+        poll_seconds = self.app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 5)
+        batch_size = self.app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 20)
+        while not self._stop.is_set():
+            claimed = []
+            try:
+                with self.app.app_context():
+                    claimed = claim_due_messages(batch_size)
+                if claimed:
+                    # One chunk per delivery thread, each sent over its own SMTP connection
+                    chunk_count = min(self._max_workers, len(claimed))
+                    chunks = [claimed[i::chunk_count] for i in range(chunk_count)]
+                    wait([self._executor.submit(self._deliver, chunk) for chunk in chunks])
+            except Exception as e:
+                logger.error(f"Email outbox dispatcher error: {str(e)}")
+
+            # Keep draining while there is a backlog; otherwise sleep until woken or the next poll
+            if len(claimed) < batch_size:
+                self._sleep(poll_seconds)
+
+    def _deliver(self, message_ids):
+        with self.app.app_context():
+            try:
+                deliver_messages(message_ids)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error delivering emails {message_ids}: {str(e)}")
+
+def init_outbox_worker(app):
+    """Create the outbox worker and start it lazily with the first request."""
+    register_worker(app, 'email_outbox', OutboxWorker(app), app.config.get('EMAIL_OUTBOX_WORKER_ENABLED', True))
+
+def wake_outbox_worker():
+    """Nudge the delivery worker after committing newly queued messages."""
+    wake_worker('email_outbox')
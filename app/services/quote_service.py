@@ -0,0 +1,227 @@
+# app/services/quote_service.py
+"""
+Instant cost quotes for the submission form.
+
+A model is measured once (mesh_analysis, in the shared worker pool) and
+priced on every printer the way staff will see it pre-filled on the approve
+form (cost_service.estimate_job), together with whether it fits each build
+volume (fit_check). Quotes are memoized by the file's SHA-256 in a bounded LRU
+cache, so quoting the same file again, e.g. when the form asks by hash before
+uploading, costs a dictionary lookup. The cache is emptied when
+`flask train-estimator` stores new models.
+
+The endpoint needs no login, so each client gets QUOTE_RATE_LIMIT_PER_MINUTE
+requests, at most QUOTE_MAX_RUNNING analyses run at once and an analysis is
+abandoned after QUOTE_TIMEOUT_SECONDS.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import current_app
+from app.extensions import db
+from app.models.estimator_model import EstimatorModel
+from app.models.job import Job
+from app.services.cost_service import (
+    MINIMUM_CHARGE, PRINTERS, calculate_cost, estimate_job, get_default_material, get_printer_type
+)
+from app.services.fit_check import find_fit
+from app.services.mesh_analysis import analyze_model
+from app.services.threemf_reader import read_3mf_metadata
+from app.services.worker_pool import submit_task
+
+class QuoteUnavailable(Exception):
+    """The quote could not be computed right now (too many running, or it took too long)."""
+
+class QuoteCache:
+    """Thread-safe LRU map of file hash -> quote, valid for one set of estimator models."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._models_stamp = None
+
+    def sync(self, models_stamp):
+        """Clear the cache if the estimator models changed since it was filled (e.g. by another process)."""
+        with self._lock:
+            if models_stamp != self._models_stamp:
+                self._entries.clear()
+                self._models_stamp = models_stamp
+
+    def get(self, file_hash: str):
+        with self._lock:
+            quote = self._entries.get(file_hash)
+            if quote is not None:
+                self._entries.move_to_end(file_hash)
+            return quote
+
+    def put(self, file_hash: str, quote: dict):
+        with self._lock:
+            self._entries[file_hash] = quote
+            self._entries.move_to_end(file_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class QuoteThrottle:
+    """Per-client request budget over a sliding minute, and a cap on analyses running at once."""
+
+    def __init__(self, per_minute: int, max_running: int):
+        self.per_minute = per_minute
+        self._requests = {}  # client -> deque of request times (monotonic)
+        self._lock = threading.Lock()
+        self._running = threading.BoundedSemaphore(max_running)
+
+    def allow(self, client: str) -> bool:
+        """Count a request from client; False if it is over its budget."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._requests) > 10000:
+                # Forget clients that have been quiet for a minute
+                self._requests = {c: times for c, times in self._requests.items() if now - times[-1] < 60}
+            times = self._requests.setdefault(client, deque())
+            while times and now - times[0] >= 60:
+                times.popleft()
+            if len(times) >= self.per_minute:
+                return False
+            times.append(now)
+            return True
+
+    def try_start(self) -> bool:
+        """Reserve a slot for an analysis; release it with finish()."""
+        return self._running.acquire(blocking=False)
+
+    def finish(self, future=None):
+        """Release a slot taken by try_start() (usable as a Future done-callback)."""
+        self._running.release()
+
+def init_quote_cache(app):
+    """Create the app's quote cache (QUOTE_CACHE_SIZE entries) and throttle."""
+    app.extensions['quote_cache'] = QuoteCache(app.config.get('QUOTE_CACHE_SIZE', 512))
+    app.extensions['quote_throttle'] = QuoteThrottle(app.config.get('QUOTE_RATE_LIMIT_PER_MINUTE', 20),
+                                                     app.config.get('QUOTE_MAX_RUNNING', 2))
+
+def _cache() -> QuoteCache:
+    cache = current_app.extensions['quote_cache']
+    cache.sync(db.session.query(db.func.max(EstimatorModel.trained_at)).scalar())
+    return cache
+
+def allow_quote_request(client: str) -> bool:
+    """Whether a client may make another /api/quote request (see QuoteThrottle.allow)."""
+    return current_app.extensions['quote_throttle'].allow(client)
+
+def _measure(file_path: str, file_type: str):
+    """Run analyze_model in the worker pool, waiting at most QUOTE_TIMEOUT_SECONDS."""
+    throttle = current_app.extensions['quote_throttle']
+    if not throttle.try_start():
+        raise QuoteUnavailable("Too many quotes are being calculated")
+    try:
+        future = submit_task(analyze_model, file_path, file_type)
+    except Exception:
+        throttle.finish()
+        raise
+    # The slot is held until the analysis really ends, even if we stop waiting for it
+    future.add_done_callback(throttle.finish)
+    try:
+        return future.result(timeout=current_app.config.get('QUOTE_TIMEOUT_SECONDS', 30))
+    except FutureTimeoutError:
+        future.cancel()
+        raise QuoteUnavailable("Model analysis timed out")
+
+def build_quote(stats, slicer_metadata: dict = None) -> dict:
+    """
+    Price measured model stats on every printer.
+
+    Args:
+        stats: MeshStats from mesh_analysis
+        slicer_metadata: Estimates embedded in a 3MF upload, if any
+
+    Returns:
+        Dict with the model's measurements and one quote per printer
+    """
+    orientations = stats.footprint.orientations() if stats.footprint is not None else []
+    size_x, size_y, size_z = stats.dimensions_mm
+    quotes = []
+    for key, config in PRINTERS.items():
+        orientation = find_fit(orientations, config['build_mm'])
+        # A transient job (never added to the session) so the estimate matches the approve form's
+        job = Job(printer=key, volume_mm3=stats.volume_mm3, surface_area_mm2=stats.surface_area_mm2,
+                  size_x_mm=size_x, size_y_mm=size_y, size_z_mm=size_z, slicer_metadata=slicer_metadata,
+                  fit_check={'orientation': orientation.to_dict()} if orientation else None)
+        if not estimate_job(job):
+            continue
+        info = job.estimate_info or {}
+        weight_range = info.get('weight_g')
+        quotes.append({
+            'printer': key,
+            'printer_name': config['display_name'],
+            'print_type': get_printer_type(key),
+            'material': get_default_material(key),
+            'fits': orientation is not None,
+            'estimated_weight_g': job.estimated_weight_g,
+            'estimated_time_hours': job.estimated_time_hours,
+            'estimated_cost_usd': float(job.estimated_cost_usd),
+            'cost_range_usd': [float(calculate_cost(key, w)) for w in weight_range] if weight_range else None,
+            'minimum_charge_applies': job.estimated_cost_usd <= MINIMUM_CHARGE,
+            'source': info.get('source'),
+        })
+    return {
+        'model': {
+            'volume_cm3': round(stats.volume_mm3 / 1000, 2),
+            'dimensions_mm': [round(v, 1) for v in stats.dimensions_mm],
+            'triangle_count': stats.triangle_count,
+        },
+        'quotes': quotes,
+        'minimum_charge_usd': float(MINIMUM_CHARGE),
+    }
+
+def quote_file(file_path: str, file_type: str, file_hash: str) -> tuple[dict, bool]:
+    """
+    Quote a model file, or return the cached quote for its hash.
+
+    Args:
+        file_path: Path to the model (may be a temp file or an extensionless blob)
+        file_type: Model extension, e.g. ".stl"
+        file_hash: SHA-256 of the file content
+
+    Returns:
+        Tuple of (quote, cached)
+
+    Raises:
+        ValueError: If the format is unsupported or the model is malformed
+        OSError: If the file cannot be read
+        QuoteUnavailable: If too many analyses are running or this one timed out
+    """
+    quote = _cache().get(file_hash)
+    if quote is not None:
+        return quote, True
+
+    stats = _measure(file_path, file_type)
+    if not stats.triangle_count:
+        raise ValueError("Model contains no triangles")
+    slicer_metadata = None
+    if file_type.lower().lstrip('.') == '3mf':
+        try:
+            slicer_metadata = read_3mf_metadata(file_path) or None
+        except (ValueError, OSError) as e:
+            current_app.logger.warning(f"Could not read 3MF metadata for quote {file_hash[:12]}: {str(e)}")
+    quote = dict(build_quote(stats, slicer_metadata), file_hash=file_hash)
+    _cache().put(file_hash, quote)
+    return quote, False
+
+def quote_hash(file_hash: str):
+    """
+    Return the cached quote for a file hash.
+
+    Only files quoted before are answered: submitted jobs' files are never
+    looked up, so the endpoint does not reveal what has been submitted.
+
+    Returns:
+        Tuple of (quote, True), or None if the hash has not been quoted
+    """
+    quote = _cache().get(file_hash)
+    return (quote, True) if quote is not None else None
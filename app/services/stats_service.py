@@ -0,0 +1,126 @@
+# app/services/stats_service.py
+"""
+Status statistics for the staff dashboard.
+
+Per-status job counts live in the job_status_counts summary table, which every
+status transition updates in the same transaction as the job itself. Reads are
+therefore O(1) regardless of how large the jobs table grows. A full GROUP BY
+recount is kept for verification and drift repair.
+"""
+from sqlalchemy import func, update
+from app.extensions import db
+from app.models.job import Job
+from app.models.job_status_count import JobStatusCount
+
+# Maps each job status to the key used by dashboard templates and the stats API
+STATUS_STAT_KEYS = {
+    'UPLOADED': 'uploaded',
+    'PENDING': 'pending',
+    'READYTOPRINT': 'ready',
+    'PRINTING': 'printing',
+    'COMPLETED': 'completed',
+    'PAIDPICKEDUP': 'paidpickedup',
+    'REJECTED': 'rejected',
+}
+
+def _adjust_count(status: str, delta: int):
+    """Atomically add delta to the stored count for a status (creating the row if needed)."""
+    result = db.session.execute(
+        update(JobStatusCount)
+        .where(JobStatusCount.status == status)
+        .values(count=JobStatusCount.count + delta)
+    )
+    if result.rowcount == 0:
+        db.session.add(JobStatusCount(status=status, count=delta))
+
+def record_status_change(from_status, to_status, count: int = 1):
+    """
+    Update the summary counts for jobs moving between statuses.
+
+    Must be called before the caller's db.session.commit() so the counts are
+    committed (or rolled back) together with the job change.
+
+    Args:
+        from_status: Previous status, or None for a newly created job
+        to_status: New status, or None for a deleted job
+        count: Number of jobs making the same move (bulk transitions)
+    """
+    if from_status == to_status or count == 0:
+        return
+    if from_status:
+        _adjust_count(from_status, -count)
+    if to_status:
+        _adjust_count(to_status, count)
+
+def recount_status_histogram() -> dict:
+    """
+    Count jobs per status with one GROUP BY query over the jobs table.
+
+    Returns:
+        Dict mapping every known status (e.g., "UPLOADED") to its job count.
+        Statuses with no jobs are reported as 0.
+    """
+    histogram = {status: 0 for status in STATUS_STAT_KEYS}
+    rows = db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    for status, count in rows:
+        histogram[status] = count
+    return histogram
+
+def get_status_histogram() -> dict:
+    """
+    Get job counts per status from the summary table.
+
+    Falls back to a full recount if the summary table has never been populated
+    (e.g., a database created without running migrations).
+
+    Returns:
+        Dict mapping every known status (e.g., "UPLOADED") to its job count.
+    """
+    rows = db.session.query(JobStatusCount.status, JobStatusCount.count).all()
+    if not rows:
+        return recount_status_histogram()
+
+    histogram = {status: 0 for status in STATUS_STAT_KEYS}
+    for status, count in rows:
+        histogram[status] = count
+    return histogram
+
+def get_dashboard_stats() -> dict:
+    """
+    Get job counts keyed the way dashboard templates expect them.
+
+    Returns:
+        Dict such as {'uploaded': 3, 'pending': 1, 'ready': 0, ...}
+    """
+    histogram = get_status_histogram()
+    return {key: histogram.get(status, 0) for status, key in STATUS_STAT_KEYS.items()}
+
+def verify_status_counts(repair: bool = False) -> list:
+    """
+    Compare the summary table against a full recount of the jobs table.
+
+    Args:
+        repair: If True, overwrite drifted counts with the recounted values and commit
+
+    Returns:
+        List of (status, stored_count, actual_count) tuples for every status that drifted
+    """
+    actual = recount_status_histogram()
+    stored = {row.status: row for row in JobStatusCount.query.all()}
+
+    drift = []
+    for status in sorted(set(actual) | set(stored)):
+        actual_count = actual.get(status, 0)
+        row = stored.get(status)
+        stored_count = row.count if row else None
+        if stored_count != actual_count:
+            drift.append((status, stored_count, actual_count))
+            if repair:
+                if row:
+                    row.count = actual_count
+                else:
+                    db.session.add(JobStatusCount(status=status, count=actual_count))
+
+    if repair and drift:
+        db.session.commit()
+    return drift
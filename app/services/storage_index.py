@@ -0,0 +1,344 @@
+# app/services/storage_index.py
+"""
+In-memory index of the files in the status directories.
+
+FileService.file_exists and get_file_size are asked about every job on a
+page, and on the production share each of those stats is a network round
+trip. The index keeps the name, size and mtime of every file in the status
+directories in memory, so those lookups (and the job page's search for a
+sliced file next to an upload) cost nothing.
+
+It is kept current in a background thread:
+
+- inotify (Linux, through libc): a created, written, moved or deleted file is
+  re-checked as soon as the event arrives.
+- polling (everywhere else, or STORAGE_INDEX_MODE=poll): every
+  STORAGE_INDEX_POLL_SECONDS the directories are stat'ed and only those whose
+  mtime changed are listed again.
+
+In both modes every directory is listed again every
+STORAGE_INDEX_RESYNC_SECONDS, whatever its mtime: network mounts only report
+changes made from this machine to inotify, and a file rewritten in place does
+not change its directory's mtime.
+
+Once a status directory has been listed, the index is the answer for every
+path in it: a name it doesn't list is reported ABSENT without touching the
+share. Files this process writes or moves are recorded as they land
+(note_file), so a new upload or a finished move shows up at once; a file
+created from another machine shows up at the next refresh. Only paths outside
+the indexed directories (or before the first listing) are stat'ed.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from flask import current_app
+from app.services.background import BackgroundWorker, register_worker
+from app.utils.uploads import TEMP_UPLOAD_PREFIX
+
+logger = logging.getLogger(__name__)
+
+ABSENT = object()  # lookup() result for a name missing from an indexed directory
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class Inotify:
+    """Minimal inotify wrapper over libc (no third-party dependency)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Watch a directory; returns the watch descriptor."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch({path}) failed: {os.strerror(errno)}")
+        return wd
+
+    def read_events(self, timeout: float) -> list:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            List of (wd, mask, name) tuples; empty on timeout
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+def _list_files(path: str) -> dict:
+    """File name -> (size, mtime) for the regular files in a directory, skipping dotfiles and partial uploads."""
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name.startswith(TEMP_UPLOAD_PREFIX):
+                continue
+            try:
+                if entry.is_file():
+                    info = entry.stat()
+                    files[entry.name] = (info.st_size, info.st_mtime)
+            except OSError:
+                continue  # Removed while listing
+    return files
+
+class StorageIndex(BackgroundWorker):
+    """File sizes in the status directories, refreshed by a background thread."""
+
+    thread_name = 'storage-index'
+
+    def __init__(self, app):
+        # Imported here: storage_reconciler imports file_service, which imports this module
+        from app.services.storage_reconciler import STATUS_DIRECTORIES
+
+        super().__init__(app)
+        storage_root = app.config.get('APP_STORAGE_ROOT') or ''
+        self.directories = {_key(os.path.join(storage_root, directory)): os.path.join(storage_root, directory)
+                            for directory in dict.fromkeys(STATUS_DIRECTORIES.values())} if storage_root else {}
+        self._files = {}    # directory key -> {name: (size, mtime)}; a directory is absent until it has been listed
+        self._mtimes = {}   # directory key -> (mtime_ns, listed_at_ns)
+        self._watches = {}  # inotify wd -> directory key
+        self._inotify = None
+
+    def start(self):
+        """Start the indexing thread (idempotent); without APP_STORAGE_ROOT there is nothing to index."""
+        if self.directories:
+            super().start()
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify is not None else 'poll'
+
+    def lookup(self, path: str):
+        """
+        Size and mtime of a file from the index.
+
+        Returns:
+            Tuple of (size, mtime); ABSENT if the directory is indexed and has no
+            such file; or None if the directory is not indexed (the caller should stat it)
+        """
+        if not path:
+            return None
+        directory, name = os.path.split(_key(path))
+        files = self._files.get(directory)
+        if files is None:
+            return None
+        return files.get(name, ABSENT)
+
+    def listing(self, directory: str):
+        """
+        The files in an indexed directory.
+
+        Returns:
+            Dict mapping file name to (size, mtime), or None if the directory is not indexed
+        """
+        files = self._files.get(_key(directory))
+        return dict(files) if files is not None else None
+
+    def note(self, path: str):
+        """Re-check one file, e.g. right after this process wrote, moved or removed it."""
+        directory, name = os.path.split(_key(path))
+        files = self._files.get(directory)
+        if files is None:
+            return
+        try:
+            info = os.stat(path)
+        except OSError:
+            files.pop(name, None)
+            return
+        if stat.S_ISREG(info.st_mode):
+            files[name] = (info.st_size, info.st_mtime)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        List the directories whose mtime changed since they were last listed.
+
+        Args:
+            force: List every directory regardless of mtime
+
+        Returns:
+            Number of directories listed
+        """
+        listed = 0
+        for key, path in self.directories.items():
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                self._files.pop(key, None)
+                self._mtimes.pop(key, None)
+                continue
+            previous = self._mtimes.get(key)
+            # A listing taken in the same mtime tick as a change may have missed a later change in that tick
+            if not force and previous and previous[0] == mtime_ns and previous[1] - mtime_ns > 2 * 10**9:
+                continue
+            listed_at_ns = time.time_ns()
+            try:
+                self._files[key] = _list_files(path)
+            except OSError as e:
+                logger.warning(f"Storage index could not list {path}: {str(e)}")
+                self._files.pop(key, None)
+                continue
+            self._mtimes[key] = (mtime_ns, listed_at_ns)
+            listed += 1
+        return listed
+
+    def _watch(self):
+        """Add inotify watches for directories that aren't watched yet."""
+        watched = set(self._watches.values())
+        for key, path in self.directories.items():
+            if key in watched:
+                continue
+            try:
+                self._watches[self._inotify.add_watch(path)] = key
+            except OSError as e:
+                logger.warning(f"Storage index cannot watch {path}, relying on resync: {str(e)}")
+
+    def _apply(self, events: list):
+        """Re-check the files named in inotify events."""
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self.refresh(force=True)
+                continue
+            key = self._watches.get(wd)
+            if key is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                # The directory itself went away: forget it until the next resync finds and watches it again
+                self._watches.pop(wd, None)
+                self._files.pop(key, None)
+                self._mtimes.pop(key, None)
+                continue
+            files = self._files.get(key)
+            if files is None or not name or name.startswith('.'):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directories[key], name))
+            except OSError:
+                files.pop(name, None)
+                continue
+            if stat.S_ISREG(info.st_mode):
+                files[name] = (info.st_size, info.st_mtime)
+
+    def _run(self):
+        mode = self.app.config.get('STORAGE_INDEX_MODE', 'auto')
+        if mode in ('auto', 'inotify') and sys.platform.startswith('linux'):
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable, polling storage instead: {str(e)}")
+        elif mode == 'inotify':
+            logger.warning("inotify is only available on Linux, polling storage instead")
+
+        resync_interval = self.app.config.get('STORAGE_INDEX_RESYNC_SECONDS', 300)
+        interval = resync_interval if self._inotify else self.app.config.get('STORAGE_INDEX_POLL_SECONDS', 10)
+        next_refresh = next_resync = 0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() >= next_refresh:
+                    resync = time.monotonic() >= next_resync
+                    try:
+                        if self._inotify is not None:
+                            self._watch()  # Before listing, so no change falls between the two
+                        self.refresh(force=resync)
+                    except Exception as e:
+                        logger.error(f"Storage index refresh error: {str(e)}")
+                    next_refresh = time.monotonic() + interval
+                    if resync:
+                        next_resync = time.monotonic() + resync_interval
+                if self._inotify is not None:
+                    try:
+                        self._apply(self._inotify.read_events(min(1.0, interval)))
+                    except Exception as e:
+                        logger.error(f"Storage index event error: {str(e)}")
+                else:
+                    self._sleep(max(next_refresh - time.monotonic(), 0))
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+
+def lookup_file_size(path: str):
+    """
+    Size of a file from the current app's storage index.
+
+    Returns:
+        The size in bytes, ABSENT if the index knows there is no such file,
+        or None when the index can't answer (stat the file instead)
+    """
+    found = lookup_file(path)
+    return found[0] if isinstance(found, tuple) else found
+
+def lookup_file(path: str):
+    """
+    Size and mtime of a file from the current app's storage index.
+
+    Returns:
+        Tuple of (size, mtime), ABSENT if the index knows there is no such file,
+        or None when the index can't answer (stat the file instead)
+    """
+    index = current_app.extensions.get('storage_index')
+    return index.lookup(path) if index is not None else None
+
+def list_directory(directory: str):
+    """
+    The files in a status directory from the current app's storage index.
+
+    Returns:
+        Dict mapping file name to (size, mtime), or None when the index can't answer (list the directory instead)
+    """
+    index = current_app.extensions.get('storage_index')
+    return index.listing(directory) if index is not None else None
+
+def note_file(*paths: str):
+    """Update the current app's storage index for files this process just wrote, moved or removed."""
+    index = current_app.extensions.get('storage_index')
+    if index is not None:
+        for path in paths:
+            index.note(path)
+
+def init_storage_index(app):
+    """Create the storage index and start it lazily with the first request."""
+    register_worker(app, 'storage_index', StorageIndex(app), app.config.get('STORAGE_INDEX_ENABLED', True))
@@ -0,0 +1,217 @@
+# app/services/storage_reconciler.py
+"""
+Reconcile the status directories under APP_STORAGE_ROOT with the jobs table.
+
+Every job's file (and its model_path, the upload kept next to a sliced file)
+should sit in the directory for its status (rejected jobs keep theirs in
+Uploaded). A pass lists the six status directories with
+os.scandir, indexes the jobs by (directory, file name) from one query, and
+reports:
+
+- orphans: files in a status directory that no job points at
+- missing: jobs whose file is not where file_path says
+- mismatched: jobs whose file_path or file is in the wrong directory for their status
+
+Sliced files staff saved next to a job file, partial uploads and jobs with a
+file move still queued or in flight are not reported.
+
+Listing a large directory on the share is the expensive part, so each
+directory's listing is checkpointed with its mtime (storage_scan_checkpoints)
+and reused while the mtime is unchanged; adding, removing or renaming a file
+updates it. Runs from `flask reconcile-storage` and in a background thread
+every STORAGE_RECONCILE_INTERVAL_SECONDS.
+"""
+import json
+import logging
+import os
+import time
+from flask import current_app
+from app.extensions import db
+from app.models.file_move import FileMove
+from app.models.job import Job
+from app.models.storage_scan import StorageScanCheckpoint
+from app.services.background import BackgroundWorker, register_worker
+from app.services.file_mover import UNFINISHED
+from app.services.file_service import SLICED_FILE_EXTENSIONS
+from app.utils.uploads import TEMP_UPLOAD_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Directory each status's files live in
+STATUS_DIRECTORIES = {
+    'UPLOADED': 'Uploaded',
+    'REJECTED': 'Uploaded',
+    'PENDING': 'Pending',
+    'READYTOPRINT': 'ReadyToPrint',
+    'PRINTING': 'Printing',
+    'COMPLETED': 'Completed',
+    'PAIDPICKEDUP': 'PaidPickedUp',
+}
+
+# A listing taken this soon after the directory changed may have missed a second
+# change within the same mtime tick, so it is not reused
+MTIME_SLACK_NS = 2 * 10**9
+
+def _list_directory(path: str) -> list:
+    """Names of the regular files in a status directory, skipping dotfiles and partial uploads."""
+    names = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name.startswith(TEMP_UPLOAD_PREFIX):
+                continue
+            if entry.is_file():
+                names.append(entry.name)
+    return sorted(names)
+
+def list_status_directories(full: bool = False) -> tuple[dict, int]:
+    """
+    List every status directory, reusing checkpointed listings of unchanged ones.
+
+    Args:
+        full: Ignore the checkpoints and list every directory
+
+    Returns:
+        Tuple of (dict mapping directory name to a set of file names, number of directories listed)
+    """
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    if not storage_root:
+        raise ValueError("APP_STORAGE_ROOT not configured")
+
+    checkpoints = {row.directory: row for row in StorageScanCheckpoint.query.all()}
+    listings = {}
+    listed = 0
+    for directory in dict.fromkeys(STATUS_DIRECTORIES.values()):
+        path = os.path.join(storage_root, directory)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            listings[directory] = set()
+            continue
+
+        checkpoint = checkpoints.get(directory)
+        if (not full and checkpoint is not None and checkpoint.mtime_ns == mtime_ns
+                and checkpoint.listed_at_ns - mtime_ns > MTIME_SLACK_NS):
+            listings[directory] = set(json.loads(checkpoint.entries))
+            continue
+
+        listed_at_ns = time.time_ns()
+        names = _list_directory(path)
+        listed += 1
+        listings[directory] = set(names)
+        if checkpoint is None:
+            checkpoint = StorageScanCheckpoint(directory=directory)
+            db.session.add(checkpoint)
+        checkpoint.mtime_ns = mtime_ns
+        checkpoint.listed_at_ns = listed_at_ns
+        checkpoint.entries = json.dumps(names)
+    db.session.commit()
+    return listings, listed
+
+def _is_sliced_copy(name: str, stems: set) -> bool:
+    """Whether name is a slicer output named after one of the job files (see FileService.find_sliced_files)."""
+    if not name.lower().endswith(SLICED_FILE_EXTENSIONS):
+        return False
+    return any(name[:length] in stems for length in range(1, len(name)))
+
+def reconcile_storage(full: bool = False) -> dict:
+    """
+    Compare the status directories with the jobs table.
+
+    Args:
+        full: List every directory even if its checkpoint is current
+
+    Returns:
+        Dict with lists 'orphans' (paths), 'missing' and 'mismatched' (dicts
+        with job_id, status, file_path; mismatched also has expected_dir and
+        found_in), and counts 'in_flight', 'files', 'directories_listed'
+
+    Raises:
+        ValueError: If APP_STORAGE_ROOT is not configured
+    """
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    listings, listed = list_status_directories(full=full)
+    directories = {directory.lower(): directory for directory in listings}
+    root_key = os.path.normcase(os.path.normpath(storage_root))
+
+    in_flight_jobs = set()
+    in_flight_paths = set()
+    for job_id, source_path, dest_path in (db.session.query(FileMove.job_id, FileMove.source_path, FileMove.dest_path)
+                                           .filter(FileMove.status.in_(UNFINISHED))):
+        in_flight_jobs.add(job_id)
+        in_flight_paths.update((source_path, dest_path))
+
+    def locate(path):
+        """(status directory, file name) for a path inside the storage tree, else (None, name)."""
+        parent, name = os.path.split(path)
+        grandparent, directory = os.path.split(parent)
+        if os.path.normcase(os.path.normpath(grandparent)) != root_key:
+            return None, name
+        return directories.get(directory.lower()), name
+
+    # (directory, name) pairs the jobs table accounts for, and file stems per directory for sliced copies
+    referenced = set()
+    stems = {directory: set() for directory in listings}
+    for path in in_flight_paths:
+        directory, name = locate(path)
+        if directory:
+            referenced.add((directory, name))
+
+    report = {'orphans': [], 'missing': [], 'mismatched': [], 'in_flight': len(in_flight_jobs),
+              'files': sum(len(names) for names in listings.values()), 'directories_listed': listed}
+    job_files = db.session.query(Job.id, Job.status, Job.file_path).union_all(
+        db.session.query(Job.id, Job.status, Job.model_path).filter(Job.model_path.isnot(None)))
+    for job_id, status, file_path in job_files:
+        expected_dir = STATUS_DIRECTORIES.get(status)
+        if not file_path or expected_dir is None:
+            continue
+        directory, name = locate(file_path)
+        if directory:
+            referenced.add((directory, name))
+            stems[directory].add(os.path.splitext(name)[0])
+        if job_id in in_flight_jobs:
+            continue
+
+        if directory == expected_dir and name in listings[expected_dir]:
+            continue
+        problem = {'job_id': job_id, 'status': status, 'file_path': file_path}
+        found_in = [other for other, names in listings.items() if name in names and other != directory]
+        referenced.update((other, name) for other in found_in)  # Reported here, not again as orphans
+        if directory != expected_dir or found_in:
+            problem.update(expected_dir=expected_dir, found_in=found_in)
+            report['mismatched'].append(problem)
+        else:
+            report['missing'].append(problem)
+
+    for directory, names in listings.items():
+        for name in sorted(names):
+            if (directory, name) not in referenced and not _is_sliced_copy(name, stems[directory]):
+                report['orphans'].append(os.path.join(storage_root, directory, name))
+    return report
+
+class StorageReconcileWorker(BackgroundWorker):
+    """Background thread that runs reconcile_storage at startup and then periodically."""
+
+    thread_name = 'storage-reconciler'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.last_report = None
+
+    def _run(self):
+        interval = self.app.config.get('STORAGE_RECONCILE_INTERVAL_SECONDS', 3600)
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    report = reconcile_storage()
+                self.last_report = report
+                if report['orphans'] or report['missing'] or report['mismatched']:
+                    logger.warning(f"Storage reconciliation: {len(report['orphans'])} orphan file(s), "
+                                   f"{len(report['missing'])} missing, {len(report['mismatched'])} in the wrong "
+                                   f"directory; run `flask reconcile-storage` for details")
+            except Exception as e:
+                logger.error(f"Storage reconciliation error: {str(e)}")
+            self._sleep(interval)
+
+def init_storage_reconciler(app):
+    """Create the reconciler worker and start it lazily with the first request."""
+    register_worker(app, 'storage_reconciler', StorageReconcileWorker(app), app.config.get('STORAGE_RECONCILE_ENABLED', True))
@@ -0,0 +1,293 @@
+# app/services/threemf_reader.py
+"""
+Streaming reader for 3MF packages.
+
+A 3MF file is a ZIP archive of XML parts. The model parts are parsed with
+ElementTree.iterparse directly from the (decompressing) zip member stream, so
+the archive is never extracted and the XML is never held in memory as a whole:
+vertices and triangles are appended to growable arrays as they are read and
+each element is discarded immediately.
+
+Objects split across several model parts (Bambu Studio / OrcaSlicer use the
+production extension's p:path components) and build/component transforms are
+resolved, so the triangles match what a slicer would place on the bed.
+
+Embedded slicer metadata (print time and filament estimates) is read from the
+slicer config entries under Metadata/ when present.
+"""
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+import numpy as np
+
+ROOT_MODEL_PART = '3D/3dmodel.model'
+MODEL_RELATIONSHIP = 'http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel'
+
+# Slicer config entries (PrusaSlicer/SuperSlicer write "; key = value" lines)
+SLIC3R_CONFIG_PARTS = ['Metadata/Slic3r_PE.config', 'Metadata/PrusaSlicer.config', 'Metadata/SuperSlicer.config']
+SLIC3R_TIME_KEYS = ['estimated printing time (normal mode)', 'estimated printing time']
+SLIC3R_WEIGHT_KEYS = ['filament used [g]', 'total filament used [g]']
+SLIC3R_LENGTH_KEYS = ['filament used [mm]']
+BAMBU_SLICE_INFO_PART = 'Metadata/slice_info.config'
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([dhms])')
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from a tag or attribute name."""
+    return tag.rsplit('}', 1)[-1]
+
+def _parse_transform(value: str) -> np.ndarray:
+    """
+    Parse a 3MF transform ("m00 m01 m02 m10 ... m32") into a 4x4 matrix for
+    row vectors: [x y z 1] @ matrix.
+    """
+    values = [float(v) for v in value.split()]
+    if len(values) != 12:
+        raise ValueError(f"Invalid 3MF transform: {value!r}")
+    matrix = np.eye(4)
+    matrix[:, :3] = np.array(values).reshape(4, 3)
+    return matrix
+
+def _normalize_part(name: str) -> str:
+    return name.lstrip('/')
+
+def _find_root_part(package: zipfile.ZipFile) -> str:
+    """Locate the root model part from the package relationships."""
+    names = set(package.namelist())
+    if '_rels/.rels' in names:
+        try:
+            rels = ET.fromstring(package.read('_rels/.rels'))
+            for rel in rels:
+                if rel.get('Type') == MODEL_RELATIONSHIP and rel.get('Target'):
+                    target = _normalize_part(rel.get('Target'))
+                    if target in names:
+                        return target
+        except ET.ParseError:
+            pass
+    if ROOT_MODEL_PART in names:
+        return ROOT_MODEL_PART
+    models = sorted(name for name in names if name.lower().endswith('.model'))
+    if not models:
+        raise ValueError("3MF package contains no model part")
+    return models[0]
+
+class _ModelPart:
+    """Objects, build items and metadata read from one model part."""
+
+    def __init__(self):
+        self.meshes = {}       # object id -> (vertices (n, 3) float64, triangles (m, 3) int64)
+        self.components = {}   # object id -> [(part or None, object id, transform or None)]
+        self.build_items = []  # [(object id, transform or None)]
+        self.metadata = {}     # <metadata name="..."> values
+
+def _parse_model_part(stream) -> _ModelPart:
+    """Stream one model part, collecting meshes without building a full element tree."""
+    part = _ModelPart()
+    vertices = triangles = None
+    object_id = None
+    container = None
+    tags = {}  # Full "{namespace}name" tag -> local name, cached per part
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = tags.get(elem.tag)
+        if tag is None:
+            tag = tags[elem.tag] = _local(elem.tag)
+
+        if event == 'end':
+            if tag == 'vertex':
+                attrib = elem.attrib
+                vertices.extend((float(attrib['x']), float(attrib['y']), float(attrib['z'])))
+                # Drop the finished child so memory stays flat however large the mesh is
+                container.clear()
+            elif tag == 'triangle':
+                attrib = elem.attrib
+                triangles.extend((int(attrib['v1']), int(attrib['v2']), int(attrib['v3'])))
+                container.clear()
+            elif tag == 'mesh':
+                part.meshes[object_id] = (
+                    np.frombuffer(vertices, dtype=np.float64).reshape(-1, 3),
+                    np.frombuffer(triangles, dtype=np.int64).reshape(-1, 3),
+                )
+                vertices = triangles = None
+                elem.clear()
+            elif tag == 'component':
+                path = next((value for name, value in elem.attrib.items() if _local(name) == 'path'), None)
+                transform = elem.get('transform')
+                part.components.setdefault(object_id, []).append(
+                    (_normalize_part(path) if path else None, elem.get('objectid'),
+                     _parse_transform(transform) if transform else None)
+                )
+            elif tag == 'item':
+                transform = elem.get('transform')
+                part.build_items.append((elem.get('objectid'), _parse_transform(transform) if transform else None))
+            elif tag == 'metadata' and elem.get('name'):
+                part.metadata[elem.get('name')] = (elem.text or '').strip()
+            elif tag == 'object':
+                object_id = None
+                elem.clear()
+        elif tag == 'object':
+            object_id = elem.get('id')
+        elif tag == 'mesh':
+            vertices, triangles = array('d'), array('q')
+        elif tag == 'vertices' or tag == 'triangles':
+            container = elem
+    return part
+
+def read_3mf_mesh(file_path: str) -> np.ndarray:
+    """
+    Read the triangles of every build item in a 3MF file, with transforms applied.
+
+    Returns:
+        float32 array of shape (n, 3, 3)
+
+    Raises:
+        ValueError: If the package or its model XML is malformed
+        OSError: If the file cannot be read
+    """
+    try:
+        with zipfile.ZipFile(file_path) as package:
+            root_part = _find_root_part(package)
+            parts = {}
+            for name in package.namelist():
+                if name.lower().endswith('.model'):
+                    with package.open(name) as stream:
+                        parts[name] = _parse_model_part(stream)
+    except (zipfile.BadZipFile, ET.ParseError, KeyError, TypeError, AttributeError) as e:
+        # KeyError: missing vertex/triangle attribute; AttributeError: vertex outside a mesh
+        raise ValueError(f"Not a valid 3MF file: {e!r}")
+
+    root = parts[root_part]
+    items = root.build_items or [(object_id, None) for object_id in root.meshes]
+    pieces = []
+    for object_id, transform in items:
+        _collect_triangles(parts, root_part, object_id, transform, pieces, depth=0)
+
+    if not pieces:
+        return np.zeros((0, 3, 3), dtype=np.float32)
+    return np.concatenate(pieces).astype(np.float32)
+
+def _collect_triangles(parts, part_name, object_id, transform, pieces, depth):
+    """Append the (transformed) triangles of an object and its components to pieces."""
+    if depth > 16:
+        raise ValueError("3MF components are nested too deeply (cycle?)")
+    part = parts.get(part_name)
+    if part is None:
+        raise ValueError(f"3MF component references missing part {part_name}")
+
+    if object_id in part.meshes:
+        vertices, triangles = part.meshes[object_id]
+        if len(triangles):
+            if triangles.min() < 0 or triangles.max() >= len(vertices):
+                raise ValueError(f"3MF object {object_id} has a triangle referencing a missing vertex")
+            if transform is not None:
+                vertices = vertices @ transform[:3, :3] + transform[3, :3]
+            pieces.append(vertices[triangles])
+
+    for child_part, child_id, child_transform in part.components.get(object_id, []):
+        combined = child_transform
+        if transform is not None:
+            combined = transform if combined is None else combined @ transform
+        _collect_triangles(parts, child_part or part_name, child_id, combined, pieces, depth + 1)
+
+def parse_duration_hours(value: str):
+    """Parse "1d 2h 3m 4s" (or plain seconds) into hours."""
+    value = value.strip()
+    if re.fullmatch(r'\d+(?:\.\d+)?', value):
+        return float(value) / 3600
+    units = {'d': 24.0, 'h': 1.0, 'm': 1 / 60, 's': 1 / 3600}
+    matches = _DURATION_RE.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in matches)
+
+def _first_number(value: str):
+    match = re.search(r'-?\d+(?:\.\d+)?', value or '')
+    return float(match.group()) if match else None
+
+def _read_slic3r_config(package, name) -> dict:
+    """Pull estimates from a PrusaSlicer-style "; key = value" config, streamed line by line."""
+    found = {}
+    with package.open(name) as stream:
+        for raw_line in stream:
+            line = raw_line.decode('utf-8', errors='replace').lstrip('; ').rstrip()
+            key, sep, value = line.partition(' = ')
+            if not sep:
+                continue
+            if key in SLIC3R_TIME_KEYS and 'print_time_hours' not in found:
+                hours = parse_duration_hours(value)
+                if hours:
+                    found['print_time_hours'] = round(hours, 3)
+            elif key in SLIC3R_WEIGHT_KEYS and 'filament_g' not in found:
+                grams = _first_number(value)
+                if grams:
+                    found['filament_g'] = grams
+            elif key in SLIC3R_LENGTH_KEYS and 'filament_m' not in found:
+                millimetres = _first_number(value)
+                if millimetres:
+                    found['filament_m'] = round(millimetres / 1000, 3)
+    return found
+
+def _read_bambu_slice_info(package) -> dict:
+    """Pull estimates from Bambu Studio / OrcaSlicer's slice_info.config (first plate)."""
+    found = {}
+    used_g = used_m = 0.0
+    with package.open(BAMBU_SLICE_INFO_PART) as stream:
+        for _, elem in ET.iterparse(stream, events=('end',)):
+            tag = _local(elem.tag)
+            if tag == 'metadata':
+                key, value = elem.get('key'), elem.get('value')
+                if key == 'prediction' and 'print_time_hours' not in found and _first_number(value):
+                    found['print_time_hours'] = round(float(value) / 3600, 3)
+                elif key == 'weight' and 'filament_g' not in found and _first_number(value):
+                    found['filament_g'] = float(value)
+            elif tag == 'filament':
+                used_g += _first_number(elem.get('used_g')) or 0
+                used_m += _first_number(elem.get('used_m')) or 0
+            elif tag == 'plate':
+                break  # Estimates are per plate; report the first
+    if 'filament_g' not in found and used_g:
+        found['filament_g'] = round(used_g, 2)
+    if used_m:
+        found['filament_m'] = round(used_m, 3)
+    return found
+
+def read_3mf_metadata(file_path: str) -> dict:
+    """
+    Read descriptive metadata and any embedded slicer estimates from a 3MF file.
+
+    Only the small metadata entries are read; mesh data is skipped.
+
+    Returns:
+        Dict with any of: application, title, print_time_hours, filament_g, filament_m
+
+    Raises:
+        ValueError: If the file is not a valid 3MF package
+        OSError: If the file cannot be read
+    """
+    metadata = {}
+    try:
+        with zipfile.ZipFile(file_path) as package:
+            names = set(package.namelist())
+            root_part = _find_root_part(package)
+
+            # Model-level <metadata> comes before <resources>; stop there
+            with package.open(root_part) as stream:
+                for event, elem in ET.iterparse(stream, events=('start', 'end')):
+                    tag = _local(elem.tag)
+                    if event == 'start' and tag == 'resources':
+                        break
+                    if event == 'end' and tag == 'metadata':
+                        name = (elem.get('name') or '').lower()
+                        if name in ('application', 'title') and elem.text:
+                            metadata[name] = elem.text.strip()
+
+            if BAMBU_SLICE_INFO_PART in names:
+                metadata.update(_read_bambu_slice_info(package))
+            for name in SLIC3R_CONFIG_PARTS:
+                if name in names:
+                    for key, value in _read_slic3r_config(package, name).items():
+                        metadata.setdefault(key, value)
+    except (zipfile.BadZipFile, ET.ParseError) as e:
+        raise ValueError(f"Not a valid 3MF file: {e}")
+    return metadata
@@ -1,48 +1,107 @@
 # app/services/thumbnail_service.py
+"""
+Thumbnail generation for uploaded 3D models.
 
-# Placeholder for thumbnail generation logic
-# (e.g., using Trimesh)
-
-# import trimesh
-# import os
-# from flask import current_app
-
-# def generate_thumbnail(file_path, job_id):
-#     """Generates a thumbnail for the given 3D file and saves it."""
-#     try:
-#         # Ensure the file exists
-#         if not os.path.exists(file_path):
-#             current_app.logger.error(f"Thumbnail generation: File not found at {file_path}")
-#             return None
-
-#         mesh = trimesh.load_mesh(file_path)
-        
-#         # Ensure mesh is not empty or invalid
-#         if mesh.is_empty or not mesh.is_watertight: # Basic checks
-#             current_app.logger.warning(f"Thumbnail generation: Mesh is empty or not watertight for {file_path}")
-#             # Could attempt to fix or just skip thumbnail
-
-#         scene = mesh.scene()
-        
-#         # Get thumbnail directory from config
-#         thumbnail_dir = os.path.join(current_app.config['STORAGE_PATH'], 'thumbnails')
-#         if not os.path.exists(thumbnail_dir):
-#             os.makedirs(thumbnail_dir)
-        
-#         thumbnail_filename = f"{job_id}.png"
-#         thumbnail_save_path = os.path.join(thumbnail_dir, thumbnail_filename)
-        
-#         # Save the scene as a PNG
-#         png_bytes = scene.save_image(resolution=(300, 300)) # Adjust resolution as needed
-#         with open(thumbnail_save_path, 'wb') as f:
-#             f.write(png_bytes)
-        
-#         current_app.logger.info(f"Thumbnail generated for {job_id} at {thumbnail_save_path}")
-#         return thumbnail_filename # Or full path, depending on how it will be used
-        
-#     except Exception as e:
-#         current_app.logger.error(f"Error generating thumbnail for {file_path}: {e}")
-#         return None
-
-# print("thumbnail_service.py loaded (placeholder).") # Debug
-pass 
\ No newline at end of file
+Thumbnails are rendered off the request path in the shared worker pool with
+the NumPy software rasterizer in mesh_render (no OpenGL or display needed) and
+cached as storage/thumbnails/<file_hash>.png. Because they are keyed by the
+content hash rather than the job or its current path, a file moving through
+the status directories (or an identical resubmission) never triggers a
+re-render, and the image can be served with long-lived cache headers.
+"""
+import logging
+import os
+from functools import partial
+from flask import current_app
+from app.services.blob_service import blob_path
+from app.services.mesh_loader import load_mesh
+from app.services.mesh_render import render_png
+from app.services.worker_pool import InFlightTasks
+
+logger = logging.getLogger(__name__)
+
+_tasks = InFlightTasks()  # Keyed by file hash
+_failed = set()           # Hashes that could not be rendered; not retried until restart
+
+def get_thumbnail_dir() -> str:
+    """Get the thumbnail cache directory (storage/thumbnails)."""
+    storage_root = current_app.config.get('APP_STORAGE_ROOT')
+    if not storage_root:
+        raise ValueError("APP_STORAGE_ROOT not configured")
+    return os.path.join(storage_root, 'thumbnails')
+
+def thumbnail_path(file_hash: str) -> str:
+    """Get the cached thumbnail path for a file hash."""
+    return os.path.join(get_thumbnail_dir(), f"{file_hash}.png")
+
+def has_thumbnail(file_hash: str) -> bool:
+    """Check whether a thumbnail has been rendered for a file hash."""
+    return bool(file_hash) and os.path.exists(thumbnail_path(file_hash))
+
+def render_thumbnail(source_path: str, dest_path: str, size: int, file_type: str = None) -> str:
+    """
+    Render a PNG thumbnail of a model file. Runs in a worker process.
+
+    The image is written to a temp file and renamed into place so readers never
+    see a partial PNG.
+
+    Args:
+        source_path: Path to the STL/OBJ/3MF file
+        dest_path: Where to write the PNG
+        size: Width and height in pixels
+        file_type: Model extension, e.g. ".stl" (needed for extensionless blobs)
+
+    Returns:
+        dest_path
+
+    Raises:
+        ValueError: If the model format is unsupported or malformed
+        OSError: If the model cannot be read or the PNG written
+    """
+    png_bytes = render_png(load_mesh(source_path, file_type), size)
+
+    temp_path = f"{dest_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(png_bytes)
+    os.replace(temp_path, dest_path)
+    return dest_path
+
+def queue_thumbnail(file_hash: str, source_path: str = None, file_type: str = None):
+    """
+    Queue a thumbnail render for a file if one is not cached or already queued.
+
+    Renders from the blob (whose path never changes) when it exists, otherwise
+    from source_path.
+
+    Args:
+        file_hash: SHA-256 of the model file
+        source_path: Path to the model file (see FileService.model_source)
+        file_type: Model extension, e.g. ".stl" (default: source_path's extension)
+
+    Returns:
+        Future for the render, or None if nothing was queued
+    """
+    if not file_hash or has_thumbnail(file_hash):
+        return None
+
+    if not file_type and source_path:
+        file_type = os.path.splitext(source_path)[1]
+    source = blob_path(file_hash)
+    if not os.path.exists(source):
+        source = source_path
+    if not source or not os.path.exists(source):
+        return None
+
+    if file_hash in _failed:
+        return None
+    return _tasks.submit(file_hash, render_thumbnail, source, thumbnail_path(file_hash),
+                         current_app.config.get('THUMBNAIL_SIZE', 300), file_type,
+                         on_done=partial(_on_rendered, file_hash))
+
+def _on_rendered(file_hash, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        _failed.add(file_hash)
+        logger.warning(f"Thumbnail generation failed for {file_hash[:12]}: {error}")
@@ -0,0 +1,117 @@
+# app/services/worker_pool.py
+"""
+Shared process pool for CPU-heavy background work (thumbnail rendering, mesh
+analysis).
+
+Tasks run in separate processes so they neither block request threads nor
+compete with them for the GIL. Task functions must be importable top-level
+functions that take plain arguments (paths, numbers) and do not need the Flask
+app; results come back through the returned Future. InFlightTasks keeps a
+service from queueing the same work twice while it is still running.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+class WorkerPool:
+    """Lazily started ProcessPoolExecutor that is rebuilt if a worker process dies."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn rather than fork: the parent runs threads (email outbox,
+                    # request threads) that must not be copied mid-operation
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker process.
+
+        Returns:
+            concurrent.futures.Future for the result
+        """
+        try:
+            return self._get_executor().submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            logger.warning("Worker process pool was broken; starting a new one")
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes (pending tasks are cancelled)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+def init_worker_pool(app):
+    """Create the shared worker pool; processes start with the first submitted task."""
+    pool = WorkerPool(max_workers=app.config.get('WORKER_PROCESSES', 2))
+    app.extensions['worker_pool'] = pool
+    atexit.register(pool.shutdown, wait=False)
+
+def submit_task(fn, *args, **kwargs):
+    """Submit a task to the current app's worker pool (see WorkerPool.submit)."""
+    return current_app.extensions['worker_pool'].submit(fn, *args, **kwargs)
+
+class InFlightTasks:
+    """Pool tasks keyed by what they work on (a job id, a file hash), at most one per key at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = set()
+
+    def submit(self, key, fn, *args, on_done=None):
+        """
+        Submit fn(*args) to the current app's worker pool unless a task for key is still running.
+
+        Args:
+            key: What the task works on
+            fn: Task function (see WorkerPool.submit)
+            on_done: Optional callable run with the finished Future; key is
+                released after it returns, so no duplicate is queued before
+                its result is saved
+
+        Returns:
+            Future for the task, or None if one for key is already in flight
+        """
+        with self._lock:
+            if key in self._keys:
+                return None
+            self._keys.add(key)
+        try:
+            future = submit_task(fn, *args)
+        except Exception:
+            self._release(key)
+            raise
+        future.add_done_callback(partial(self._finished, key, on_done))
+        return future
+
+    def _finished(self, key, on_done, future):
+        try:
+            if on_done is not None:
+                on_done(future)
+        finally:
+            self._release(key)
+
+    def _release(self, key):
+        with self._lock:
+            self._keys.discard(key)
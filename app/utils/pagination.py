@@ -0,0 +1,102 @@
+# app/utils/pagination.py
+"""
+Keyset (cursor-based) pagination for job lists.
+
+Jobs are ordered newest first by (created_at, id). A cursor encodes the sort key
+of a boundary row, so each page is fetched with an indexed range condition
+instead of OFFSET and costs the same no matter how deep into the list it is.
+
+The range condition is written as a row-value comparison, (created_at, id) < (?, ?),
+so SQLite can seek directly into ix_jobs_status_created_at_id; the equivalent
+OR-expanded form only uses the index for the status prefix.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+from sqlalchemy import tuple_
+from app.models.job import Job
+
+@dataclass
+class KeysetPage:
+    """One page of results plus the cursors needed to reach its neighbours."""
+    items: list = field(default_factory=list)
+    next_cursor: str = None
+    prev_cursor: str = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+def encode_cursor(job) -> str:
+    """Encode a job's (created_at, id) sort key as an opaque URL-safe string."""
+    raw = f"{job.created_at.isoformat()}|{job.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at_raw, job_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at_raw), job_id
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def paginate_jobs(query, page_size: int, after: str = None, before: str = None) -> KeysetPage:
+    """
+    Fetch one page of jobs from a filtered query, newest first.
+
+    Args:
+        query: Job query with filters applied but no ordering
+        page_size: Maximum number of jobs to return
+        after: Cursor of the last job on the previous page (fetch older jobs)
+        before: Cursor of the first job on the following page (fetch newer jobs)
+
+    Returns:
+        KeysetPage with the jobs and next/prev cursors (None where no page exists)
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    if before:
+        created_at, job_id = decode_cursor(before)
+        rows = (query
+                .filter(tuple_(Job.created_at, Job.id) > tuple_(created_at, job_id))
+                .order_by(Job.created_at.asc(), Job.id.asc())
+                .limit(page_size + 1)
+                .all())
+        has_more = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        page = KeysetPage(items=items)
+        if items:
+            page.next_cursor = encode_cursor(items[-1])
+            if has_more:
+                page.prev_cursor = encode_cursor(items[0])
+        return page
+
+    if after:
+        created_at, job_id = decode_cursor(after)
+        query = query.filter(tuple_(Job.created_at, Job.id) < tuple_(created_at, job_id))
+
+    rows = (query
+            .order_by(Job.created_at.desc(), Job.id.desc())
+            .limit(page_size + 1)
+            .all())
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+    page = KeysetPage(items=items)
+    if items:
+        if has_more:
+            page.next_cursor = encode_cursor(items[-1])
+        if after:
+            page.prev_cursor = encode_cursor(items[0])
+    return page
@@ -0,0 +1,114 @@
+# app/utils/uploads.py
+"""
+Streaming upload handling.
+
+Werkzeug normally spools each uploaded file into a temporary file, after which
+the app copies it again into storage. UploadRequest replaces that spool with a
+HashingUploadStream that writes the upload directly into storage/Uploaded while
+computing its SHA-256 and enforcing the size limit, so saving the file is a
+single atomic rename.
+"""
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+TEMP_UPLOAD_PREFIX = '.upload-'  # Partially received uploads; never a job's file
+TEMP_UPLOAD_SUFFIX = '.part'
+
+class HashingUploadStream:
+    """
+    Writable/readable temp file in the destination directory that hashes and
+    counts bytes as they arrive.
+
+    Raises RequestEntityTooLarge from write() as soon as max_bytes is crossed,
+    so an oversized upload is rejected without reading the rest of the body.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_UPLOAD_PREFIX, suffix=TEMP_UPLOAD_SUFFIX)
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.committed = False
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.discard()
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self) -> str:
+        """SHA-256 of everything written so far."""
+        return self._hash.hexdigest()
+
+    def commit(self, destination: str):
+        """
+        Atomically move the received file to its final path.
+
+        Raises:
+            OSError: If the rename fails
+        """
+        self._file.flush()
+        self._file.close()
+        os.replace(self.temp_path, destination)
+        self.committed = True
+
+    def discard(self):
+        """Close and delete the temp file if it was never committed."""
+        if self.committed:
+            return
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            current_app.logger.warning(f"Could not remove partial upload {self.temp_path}: {str(e)}")
+
+    def close(self):
+        # Werkzeug closes request files at the end of the request; anything not
+        # committed by then is an abandoned upload
+        self.discard()
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, etc. go to the underlying file
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+class UploadRequest(Request):
+    """Request class that streams file uploads straight into storage/Uploaded."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        storage_root = current_app.config.get('APP_STORAGE_ROOT')
+        if not storage_root or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        uploaded_dir = os.path.join(storage_root, 'Uploaded')
+        os.makedirs(uploaded_dir, exist_ok=True)
+
+        max_bytes = current_app.config.get('MAX_UPLOAD_SIZE_MB', 50) * 1024 * 1024
+        stream = HashingUploadStream(uploaded_dir, max_bytes=max_bytes)
+        self._upload_streams.append(stream)
+        return stream
+
+    @property
+    def _upload_streams(self) -> list:
+        streams = self.__dict__.get('_upload_stream_list')
+        if streams is None:
+            streams = self.__dict__['_upload_stream_list'] = []
+        return streams
+
+    def close(self):
+        super().close()
+        # Also covers uploads abandoned mid-parse (client disconnect, size limit)
+        for stream in self._upload_streams:
+            stream.discard()
@@ -0,0 +1,45 @@
+"""Add job_status_counts summary table
+
+Revision ID: 333b6dfc5686
+Revises: d5801dda108d
+Create Date: 2025-06-02 10:14:37.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '333b6dfc5686'
+down_revision = 'd5801dda108d'
+branch_labels = None
+depends_on = None
+
+JOB_STATUSES = ['UPLOADED', 'PENDING', 'READYTOPRINT', 'PRINTING', 'COMPLETED', 'PAIDPICKEDUP', 'REJECTED']
+
+
+def upgrade():
+    op.create_table('job_status_counts',
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+
+    # Backfill from the existing jobs table
+    op.execute(
+        "INSERT INTO job_status_counts (status, count, updated_at) "
+        "SELECT status, COUNT(*), CURRENT_TIMESTAMP FROM jobs GROUP BY status"
+    )
+
+    # Make sure every known status has a row so transitions only ever UPDATE
+    for status in JOB_STATUSES:
+        op.execute(
+            "INSERT INTO job_status_counts (status, count, updated_at) "
+            f"SELECT '{status}', 0, CURRENT_TIMESTAMP "
+            f"WHERE NOT EXISTS (SELECT 1 FROM job_status_counts WHERE status = '{status}')"
+        )
+
+
+def downgrade():
+    op.drop_table('job_status_counts')
@@ -0,0 +1,32 @@
+"""Add job lookup indexes
+
+Revision ID: e00f5205485f
+Revises: 333b6dfc5686
+Create Date: 2025-06-03 09:41:12.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e00f5205485f'
+down_revision = '333b6dfc5686'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dashboard lists filter on status and page newest-first by (created_at, id);
+    # the same index also covers the per-status GROUP BY recount.
+    op.create_index('ix_jobs_status_created_at_id', 'jobs', ['status', 'created_at', 'id'], unique=False)
+    # Looking up a student's submissions
+    op.create_index('ix_jobs_student_email', 'jobs', ['student_email'], unique=False)
+    # "Recently changed" scans
+    op.create_index('ix_jobs_updated_at', 'jobs', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_updated_at', table_name='jobs')
+    op.drop_index('ix_jobs_student_email', table_name='jobs')
+    op.drop_index('ix_jobs_status_created_at_id', table_name='jobs')
@@ -0,0 +1,24 @@
+# tests/conftest.py
+import tempfile
+import pytest
+from app import create_app
+from app.extensions import db
+
+@pytest.fixture
+def app():
+    """Testing app on an in-memory database with empty status directories."""
+    app = create_app('testing')
+    app.config['APP_STORAGE_ROOT'] = tempfile.mkdtemp()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def staff_client(app):
+    """Test client logged in as staff."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['staff_logged_in'] = True
+    return client
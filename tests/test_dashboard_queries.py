@@ -0,0 +1,66 @@
+# tests/test_dashboard_queries.py
+"""
+Query budget for the staff dashboard list.
+
+The list is rendered on every tab switch and refresh, so it must stay at a
+fixed number of statements however many jobs or pending moves there are: one
+for the page of jobs (with their move state) and one for the status counts.
+"""
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app.extensions import db
+from app.models.file_move import FileMove
+from app.models.job import Job
+from app.services.stats_service import record_status_change
+
+MAX_DASHBOARD_STATEMENTS = 2
+
+def make_job(status: str, created_at: datetime) -> Job:
+    job_id = str(uuid.uuid4())
+    return Job(id=job_id, student_name='Test Student', student_email='student@example.com',
+               original_filename='part.stl', display_name=f'{job_id[:8]}.stl',
+               file_path=f'/nonexistent/{status}/{job_id[:8]}.stl', status=status,
+               printer='prusa_mk4s', color='blue', created_at=created_at)
+
+@pytest.fixture
+def seeded_jobs(app):
+    """Jobs in several statuses; a few UPLOADED ones have unfinished file moves."""
+    start = datetime(2025, 1, 1)
+    jobs = [make_job(status, start + timedelta(minutes=i))
+            for i, status in enumerate(['UPLOADED'] * 30 + ['PENDING'] * 10 + ['COMPLETED'] * 5)]
+    db.session.add_all(jobs)
+    for job in jobs:
+        record_status_change(None, job.status)
+    db.session.flush()
+    for job, move_status in zip(jobs[:2], ['QUEUED', 'FAILED']):
+        db.session.add(FileMove(job_id=job.id, source_path='/nonexistent/a.stl', dest_path=job.file_path,
+                                status=move_status, next_attempt_at=start))
+    db.session.commit()
+    db.session.remove()  # Requests start with an empty identity map, as in production
+    return jobs
+
+@pytest.fixture
+def statements(app):
+    """List of SQL statements executed while the fixture is active."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_dashboard_list_statement_budget(staff_client, seeded_jobs, statements):
+    response = staff_client.get('/dashboard/?status=UPLOADED')
+
+    assert response.status_code == 200
+    assert len(statements) <= MAX_DASHBOARD_STATEMENTS, '\n\n'.join(statements)
+
+def test_dashboard_list_shows_move_state(staff_client, seeded_jobs):
+    response = staff_client.get('/dashboard/?status=UPLOADED')
+
+    assert b'File move pending' in response.data
+    assert b'File move failed' in response.data
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark email template rendering for digest/reminder-sized runs.
+
+Reports:
+  - one-time compile cost of the email templates from source
+  - load cost from the on-disk bytecode cache (what a restarted process pays)
+  - per-message render cost (HTML + text) through email_service.render_email
+  - for comparison, the cost if templates were compiled on every message
+
+Usage:
+    python tools/bench_email_templates.py
+    python tools/bench_email_templates.py --messages 10000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_jobs(count):
+    """Lightweight stand-ins with the attributes the email templates use."""
+    return [
+        SimpleNamespace(
+            id=f'{i:08x}-0000-4000-8000-000000000000', student_name=f'Student {i}',
+            student_email=f'student{i}@lsu.edu', display_name=f'Student{i}_Filament_Blue_{i:08x}.stl',
+            printer='prusa_mk4s', color='blue', material='PLA', weight_g=42.5, time_hours=3.2,
+            cost_usd=Decimal('4.25'), confirm_token=f'token-{i}', created_at=datetime(2025, 5, 1),
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email template rendering")
+    parser.add_argument('--messages', type=int, default=5000, help='Messages per template (default: 5000)')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from jinja2 import Environment, FileSystemBytecodeCache
+    from app import create_app
+    from app.services.email_service import EMAIL_TEMPLATES, render_email, build_approval_email
+
+    app = create_app('testing')
+    template_names = [f'email/{name}.{ext}' for name in EMAIL_TEMPLATES for ext in ('html', 'txt')]
+    cache_dir = tempfile.mkdtemp(prefix='bench_email_templates_')
+
+    try:
+        # Compile from source into a fresh environment (and populate the bytecode cache)
+        env = Environment(loader=app.jinja_loader, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+        started = time.perf_counter()
+        for name in template_names:
+            env.get_template(name)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        # Load the same templates into another fresh environment from the bytecode cache
+        env = Environment(loader=app.jinja_loader, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+        started = time.perf_counter()
+        for name in template_names:
+            env.get_template(name)
+        cached_ms = (time.perf_counter() - started) * 1000
+
+        print(f"Templates: {len(template_names)} ({', '.join(EMAIL_TEMPLATES)} x html/txt)")
+        print(f"  compile from source:      {compile_ms:8.2f} ms (once per process without a cache)")
+        print(f"  load from bytecode cache: {cached_ms:8.2f} ms (once per process with the cache)\n")
+
+        jobs = make_jobs(args.messages)
+        with app.app_context():
+            print(f"Per-message render cost over {args.messages:,} messages (HTML + text):")
+            for template_name in EMAIL_TEMPLATES:
+                started = time.perf_counter()
+                for job in jobs:
+                    if template_name == 'approval':
+                        build_approval_email(job)
+                    elif template_name == 'rejection':
+                        render_email('rejection', job=job, rejection_reasons=['Walls too thin', 'Model not properly scaled'])
+                    else:
+                        render_email(template_name, job=job)
+                elapsed = time.perf_counter() - started
+                print(f"  {template_name:<11} {elapsed / len(jobs) * 1e6:8.1f} us/message  "
+                      f"({len(jobs) / elapsed:,.0f} messages/s)")
+
+            # Baseline: what it would cost to compile the template for every message
+            sample = jobs[:min(len(jobs), 200)]
+            sources = {
+                ext: app.jinja_loader.get_source(app.jinja_env, f'email/completion.{ext}')[0]
+                for ext in ('html', 'txt')
+            }
+            started = time.perf_counter()
+            for job in sample:
+                for ext in ('html', 'txt'):
+                    app.jinja_env.from_string(sources[ext]).render(job=job)
+            elapsed = time.perf_counter() - started
+            print(f"\n  completion compiled per message (baseline): {elapsed / len(sample) * 1e6:8.1f} us/message")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
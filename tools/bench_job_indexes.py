@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark dashboard job queries before and after the job lookup indexes.
+
+Seeds a throwaway SQLite database with N jobs (default 200,000), migrates it to the
+revision just before the indexes were added, reports query plans and latencies,
+then upgrades to head and reports them again.
+
+Usage:
+    python tools/bench_job_indexes.py
+    python tools/bench_job_indexes.py --jobs 50000 --repeat 10
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = PROJECT_ROOT / 'migrations'
+REVISION_BEFORE_INDEXES = '333b6dfc5686'
+
+# Rough semester-end distribution: most jobs are finished or rejected
+STATUS_WEIGHTS = {
+    'UPLOADED': 2, 'PENDING': 2, 'READYTOPRINT': 2, 'PRINTING': 1,
+    'COMPLETED': 3, 'PAIDPICKEDUP': 70, 'REJECTED': 20,
+}
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f' # Matches how SQLAlchemy stores DateTime in SQLite
+
+
+def seed_jobs(db_path, job_count):
+    """Insert job_count synthetic jobs directly with sqlite3 (much faster than the ORM)."""
+    rng = random.Random(42)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    start = datetime(2022, 8, 15)
+    students = [f'student{i}@lsu.edu' for i in range(5000)]
+
+    conn = sqlite3.connect(db_path)
+    batch = []
+    for i in range(job_count):
+        created = start + timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600))
+        updated = created + timedelta(hours=rng.randint(0, 24 * 14))
+        job_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        batch.append((
+            job_id, 'Student Name', rng.choice(students), 'model.stl', f'Student_Filament_Blue_{job_id[:8]}.stl',
+            f'/storage/Uploaded/{job_id[:8]}.stl', rng.choices(statuses, weights)[0], 'prusa_mk4s', 'blue',
+            0, created.strftime(TIMESTAMP_FORMAT), updated.strftime(TIMESTAMP_FORMAT),
+        ))
+        if len(batch) >= 10000:
+            _insert_batch(conn, batch)
+            batch = []
+    if batch:
+        _insert_batch(conn, batch)
+
+    # The migration backfills counts only for existing rows, so refresh them here
+    conn.execute("DELETE FROM job_status_counts")
+    conn.execute("INSERT INTO job_status_counts (status, count, updated_at) "
+                 "SELECT status, COUNT(*), CURRENT_TIMESTAMP FROM jobs GROUP BY status")
+    conn.commit()
+    conn.close()
+
+
+def _insert_batch(conn, batch):
+    conn.executemany(
+        "INSERT INTO jobs (id, student_name, student_email, original_filename, display_name, file_path, "
+        "status, printer, color, student_confirmed, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        batch,
+    )
+
+
+def build_queries(db_path):
+    """Return (name, sql, params) for the dashboard's real access patterns."""
+    conn = sqlite3.connect(db_path)
+    # A cursor roughly halfway through the largest status, as a deep "Older" page would use
+    deep = conn.execute(
+        "SELECT created_at, id FROM jobs WHERE status = 'PAIDPICKEDUP' ORDER BY created_at DESC, id DESC "
+        "LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM jobs WHERE status = 'PAIDPICKEDUP')"
+    ).fetchone()
+    email = conn.execute("SELECT student_email FROM jobs LIMIT 1").fetchone()[0]
+    recent = conn.execute("SELECT MAX(updated_at) FROM jobs").fetchone()[0]
+    conn.close()
+
+    recent_cutoff = (datetime.strptime(recent, TIMESTAMP_FORMAT) - timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+
+    return [
+        ("first page (UPLOADED)",
+         "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC, id DESC LIMIT 51",
+         ('UPLOADED',)),
+        ("first page (PAIDPICKEDUP)",
+         "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC, id DESC LIMIT 51",
+         ('PAIDPICKEDUP',)),
+        ("deep cursor page (PAIDPICKEDUP)",
+         "SELECT * FROM jobs WHERE status = ? AND (created_at, id) < (?, ?) "
+         "ORDER BY created_at DESC, id DESC LIMIT 51",
+         ('PAIDPICKEDUP', deep[0], deep[1])),
+        ("status histogram recount",
+         "SELECT status, COUNT(id) FROM jobs GROUP BY status",
+         ()),
+        ("jobs by student email",
+         "SELECT * FROM jobs WHERE student_email = ? ORDER BY created_at DESC",
+         (email,)),
+        ("recently updated jobs",
+         "SELECT * FROM jobs WHERE updated_at > ? ORDER BY updated_at DESC",
+         (recent_cutoff,)),
+    ]
+
+
+def run_queries(db_path, queries, repeat):
+    """Print the query plan and latency stats for every query; return median latencies."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("ANALYZE")
+    medians = {}
+    for name, sql, params in queries:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        medians[name] = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"  {name}")
+        print(f"    plan:   {' | '.join(plan)}")
+        print(f"    median: {medians[name]:.2f} ms   p95: {p95:.2f} ms")
+    conn.close()
+    return medians
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark job queries before/after lookup indexes")
+    parser.add_argument('--jobs', type=int, default=200000, help='Number of jobs to seed (default: 200000)')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per query (default: 20)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_job_indexes_')
+    db_path = os.path.join(workdir, 'bench.db')
+
+    # Must be set before the app config module is imported
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + db_path
+    os.environ['APP_STORAGE_ROOT'] = os.path.join(workdir, 'storage')
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    from flask_migrate import upgrade
+    from app import create_app
+
+    app = create_app('development')
+    try:
+        with app.app_context():
+            upgrade(directory=str(MIGRATIONS_DIR), revision=REVISION_BEFORE_INDEXES)
+
+        print(f"Seeding {args.jobs:,} jobs...")
+        started = time.perf_counter()
+        seed_jobs(db_path, args.jobs)
+        print(f"Seeded in {time.perf_counter() - started:.1f} s\n")
+
+        queries = build_queries(db_path)
+
+        print("BEFORE indexes")
+        before = run_queries(db_path, queries, args.repeat)
+
+        with app.app_context():
+            upgrade(directory=str(MIGRATIONS_DIR), revision='head')
+
+        print("\nAFTER indexes")
+        after = run_queries(db_path, queries, args.repeat)
+
+        print("\nSummary (median latency)")
+        for name, _, _ in queries:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"  {name:<34} {before[name]:>9.2f} ms -> {after[name]:>8.2f} ms  ({speedup:.1f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
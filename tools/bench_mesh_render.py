@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy thumbnail renderer (app/services/mesh_render.py).
+
+Generates sphere meshes from 10k to 2M triangles, writes each as a binary STL,
+and times loading (mesh_loader.load_mesh), rasterizing (render_mesh) and PNG
+encoding separately. The target is under 1 s end to end for typical student
+models (up to a few hundred thousand triangles).
+
+Usage:
+    python tools/bench_mesh_render.py
+    python tools/bench_mesh_render.py --triangles 10000 500000 --size 300 --repeat 5 --keep
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SIZES = [10_000, 50_000, 200_000, 500_000, 1_000_000, 2_000_000]
+TARGET_SECONDS = 1.0
+
+
+def sphere_triangles(count):
+    """UV sphere (radius 50mm) with approximately count triangles."""
+    steps = max(2, int(np.sqrt(count / 2)))
+    theta = np.linspace(0, np.pi, steps + 1)
+    phi = np.linspace(0, 2 * np.pi, steps + 1)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    grid = 50 * np.stack([np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t) + 1], axis=-1)
+    a, b, c, d = grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]
+    return np.concatenate([
+        np.stack([a, b, c], axis=-2).reshape(-1, 3, 3),
+        np.stack([a, c, d], axis=-2).reshape(-1, 3, 3),
+    ]).astype(np.float32)
+
+
+def write_binary_stl(path, triangles):
+    from app.services.mesh_loader import STL_RECORD_DTYPE
+    records = np.zeros(len(triangles), dtype=STL_RECORD_DTYPE)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(b'bench_mesh_render'.ljust(80, b' '))
+        f.write(np.uint32(len(triangles)).tobytes())
+        f.write(records.tobytes())
+
+
+def timed(fn, repeat):
+    """Run fn repeat times; return (median seconds, last result)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy thumbnail renderer")
+    parser.add_argument('--triangles', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Approximate triangle counts to test')
+    parser.add_argument('--size', type=int, default=300, help='Thumbnail width/height in pixels (default: 300)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the median is reported (default: 3)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated STLs and PNGs and print their location')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from app.services.mesh_loader import load_mesh
+    from app.services.mesh_render import render_mesh, encode_png
+
+    work_dir = tempfile.mkdtemp(prefix='bench_mesh_render_')
+    try:
+        print(f"{'triangles':>10}  {'load':>9}  {'render':>9}  {'png':>8}  {'total':>9}")
+        for count in args.triangles:
+            triangles = sphere_triangles(count)
+            stl_path = os.path.join(work_dir, f'sphere_{len(triangles)}.stl')
+            write_binary_stl(stl_path, triangles)
+
+            load_s, mesh = timed(lambda: load_mesh(stl_path), args.repeat)
+            render_s, image = timed(lambda: render_mesh(mesh, args.size), args.repeat)
+            png_s, png = timed(lambda: encode_png(image), args.repeat)
+            total = load_s + render_s + png_s
+
+            flag = '' if total < TARGET_SECONDS else '  (over 1 s target)'
+            print(f"{len(triangles):>10,}  {load_s * 1000:7.1f}ms  {render_s * 1000:7.1f}ms  "
+                  f"{png_s * 1000:6.1f}ms  {total * 1000:7.1f}ms{flag}")
+
+            if args.keep:
+                with open(stl_path[:-4] + '.png', 'wb') as f:
+                    f.write(png)
+    finally:
+        if args.keep:
+            print(f"\nFiles kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
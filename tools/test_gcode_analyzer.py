@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the sliced G-code analyzer (app/services/gcode_analyzer.py)
+
+Checks that slicer estimates are read from PrusaSlicer, Cura, Bambu Studio
+and Simplify3D comments, that simulated times and extrusion match hand
+calculations (acceleration, arcs, relative/absolute extrusion, G92 resets),
+that the bulk block parser agrees with the line-by-line fallback, and that
+.gcode.3mf packages are read. Prints simulation throughput in MB per second.
+
+Usage:
+    python tools/test_gcode_analyzer.py
+    python tools/test_gcode_analyzer.py --megabytes 200
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.gcode_analyzer import (
+    HEADER_BYTES, _parse_block, _parse_lines, analyze_gcode, analyze_sliced_file, simulate_gcode
+)
+
+
+def assert_close(actual, expected, tolerance, what):
+    assert abs(actual - expected) <= tolerance, f"{what}: {actual} != {expected}"
+
+
+def layer_moves(layers, rng, extrusion='relative'):
+    """Generate PrusaSlicer/Cura-like perimeter and infill moves without estimate comments."""
+    lines = ["G90", "M83" if extrusion == 'relative' else "M82", "G28 W", "G92 E0", "M204 P1250"]
+    e = 0.0
+    for layer in range(layers):
+        lines.append(f";LAYER_CHANGE\n;Z:{layer * 0.2 + 0.2:.1f}\nG1 Z{layer * 0.2 + 0.2:.3f} F720")
+        if extrusion == 'absolute':
+            lines.append("G92 E0")
+            e = 0.0
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 400))
+        xs, ys = 125 + 40 * np.cos(angles), 105 + 40 * np.sin(angles)
+        lines.append(f"G1 X{xs[0]:.3f} Y{ys[0]:.3f} F9000")
+        lines.append("G1 F2700")
+        for x, y in zip(xs[1:], ys[1:]):
+            amount = 0.02 + rng.random() * 0.01
+            e += amount
+            lines.append(f"G1 X{x:.3f} Y{y:.3f} E{amount if extrusion == 'relative' else e:.5f}")
+        lines.append("G1 E-.8 F2100 ; retract\nG1 E.8")
+        if extrusion == 'absolute':
+            lines[-1] = f"G1 E{e - 0.8:.5f} F2100\nG1 E{e:.5f}"
+    return "\n".join(lines) + "\n"
+
+
+def test_gcode_analyzer(megabytes):
+    """Run header, simulation and parser checks, then the throughput check."""
+    passed = 0
+    failed = 0
+    work_dir = tempfile.mkdtemp(prefix='test_gcode_analyzer_')
+    rng = np.random.default_rng(7)
+
+    print("Testing sliced G-code analyzer...")
+    print("=" * 50)
+
+    def prusaslicer_footer():
+        # Estimates sit after the moves, past the header window
+        body = layer_moves(60, rng)
+        assert len(body) > HEADER_BYTES, "test file too small to exercise the footer read"
+        text = ("; generated by PrusaSlicer 2.7.1+win64 on 2024-02-01 at 10:00:00 UTC\n" + body +
+                "; filament used [mm] = 1234.56\n; filament used [g] = 3.68\n"
+                "; estimated printing time (normal mode) = 1h 2m 3s\n"
+                "; prusaslicer_config = begin\n; filament_diameter = 1.75\n; prusaslicer_config = end\n").encode()
+        result = analyze_gcode(io.BytesIO(text), len(text))
+        assert result['source'] == 'slicer', result
+        assert result['application'] == 'PrusaSlicer 2.7.1+win64', result['application']
+        assert_close(result['print_time_hours'], 1 + 2 / 60 + 3 / 3600, 1e-9, "time")
+        assert_close(result['filament_mm'], 1234.56, 1e-9, "length")
+        assert_close(result['filament_g'], 3.68, 1e-9, "weight")
+
+    def cura_and_others_header():
+        cura = b";FLAVOR:Marlin\n;TIME:5400\n;Filament used: 2.5m\n;Generated with Cura_SteamEngine 5.4.0\nG1 X1\n"
+        result = analyze_gcode(io.BytesIO(cura), len(cura), density_g_cm3=1.24)
+        assert_close(result['print_time_hours'], 1.5, 1e-9, "Cura time")
+        assert_close(result['filament_mm'], 2500, 1e-9, "Cura length")
+        assert_close(result['filament_g'], 2500 * math.pi * 0.875 ** 2 / 1000 * 1.24, 1e-9, "Cura weight")
+
+        bambu = (b"; HEADER_BLOCK_START\n; model printing time: 1h 22m 5s; total estimated time: 1h 28m 13s\n"
+                 b"; total filament length [mm] : 3226.85\n; total filament weight [g] : 9.62\n; HEADER_BLOCK_END\n")
+        result = analyze_gcode(io.BytesIO(bambu), len(bambu))
+        assert_close(result['print_time_hours'], 1 + 28 / 60 + 13 / 3600, 1e-9, "Bambu time")
+        assert_close(result['filament_g'], 9.62, 1e-9, "Bambu weight")
+
+        s3d = (b"; G-Code generated by Simplify3D(R) Version 4.1.2\n;   Build time: 2 hours 15 minutes\n"
+               b";   Filament length: 4523.1 mm (4.52 m)\n;   Plastic weight: 13.49 g (0.03 lb)\n")
+        result = analyze_gcode(io.BytesIO(s3d), len(s3d))
+        assert_close(result['print_time_hours'], 2.25, 1e-9, "Simplify3D time")
+        assert_close(result['filament_mm'], 4523.1, 1e-9, "Simplify3D length")
+
+    def square_with_acceleration():
+        # Four 100 mm sides at 50 mm/s and 1000 mm/s^2, stopping at each corner, plus a 2 s dwell
+        gcode = (b"G90\nM83\nM204 S1000\nG28 W\nG1 X0 Y0 F3000\nG1 X100 Y0 E5\nG1 X100 Y100 E5 ; side\n"
+                 b"G1 X0 Y100 E5\nG1 X0 Y0 E5\nG4 S2\n")
+        result = simulate_gcode(io.BytesIO(gcode))
+        # Three sides start and end at rest (2 s + 0.05 s); the last runs on at full speed
+        assert_close(result['print_time_hours'] * 3600, 3 * 2.05 + 2.025 + 2, 1e-6, "seconds")
+        assert_close(result['filament_mm'], 20, 1e-9, "filament")
+
+    def arcs_and_absolute_extrusion():
+        gcode = (b"G90\nM82\nM204 S100000\nG92 E0\nG1 X10 Y0 F600\nG92 E0\n"
+                 b"G2 X10 Y0 I-10 J0 E3\nG92 E0\nG3 X-10 Y0 I-10 J0 E1\nG1 E0.5\nG1 E1\n")
+        result = simulate_gcode(io.BytesIO(gcode))
+        # Full circle (r=10) then a half circle, at 10 mm/s; the retract and unretract cancel
+        expected = (2 * math.pi * 10 + math.pi * 10 + 2 * 0.5) / 10
+        assert_close(result['print_time_hours'] * 3600, expected, 0.01, "seconds")
+        assert_close(result['filament_mm'], 4, 1e-9, "filament")
+
+    def block_parser_matches_fallback():
+        for extrusion in ('relative', 'absolute'):
+            text = layer_moves(5, rng, extrusion).encode()
+            fast_codes, fast_table = _parse_block(text)
+            slow_codes, slow_table = _parse_lines(text)
+            assert np.array_equal(fast_codes, slow_codes), f"{extrusion}: command codes differ"
+            assert np.array_equal(fast_table, slow_table, equal_nan=True), f"{extrusion}: parameters differ"
+        text = b"G1X10Y10 ; no spaces\nM862.3 P \"MK4S\"\nG92 E\n"
+        fast, slow = _parse_block(text[:-len(b"G92 E\n")]), _parse_lines(text[:-len(b"G92 E\n")])
+        assert np.array_equal(fast[1], slow[1], equal_nan=True), "run-together words parsed differently"
+        assert _parse_block(text) is None, "a word without a number was not sent to the fallback"
+        result = simulate_gcode(io.BytesIO(b"G91\nM204 S100000\nG1 X10 Y0 F600\nG92 E\nG1 X0 Y10\n"))
+        assert_close(result['print_time_hours'] * 3600, 2, 0.01, "fallback seconds")
+
+    def gcode_3mf_package():
+        gcode = b"; total estimated time: 2h 30m\n; total filament weight [g] : 42.5\n; filament used [mm] = 14000\nG1 X1\n"
+        path = os.path.join(work_dir, 'plate.gcode.3mf')
+        with zipfile.ZipFile(path, 'w') as package:
+            package.writestr('3D/3dmodel.model', '<model/>')
+            package.writestr('Metadata/plate_1.gcode', gcode)
+        result = analyze_sliced_file(path)
+        assert result['source'] == 'slicer', result
+        assert_close(result['print_time_hours'], 2.5, 1e-9, "time")
+        assert_close(result['filament_g'], 42.5, 1e-9, "weight")
+
+    def throughput():
+        path = os.path.join(work_dir, 'large.gcode')
+        with open(path, 'w') as f:
+            while f.tell() < megabytes * 1024 * 1024:
+                f.write(layer_moves(50, rng))
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        started = time.perf_counter()
+        result = analyze_sliced_file(path)
+        elapsed = time.perf_counter() - started
+        assert result['source'] == 'simulated', result
+        assert result['print_time_hours'] > 0 and result['filament_mm'] > 0, result
+        print(f"   {size_mb:.1f} MB G-code simulated in {elapsed:.2f}s ({size_mb / elapsed:.1f} MB/s): "
+              f"{result['print_time_hours']:.2f} h, {result['filament_g']:.1f} g")
+
+    try:
+        for description, check in [
+            ("PrusaSlicer estimates are read from the footer", prusaslicer_footer),
+            ("Cura, Bambu Studio and Simplify3D headers", cura_and_others_header),
+            ("Acceleration and cornering in simulated time", square_with_acceleration),
+            ("Arcs, absolute extrusion and G92 resets", arcs_and_absolute_extrusion),
+            ("Block parser matches the line-by-line fallback", block_parser_matches_fallback),
+            ("G-code plates inside .gcode.3mf packages", gcode_3mf_package),
+            ("Simulation throughput", throughput),
+        ]:
+            try:
+                check()
+                print(f"✅ PASS: {description}")
+                passed += 1
+            except AssertionError as e:
+                print(f"❌ FAIL: {description} - {e}")
+                failed += 1
+    finally:
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
+
+    print("=" * 50)
+    print(f"Results: {passed} passed, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test the sliced G-code analyzer")
+    parser.add_argument('--megabytes', type=int, default=50,
+                        help='Size of the generated G-code file for the throughput check (default: 50)')
+    args = parser.parse_args()
+    success = test_gcode_analyzer(args.megabytes)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the chunked OBJ reader (app/services/obj_reader.py)
+
+Checks parsing of the OBJ features students' exports use (slash references,
+negative indices, polygons, w coordinates), rejection of malformed files, and
+that peak memory while reading a large file stays within a fixed multiple of
+the parsed mesh size. Prints parse throughput in vertices per second.
+
+Usage:
+    python tools/test_obj_parser.py
+    python tools/test_obj_parser.py --vertices 2000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.obj_reader import BLOCK_WORKING_SET_CHUNKS, CHUNK_BYTES, read_obj
+
+# Peak traced allocations may be at most this multiple of the final arrays
+# (capacity estimated from the file size), plus the working set of one block
+MEMORY_CEILING_FACTOR = 2
+MEMORY_CEILING_SLACK = BLOCK_WORKING_SET_CHUNKS * CHUNK_BYTES
+
+
+def write_obj(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def write_grid_obj(path, vertex_count):
+    """Write a square grid of about vertex_count vertices as quads, block by block."""
+    side = max(2, int(np.sqrt(vertex_count)))
+    with open(path, 'w') as f:
+        f.write("# generated grid\no grid\n")
+        for row in range(side):
+            xs = np.arange(side, dtype=np.float64)
+            block = np.stack([xs * 0.5, np.full(side, row * 0.5), np.sin(xs + row)], axis=1)
+            f.write(''.join(f"v {x:.4f} {y:.4f} {z:.4f}\n" for x, y, z in block))
+        for row in range(side - 1):
+            a = row * side + np.arange(1, side)
+            f.write(''.join(f"f {p} {p + 1} {p + side + 1} {p + side}\n" for p in a))
+    return side * side, 2 * (side - 1) ** 2
+
+
+def test_obj_parser(vertex_count):
+    """Run correctness checks, then the memory ceiling and throughput check."""
+    passed = 0
+    failed = 0
+    work_dir = tempfile.mkdtemp(prefix='test_obj_parser_')
+
+    print("Testing chunked OBJ reader...")
+    print("=" * 50)
+
+    def slash_refs_and_w():
+        path = write_obj(work_dir, 'refs.obj',
+                         "v 0 0 0 1.0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n"
+                         "vt 0 0\nvn 0 0 1\n"
+                         "f 1/1/1 2/1/1 3//1\n")
+        vertices, triangles = read_obj(path)
+        assert vertices.shape == (4, 3), vertices.shape
+        assert triangles.tolist() == [[0, 1, 2]], triangles.tolist()
+
+    def negative_indices():
+        path = write_obj(work_dir, 'negative.obj',
+                         "v 0 0 0\nv 1 0 0\nv 1 1 0\nf -3 -2 -1\n"
+                         "v 0 1 0\nf 1 -2 -1\n")
+        _, triangles = read_obj(path)
+        assert triangles.tolist() == [[0, 1, 2], [0, 2, 3]], triangles.tolist()
+
+    def polygon_fan():
+        path = write_obj(work_dir, 'pentagon.obj',
+                         "v 0 0 0\nv 2 0 0\nv 3 1 0\nv 1 2 0\nv -1 1 0\nf 1 2 3 4 5\n")
+        _, triangles = read_obj(path)
+        assert triangles.tolist() == [[0, 1, 2], [0, 2, 3], [0, 3, 4]], triangles.tolist()
+
+    def malformed_rejected():
+        for name, text in [
+            ('missing.obj', "v 0 0 0\nv 1 0 0\nv 1 1 0\nf 1 2 4\n"),
+            ('zero.obj', "v 0 0 0\nv 1 0 0\nv 1 1 0\nf 0 1 2\n"),
+            ('short.obj', "v 0 0\nv 1 0 0\nv 1 1 0\nf 1 2 3\n"),
+            ('text.obj', "v 0 0 x\nv 1 0 0\nv 1 1 0\nf 1 2 3\n"),
+        ]:
+            try:
+                read_obj(write_obj(work_dir, name, text))
+            except ValueError:
+                continue
+            raise AssertionError(f"{name} was accepted")
+
+    def memory_ceiling():
+        path = os.path.join(work_dir, 'grid.obj')
+        expected_vertices, expected_triangles = write_grid_obj(path, vertex_count)
+        file_mb = os.path.getsize(path) / 1024 / 1024
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        vertices, triangles = read_obj(path)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(vertices) == expected_vertices, f"{len(vertices)} vertices"
+        assert len(triangles) == expected_triangles, f"{len(triangles)} triangles"
+        mesh_bytes = vertices.nbytes + triangles.nbytes
+        ceiling = MEMORY_CEILING_FACTOR * mesh_bytes + MEMORY_CEILING_SLACK
+        print(f"   {file_mb:.1f} MB OBJ, {len(vertices):,} vertices, {len(triangles):,} triangles")
+        print(f"   {elapsed:.2f}s, {len(vertices) / elapsed / 1e6:.2f}M vertices/s, "
+              f"peak {peak / 1024 / 1024:.1f} MB (mesh {mesh_bytes / 1024 / 1024:.1f} MB, "
+              f"ceiling {ceiling / 1024 / 1024:.1f} MB)")
+        assert peak <= ceiling, f"peak {peak} bytes over ceiling {ceiling}"
+
+    try:
+        for description, check in [
+            ("Slash references and w coordinates", slash_refs_and_w),
+            ("Negative indices resolve against earlier vertices", negative_indices),
+            ("Polygons are fan-triangulated", polygon_fan),
+            ("Malformed files raise ValueError", malformed_rejected),
+            ("Peak memory stays within the ceiling", memory_ceiling),
+        ]:
+            try:
+                check()
+                print(f"✅ PASS: {description}")
+                passed += 1
+            except AssertionError as e:
+                print(f"❌ FAIL: {description} - {e}")
+                failed += 1
+    finally:
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
+
+    print("=" * 50)
+    print(f"Results: {passed} passed, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test the chunked OBJ reader")
+    parser.add_argument('--vertices', type=int, default=1_000_000,
+                        help='Approximate vertex count of the generated large file (default: 1000000)')
+    args = parser.parse_args()
+    success = test_obj_parser(args.vertices)
+    sys.exit(0 if success else 1)
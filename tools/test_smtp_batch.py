@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for batched SMTP delivery (email_service.send_batch)
+
+Runs a local aiosmtpd stand-in server and checks connection reuse, the
+per-connection cap, refused recipients and reconnect after a dropped connection.
+
+Requires: pip install aiosmtpd
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SMTP_PORT = 8025
+
+# Mail settings must be in the environment before the app config is imported
+os.environ.update({
+    'MAIL_SERVER': '127.0.0.1',
+    'MAIL_PORT': str(SMTP_PORT),
+    'MAIL_USE_TLS': 'false',
+    'MAIL_USERNAME': 'tester',
+    'MAIL_DEFAULT_SENDER': 'fablab@lsu.edu',
+    'APP_STORAGE_ROOT': tempfile.mkdtemp(),
+})
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app
+from app.services.email_service import build_message, send_batch
+
+
+class StandInHandler:
+    """Records sessions and messages; refuses or drops on request."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.delivered = []
+        self.drop_next = set()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('refused'):
+            return '550 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        recipient = envelope.rcpt_tos[0]
+        if recipient in self.drop_next:
+            self.drop_next.discard(recipient)
+            return '421 Service closing transmission channel'
+        self.delivered.append(recipient)
+        return '250 Message accepted for delivery'
+
+
+def test_smtp_batch():
+    """Test batched sending against the stand-in server."""
+    handler = StandInHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=SMTP_PORT)
+    controller.start()
+
+    app = create_app('production')
+    passed = 0
+    failed = 0
+
+    print("Testing batched SMTP delivery...")
+    print("=" * 50)
+
+    try:
+        with app.app_context():
+            def reuse_and_cap():
+                handler.sessions = 0
+                handler.delivered.clear()
+                messages = [build_message(f'student{i}@lsu.edu', f'Batch {i}', f'<p>{i}</p>') for i in range(7)]
+                results = send_batch(messages, max_per_connection=3)
+                assert all(sent for sent, _ in results), results
+                assert len(handler.delivered) == 7, f"delivered {len(handler.delivered)}"
+                assert handler.sessions == 3, f"expected 3 connections, got {handler.sessions}"
+
+            def refused_recipient():
+                handler.sessions = 0
+                handler.delivered.clear()
+                messages = [build_message(address, 'Refused', '<p>x</p>')
+                            for address in ['a@lsu.edu', 'refused@lsu.edu', 'b@lsu.edu']]
+                results = send_batch(messages)
+                assert [sent for sent, _ in results] == [True, False, True], results
+                assert handler.sessions == 1, f"expected 1 connection, got {handler.sessions}"
+
+            def reconnect_after_drop():
+                handler.sessions = 0
+                handler.delivered.clear()
+                handler.drop_next = {'dropped@lsu.edu'}
+                messages = [build_message(address, 'Drop', '<p>x</p>')
+                            for address in ['a@lsu.edu', 'dropped@lsu.edu', 'b@lsu.edu']]
+                results = send_batch(messages)
+                assert [sent for sent, _ in results] == [True, True, True], results
+                assert handler.sessions == 2, f"expected 2 connections, got {handler.sessions}"
+
+            for description, check in [
+                ("One connection per max_per_connection messages", reuse_and_cap),
+                ("Refused recipient fails alone, connection reused", refused_recipient),
+                ("Dropped connection is re-opened and message retried", reconnect_after_drop),
+            ]:
+                try:
+                    check()
+                    print(f"✅ PASS: {description}")
+                    passed += 1
+                except AssertionError as e:
+                    print(f"❌ FAIL: {description} - {e}")
+                    failed += 1
+    finally:
+        controller.stop()
+
+    print("=" * 50)
+    print(f"Results: {passed} passed, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = test_smtp_batch()
+    sys.exit(0 if success else 1)